@@ -1,14 +1,15 @@
 # app.py
 # Archivo principal de la aplicación Flask.
-# Configura la aplicación, la base de datos y registra los Blueprints.
+# Define create_app(), que configura la aplicación, la base de datos y registra
+# los Blueprints, y la instancia 'app' que usan gunicorn y los scripts.
 
-import os
-from flask import Flask, flash, session, redirect, url_for, request, render_template
+from flask import Flask, current_app, flash, session, redirect, url_for, request, render_template
 from flask_wtf.csrf import CSRFProtect
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 import re # Necesario para el filtro nl2br
 
+from config import configure_database, load_config
 from extensions import db, login_required
 
 from models import User, Moto, Invoice
@@ -16,35 +17,21 @@ from models import User, Moto, Invoice
 from routes.main import main_bp
 from routes.admin import admin_bp
 from routes.invoices import invoices_bp
+from utils.migrations import run_migrations
+from utils.page_cache import page_cache
+from utils.pdf_cache import pdf_catalog_cache
+from utils.images import responsive_image
+from utils.storage import is_content_addressed
+from utils.sqlite_tuning import sqlite_tuning
+from utils.instrumentation import instrumentation
+from utils.assets import asset_pipeline
+from utils.compression import compression
 
-# --- Configuración de la Aplicación Flask ---
-app = Flask(__name__)
+# Protección CSRF para los formularios (se inicializa en create_app).
+csrf = CSRFProtect()
 
-# Clave secreta para seguridad de sesiones y formularios WTForms.
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your_super_secret_key_change_this_in_production_1234567890')
-
-# Configuración de la base de datos SQLite.
-basedir = os.path.abspath(os.path.dirname(__file__))
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(basedir, 'motos.db')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-# Inicializa la extensión SQLAlchemy con la aplicación Flask.
-db.init_app(app)
-
-# Configuración para la subida de imágenes.
-app.config['UPLOAD_FOLDER'] = os.path.join(basedir, 'static', 'images', 'uploads')
-app.config['ALLOWED_EXTENSIONS'] = {'png', 'jpg', 'jpeg', 'gif'}
-
-# Inicializa la protección CSRF para los formularios.
-csrf = CSRFProtect(app)
-
-# --- Registro de Blueprints ---
-app.register_blueprint(main_bp)
-app.register_blueprint(admin_bp, url_prefix='/admin')
-app.register_blueprint(invoices_bp, url_prefix='/admin/invoices')
 
 # --- Filtro Jinja2 personalizado: nl2br (New Line to Break) ---
-@app.template_filter('nl2br')
 def nl2br_filter(s):
     """Convierte saltos de línea en etiquetas <br />."""
     if s is None:
@@ -52,9 +39,22 @@ def nl2br_filter(s):
     # Reemplaza saltos de línea con <br />
     return s.replace('\n', '<br />')
 
+# --- Función global Jinja2: responsive_image ---
+def responsive_image_global(imagen_url, kind='card'):
+    """Datos de srcset/sizes de los derivados de una imagen (ver utils/images.py)."""
+    return responsive_image(current_app.static_folder, imagen_url, kind,
+                            lambda filename: url_for('static', filename=filename))
+
+# --- Cabeceras de caché para imágenes direccionadas por contenido ---
+def immutable_static_headers(response):
+    """Las imágenes nombradas por su hash nunca cambian: se cachean un año."""
+    if request.endpoint == 'static' and response.status_code == 200 \
+            and is_content_addressed(request.view_args.get('filename', '')):
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
 # --- Rutas de Autenticación (se mantienen aquí por ser globales o puntos de entrada principales) ---
 
-@app.route('/admin_login', methods=['GET', 'POST'])
 def admin_login():
     if 'logged_in' in session and session['logged_in']:
         flash('Ya has iniciado sesión.', 'info')
@@ -74,17 +74,75 @@ def admin_login():
             flash('Usuario o contraseña incorrectos.', 'danger')
     return render_template('admin_login.html')
 
-@app.route('/admin_logout')
 def admin_logout():
     session.pop('logged_in', None)
     flash('Has cerrado sesión.', 'info')
     return redirect(url_for('main_bp.index'))
 
 
+# --- Fábrica de la aplicación ---
+def create_app(config=None, instance_path=None):
+    """
+    Crea y configura la aplicación Flask.
+
+    Args:
+        config: Diccionario opcional que se aplica sobre la configuración leída del
+            entorno (ver config.py), p. ej. {'SQLALCHEMY_DATABASE_URI': ...} en un script.
+        instance_path: Carpeta 'instance' alternativa (revisión del catálogo, cachés en
+            disco...), p. ej. una carpeta temporal en los benchmarks.
+    """
+    app = Flask(__name__, instance_path=instance_path)
+    app.config.update(load_config())
+    if config:
+        app.config.update(config)
+    # Opciones del pool y réplica de lectura: se calculan antes de db.init_app,
+    # que es cuando Flask-SQLAlchemy crea los engines.
+    configure_database(app.config)
+
+    # Inicializa la extensión SQLAlchemy con la aplicación Flask.
+    db.init_app(app)
+    # WAL, busy_timeout y caché en cada conexión SQLite, y mantenimiento periódico.
+    sqlite_tuning.init_app(app)
+    # Métricas por petición y /metrics (sólo con INSTRUMENTATION activado). Se registra
+    # antes que el resto para que su after_request se ejecute el último.
+    instrumentation.init_app(app)
+
+    csrf.init_app(app)
+
+    # Caché de páginas públicas renderizadas (PAGE_CACHE_BACKEND, PAGE_CACHE_TTL).
+    page_cache.init_app(app)
+
+    # Catálogo PDF pre-generado en disco y reconstruido en segundo plano al cambiar el inventario.
+    pdf_catalog_cache.init_app(app)
+
+    # --- Registro de Blueprints ---
+    app.register_blueprint(main_bp)
+    app.register_blueprint(admin_bp, url_prefix='/admin')
+    app.register_blueprint(invoices_bp, url_prefix='/admin/invoices')
+
+    # URLs con huella de contenido y variantes .br/.gz de static/dist (build_assets.py).
+    asset_pipeline.init_app(app)
+
+    app.add_template_filter(nl2br_filter, 'nl2br')
+    app.add_template_global(responsive_image_global, 'responsive_image')
+    app.after_request(immutable_static_headers)
+
+    app.add_url_rule('/admin_login', view_func=admin_login, methods=['GET', 'POST'])
+    app.add_url_rule('/admin_logout', view_func=admin_logout)
+
+    # Compresión gzip/brotli de las páginas y respuestas JSON (envuelve app.wsgi_app).
+    compression.init_app(app)
+    return app
+
+
+# Instancia usada por gunicorn (app:app) y por los scripts de línea de comandos.
+app = create_app()
+
+
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
-        print("Database tables created if they didn't exist.")
+        run_migrations(db)
+        print("Database tables created and migrations applied.")
 
         if not User.query.filter_by(username='admin').first():
             admin_user = User(username='admin')
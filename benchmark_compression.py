@@ -0,0 +1,150 @@
+# benchmark_compression.py
+# Mide cuánto ahorra la compresión de las respuestas dinámicas (utils/compression.py)
+# y cuánto CPU cuesta, con los mismos datos sintéticos y páginas que
+# benchmark_storefront.py:
+#   1. Para cada página: bytes sin comprimir, con la sangría quitada (minify_html) y
+#      comprimidos con cada nivel de gzip y brotli, y el tiempo de CPU de cada paso
+#      (mediana de varias repeticiones).
+#   2. De punta a punta: latencia media por petición con el cliente de pruebas sin
+#      compresión, con gzip y con brotli (niveles por defecto de la aplicación).
+#
+# Uso: python benchmark_compression.py [--motos 10000] [--invoices 20000] [--repeats 20]
+#                                      [--output compresion.json]
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+
+from benchmark_storefront import ADMIN_PASSWORD, ADMIN_USER, _bench_app, scenarios, seed
+from utils.compression import compress, load_brotli, minify_html
+
+GZIP_LEVELS = (1, 6, 9)
+BROTLI_QUALITIES = (1, 4, 6, 11)
+
+
+def _median_seconds(function, repeats):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def _fetch_pages(bench_app, plan):
+    """Cuerpo sin comprimir de la primera ruta de cada escenario (sin la descarga del PDF)."""
+    public, admin = bench_app.test_client(), bench_app.test_client()
+    admin.post('/admin_login', data={'username': ADMIN_USER, 'password': ADMIN_PASSWORD})
+    pages = []
+    for name, paths, needs_admin, _ in plan:
+        response = (admin if needs_admin else public).get(paths[0])
+        if response.mimetype == 'text/html' and response.status_code == 200:
+            pages.append((name, paths[0], needs_admin, response.get_data()))
+    return pages
+
+
+def measure_levels(pages, repeats, brotli_module):
+    """Tamaño y tiempo de CPU de cada configuración, por página."""
+    configs = [('gzip', level) for level in GZIP_LEVELS]
+    if brotli_module is not None:
+        configs += [('br', quality) for quality in BROTLI_QUALITIES]
+
+    results = []
+    for name, _, _, body in pages:
+        text = body.decode('utf-8')
+        minify_s = _median_seconds(lambda: minify_html(text), repeats)
+        minified = minify_html(text).encode('utf-8')
+        row = {'pagina': name, 'bytes': len(body), 'minificado_bytes': len(minified),
+               'minificado_us': round(minify_s * 1e6, 1), 'niveles': []}
+        for encoding, level in configs:
+            for minify, source in ((False, body), (True, minified)):
+                def run():
+                    return compress(source, encoding, gzip_level=level, brotli_quality=level,
+                                    brotli_module=brotli_module)
+                seconds = _median_seconds(run, repeats)
+                row['niveles'].append({'codificacion': encoding, 'nivel': level, 'minificado': minify,
+                                       'bytes': len(run()), 'us': round(seconds * 1e6, 1)})
+        results.append(row)
+    return results
+
+
+def measure_end_to_end(work_dir, pages, requests):
+    """Latencia media por petición (cliente de pruebas) según Accept-Encoding."""
+    bench_app = _bench_app(work_dir)
+    public, admin = bench_app.test_client(), bench_app.test_client()
+    admin.post('/admin_login', data={'username': ADMIN_USER, 'password': ADMIN_PASSWORD})
+
+    results = []
+    for accept_encoding in ('identity', 'gzip', 'br'):
+        total_seconds = total_bytes = 0
+        for _, path, needs_admin, _ in pages:
+            client = admin if needs_admin else public
+            for i in range(requests + 2):
+                started = time.perf_counter()
+                response = client.get(path, headers={'Accept-Encoding': accept_encoding})
+                data = response.get_data()
+                # Las dos primeras peticiones calientan plantillas y consultas.
+                if i >= 2:
+                    total_seconds += time.perf_counter() - started
+                    total_bytes += len(data)
+        count = requests * len(pages)
+        results.append({'accept_encoding': accept_encoding, 'ms_por_peticion': round(total_seconds / count * 1000, 3),
+                        'bytes_por_peticion': round(total_bytes / count)})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bytes ahorrados y coste de CPU de la compresión de respuestas.')
+    parser.add_argument('--motos', type=int, default=10000)
+    parser.add_argument('--invoices', type=int, default=20000)
+    parser.add_argument('--repeats', type=int, default=20, help='Repeticiones por medida de compresión.')
+    parser.add_argument('--requests', type=int, default=30, help='Peticiones por página de punta a punta.')
+    parser.add_argument('--output', help='Guarda los resultados en este archivo JSON.')
+    args = parser.parse_args()
+
+    brotli_module = load_brotli()
+    if brotli_module is None:
+        print("El paquete 'brotli' no está instalado: sólo se mide gzip.")
+
+    with tempfile.TemporaryDirectory(prefix='bench-compression-') as work_dir:
+        preparation = seed(work_dir, args.motos, args.invoices)
+        print(f"{args.motos} motos y {args.invoices} facturas cargadas en {preparation['seed_s']:.1f}s")
+        plan = scenarios(work_dir, args.motos, args.requests)
+        pages = _fetch_pages(_bench_app(work_dir), plan)
+        levels = measure_levels(pages, args.repeats, brotli_module)
+        end_to_end = measure_end_to_end(work_dir, pages, args.requests)
+
+    print(f"\n{'página':<26} {'bytes':>8} {'sin sangría':>12} {'us':>7}")
+    for row in levels:
+        print(f"{row['pagina']:<26} {row['bytes']:>8} {row['minificado_bytes']:>12} {row['minificado_us']:>7.0f}")
+
+    # Totales de todas las páginas por configuración.
+    print(f"\n{'codificación':<14} {'minif.':<8} {'bytes':>9} {'ahorro':>7} {'us total':>9} {'KB ahorrados/ms CPU':>20}")
+    raw_total = sum(row['bytes'] for row in levels)
+    totals = {}
+    for row in levels:
+        for level in row['niveles']:
+            key = (level['codificacion'], level['nivel'], level['minificado'])
+            size, micros = totals.get(key, (0, 0.0))
+            totals[key] = (size + level['bytes'], micros + level['us'] + (row['minificado_us'] if key[2] else 0))
+    for (encoding, level, minify), (size, micros) in totals.items():
+        saved_kb = (raw_total - size) / 1024
+        print(f"{f'{encoding}-{level}':<14} {'sí' if minify else 'no':<8} {size:>9} "
+              f"{1 - size / raw_total:>7.1%} {micros:>9.0f} {saved_kb / (micros / 1000):>20.1f}")
+    print(f"{'sin comprimir':<14} {'no':<8} {raw_total:>9}")
+
+    print(f"\n{'Accept-Encoding':<16} {'ms/petición':>12} {'bytes/petición':>15}")
+    for row in end_to_end:
+        print(f"{row['accept_encoding']:<16} {row['ms_por_peticion']:>12.2f} {row['bytes_por_peticion']:>15}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'preparacion': preparation, 'niveles': levels, 'punta_a_punta': end_to_end}, f,
+                      indent=2, ensure_ascii=False)
+        print(f"Resultados guardados en {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+# benchmark_pdf_export.py
+# Mide la generación del catálogo PDF en un proceso y en paralelo por marca.
+# Para cada tamaño de inventario se crea una base de datos SQLite temporal con motos
+# sintéticas (no toca motos.db) y se ejecuta cada modo en un subproceso propio, de
+# modo que el pico de memoria (RSS) de una medición no contamine la siguiente.
+#
+# Uso: python benchmark_pdf_export.py [--sizes 100 1000 10000] [--workers N]
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BRANDS = ['Benelli', 'BMW', 'CFMoto', 'Ducati', 'Harley-Davidson', 'Hero', 'Honda', 'Kawasaki',
+          'Keeway', 'KTM', 'Motomel', 'Royal Enfield', 'Suzuki', 'Triumph', 'TVS', 'Yamaha']
+IMAGES = ['images/moto1.jpg', 'images/moto2.jpg', 'images/moto3.jpg', 'images/moto4.jpg']
+MODES = ('secuencial', 'paralelo')
+
+
+def _bench_app(work_dir):
+    """Aplicación mínima con una base de datos temporal y las carpetas del proyecto."""
+    from flask import Flask
+    from extensions import db
+
+    basedir = os.path.abspath(os.path.dirname(__file__))
+    bench_app = Flask(__name__, static_folder=os.path.join(basedir, 'static'), instance_path=work_dir)
+    bench_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(work_dir, 'bench.db')
+    bench_app.config['PDF_THUMBNAIL_DIR'] = os.path.join(work_dir, 'pdf_thumbnails')
+    db.init_app(bench_app)
+    return bench_app, db
+
+
+def seed(work_dir, count):
+    """Crea la base de datos temporal con 'count' motos sintéticas."""
+    from models import Moto
+
+    bench_app, db = _bench_app(work_dir)
+    with bench_app.app_context():
+        db.create_all()
+        db.session.bulk_insert_mappings(Moto, [{
+            'marca': BRANDS[i % len(BRANDS)],
+            'modelo': f'Modelo {i:05d}',
+            'año': 2015 + i % 10,
+            'precio': 2500 + (i * 37) % 20000,
+            'descripcion': 'Moto de prueba para el benchmark del catálogo PDF. ' * 3,
+            'imagen_url': IMAGES[i % len(IMAGES)],
+        } for i in range(count)])
+        db.session.commit()
+
+
+def run_once(work_dir, mode, workers):
+    """Genera el PDF en este proceso y devuelve las métricas."""
+    from utils.pdf_generator import write_pdf_motos, write_pdf_motos_parallel
+
+    bench_app, db = _bench_app(work_dir)
+    output_path = os.path.join(work_dir, f'catalogo-{mode}.pdf')
+    started = time.perf_counter()
+    if mode == 'paralelo':
+        write_pdf_motos_parallel(bench_app, db, output_path, workers=workers)
+    else:
+        write_pdf_motos(bench_app, db, output_path)
+    elapsed = time.perf_counter() - started
+
+    # En Linux ru_maxrss está en KiB. RUSAGE_CHILDREN da el máximo entre los procesos del pool.
+    return {
+        'segundos': round(elapsed, 2),
+        'rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'rss_worker_mb': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+        'tamano_mb': round(os.path.getsize(output_path) / 1e6, 2),
+    }
+
+
+def _child(*args):
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), *map(str, args)],
+                            check=True, capture_output=True, text=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de la generación del catálogo PDF.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    # Modos internos: cada medición se ejecuta en un subproceso.
+    parser.add_argument('--seed', nargs=2, metavar=('DIR', 'N'), help=argparse.SUPPRESS)
+    parser.add_argument('--run', nargs=2, metavar=('DIR', 'MODO'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.seed:
+        seed(args.seed[0], int(args.seed[1]))
+        print(json.dumps({}))
+        return
+    if args.run:
+        print(json.dumps(run_once(args.run[0], args.run[1], args.workers)))
+        return
+
+    print(f"Workers: {args.workers} (núcleos disponibles: {os.cpu_count()})")
+    print(f"{'motos':>7} {'modo':<11} {'tiempo':>8} {'RSS':>9} {'RSS worker':>11} {'PDF':>9}")
+    with tempfile.TemporaryDirectory(prefix='bench-pdf-') as thumbnails_dir:
+        for count in args.sizes:
+            with tempfile.TemporaryDirectory(prefix='bench-pdf-') as work_dir:
+                # Las miniaturas se comparten entre mediciones: tras la primera, se mide
+                # la generación del documento con la caché caliente, como en producción.
+                os.symlink(thumbnails_dir, os.path.join(work_dir, 'pdf_thumbnails'))
+                _child('--seed', work_dir, count)
+                for mode in MODES:
+                    r = _child('--run', work_dir, mode, '--workers', args.workers)
+                    print(f"{count:>7} {mode:<11} {r['segundos']:>7.2f}s {r['rss_mb']:>6.1f} MB "
+                          f"{r['rss_worker_mb']:>8.1f} MB {r['tamano_mb']:>6.2f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+# benchmark_sqlite_contention.py
+# Mide la contención entre lectores y escritores en SQLite con la configuración por
+# defecto y con la de utils/sqlite_tuning.py (WAL, synchronous=NORMAL, busy_timeout...).
+# Para cada modo se crea una base de datos temporal con motos sintéticas (no toca
+# motos.db) y se lanzan varios procesos a la vez, como los workers de gunicorn:
+#   - lectores: consultan páginas del catálogo (conteo + página filtrada por marca).
+#   - escritores: actualizan el precio de una moto y hacen commit, como al guardar
+#     desde el panel de administración.
+# Se informa de lecturas/s, escrituras/s, latencias p50/p99 y errores "database is locked".
+#
+# Uso: python benchmark_sqlite_contention.py [--readers 4] [--writers 2] [--seconds 5]
+#                                            [--motos 5000] [--busy-timeout 0]
+
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+BRANDS = ['Benelli', 'BMW', 'CFMoto', 'Ducati', 'Honda', 'Kawasaki', 'KTM', 'Suzuki', 'Triumph', 'Yamaha']
+MODES = ('defecto', 'ajustado')
+PAGE_SIZE = 9
+
+
+def _bench_app(db_path, mode, busy_timeout_ms):
+    """Aplicación mínima contra la base de datos temporal, con o sin el ajuste de SQLite."""
+    from flask import Flask
+    from extensions import db
+    from utils.sqlite_tuning import DEFAULT_SQLITE_PRAGMAS, SQLiteTuning
+    import models  # Registra los modelos para create_all().
+
+    bench_app = Flask(__name__, instance_path=os.path.dirname(db_path))
+    bench_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + db_path
+    # Sin el ajuste, sqlite3 espera 5 s por defecto a que se libere el bloqueo;
+    # se usa el mismo tiempo de espera en los dos modos para que la comparación sea justa.
+    bench_app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'connect_args': {'timeout': busy_timeout_ms / 1000}}
+    bench_app.config['SQLITE_PRAGMAS'] = dict(DEFAULT_SQLITE_PRAGMAS, busy_timeout=busy_timeout_ms)
+    bench_app.config['SQLITE_MAINTENANCE_INTERVAL'] = 0
+    db.init_app(bench_app)
+    if mode == 'ajustado':
+        SQLiteTuning(bench_app)
+    return bench_app, db
+
+
+def seed(db_path, count):
+    from models import Moto
+
+    bench_app, db = _bench_app(db_path, 'defecto', 5000)
+    with bench_app.app_context():
+        db.create_all()
+        db.session.bulk_insert_mappings(Moto, [{
+            'marca': BRANDS[i % len(BRANDS)],
+            'modelo': f'Modelo {i:05d}',
+            'año': 2015 + i % 10,
+            'precio': 2500 + (i * 37) % 20000,
+            'descripcion': 'Moto de prueba para el benchmark de contención. ' * 4,
+            'imagen_url': f'images/moto{i % 4 + 1}.jpg',
+        } for i in range(count)])
+        db.session.commit()
+
+
+def _is_locked(error):
+    return 'database is locked' in str(error) or 'database table is locked' in str(error)
+
+
+def reader(db_path, mode, busy_timeout_ms, seconds, barrier, results):
+    """Consulta páginas del catálogo hasta que se acaba el tiempo."""
+    from models import Moto
+
+    bench_app, db = _bench_app(db_path, mode, busy_timeout_ms)
+    rng = random.Random(os.getpid())
+    latencies, locked, other = [], 0, 0
+    with bench_app.app_context():
+        barrier.wait()
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            brand = rng.choice(BRANDS)
+            started = time.perf_counter()
+            try:
+                query = Moto.query.filter(Moto.marca == brand)
+                total = query.order_by(None).count()
+                page = rng.randrange(max(1, total // PAGE_SIZE))
+                query.order_by(Moto.id.desc()).limit(PAGE_SIZE).offset(page * PAGE_SIZE).all()
+                latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                if _is_locked(e):
+                    locked += 1
+                else:
+                    other += 1
+            finally:
+                db.session.rollback()
+    results.put(('lector', latencies, locked, other))
+
+
+def writer(db_path, mode, busy_timeout_ms, seconds, barrier, results):
+    """Actualiza precios (una moto por transacción) hasta que se acaba el tiempo."""
+    from models import Moto
+
+    bench_app, db = _bench_app(db_path, mode, busy_timeout_ms)
+    rng = random.Random(os.getpid())
+    latencies, locked, other = [], 0, 0
+    with bench_app.app_context():
+        max_id = db.session.query(db.func.max(Moto.id)).scalar()
+        db.session.rollback()
+        barrier.wait()
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                moto = db.session.get(Moto, rng.randint(1, max_id))
+                moto.precio = round(moto.precio * rng.uniform(0.95, 1.05), 2)
+                db.session.commit()
+                latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                db.session.rollback()
+                if _is_locked(e):
+                    locked += 1
+                else:
+                    other += 1
+    results.put(('escritor', latencies, locked, other))
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def run_mode(mode, args, work_dir):
+    db_path = os.path.join(work_dir, f'{mode}.db')
+    seed(db_path, args.motos)
+
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(args.readers + args.writers)
+    results = context.Queue()
+    processes = [context.Process(target=reader, args=(db_path, mode, args.busy_timeout, args.seconds, barrier, results))
+                 for _ in range(args.readers)]
+    processes += [context.Process(target=writer, args=(db_path, mode, args.busy_timeout, args.seconds, barrier, results))
+                  for _ in range(args.writers)]
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    summary = {}
+    for role in ('lector', 'escritor'):
+        rows = [r for r in collected if r[0] == role]
+        latencies = [latency for r in rows for latency in r[1]]
+        summary[role] = {
+            'ops_s': len(latencies) / args.seconds,
+            'p50_ms': _percentile(latencies, 0.50) * 1000,
+            'p99_ms': _percentile(latencies, 0.99) * 1000,
+            'bloqueos': sum(r[2] for r in rows),
+            'otros': sum(r[3] for r in rows),
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de contención lectura/escritura en SQLite.')
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--motos', type=int, default=5000)
+    parser.add_argument('--busy-timeout', type=int, default=0,
+                        help='Milisegundos de espera ante un bloqueo (0 = fallar de inmediato, '
+                             'para contar cuántas operaciones chocan).')
+    args = parser.parse_args()
+
+    print(f"{args.readers} lectores, {args.writers} escritores, {args.seconds:g}s por modo, "
+          f"{args.motos} motos, busy_timeout={args.busy_timeout} ms (núcleos: {os.cpu_count()})")
+    print(f"{'modo':<9} {'rol':<9} {'ops/s':>8} {'p50':>9} {'p99':>9} {'bloqueos':>9} {'otros':>6}")
+    with tempfile.TemporaryDirectory(prefix='bench-sqlite-') as work_dir:
+        for mode in MODES:
+            summary = run_mode(mode, args, work_dir)
+            for role, r in summary.items():
+                print(f"{mode:<9} {role:<9} {r['ops_s']:>8.1f} {r['p50_ms']:>7.2f}ms {r['p99_ms']:>7.2f}ms "
+                      f"{r['bloqueos']:>9} {r['otros']:>6}")
+
+
+if __name__ == '__main__':
+    main()
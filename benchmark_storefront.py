@@ -0,0 +1,459 @@
+# benchmark_storefront.py
+# Benchmark reproducible de las rutas públicas y del panel de administración.
+# Para cada tamaño de inventario se crea una base de datos SQLite temporal (no toca
+# motos.db) con motos y facturas sintéticas (siempre las mismas: semilla fija) y se
+# mide el rendimiento (peticiones/s) y la latencia p50/p90/p99 de cada escenario:
+#   - inicio, catálogo (filtros, búsqueda, página profunda y cursor profundo), detalle,
+#   - listado de facturas y descarga del catálogo PDF (con sesión de administrador).
+# Servidores: el cliente de pruebas de Flask (sin red, en el mismo proceso) y, además,
+# gunicorn o waitress escuchando en local con varias conexiones concurrentes.
+#
+# Los resultados se guardan en JSON (con el commit actual) para comparar entre commits:
+#   python benchmark_storefront.py --output antes.json
+#   python benchmark_storefront.py --output despues.json --compare antes.json
+# Con --compare, termina con código de salida 1 si algún escenario empeora más
+# que la tolerancia indicada.
+#
+# Uso: python benchmark_storefront.py [--sizes 1000 10000 100000] [--invoices 100000]
+#          [--requests 200] [--servers testclient waitress gunicorn] [--concurrency 4]
+#          [--snapshot] [--page-cache] [--output resultados.json] [--compare anterior.json]
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+BRANDS = ['Benelli', 'BMW', 'CFMoto', 'Ducati', 'Harley-Davidson', 'Hero', 'Honda', 'Kawasaki',
+          'Keeway', 'KTM', 'Motomel', 'Royal Enfield', 'Suzuki', 'Triumph', 'TVS', 'Yamaha']
+STYLES = ['naked', 'scrambler', 'trail', 'aventura', 'café racer', 'deportiva', 'custom', 'scooter']
+WORDS = ['motor', 'bicilíndrico', 'ágil', 'ciudad', 'carretera', 'potente', 'ligera', 'clásica',
+         'suspensión', 'frenos', 'electrónica', 'cómoda', 'diseño', 'italiano', 'japonés', 'rendimiento']
+IMAGES = ['images/moto1.jpg', 'images/moto2.jpg', 'images/moto3.jpg', 'images/moto4.jpg']
+SERVERS = ('testclient', 'waitress', 'gunicorn')
+ADMIN_USER, ADMIN_PASSWORD = 'admin', 'benchmark'
+SEED = 42
+
+
+def _bench_app(work_dir, snapshot=False, page_cache=False):
+    """La aplicación real (create_app) contra la base de datos y la carpeta temporales."""
+    from app import create_app
+
+    return create_app({
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(work_dir, 'bench.db'),
+        'WTF_CSRF_ENABLED': False,
+        # Sin caché de páginas se mide el renderizado real de cada petición.
+        'PAGE_CACHE_BACKEND': 'memory' if page_cache else None,
+        'CATALOG_SNAPSHOT': snapshot,
+        'PDF_EXPORT_WORKERS': 1,
+    }, instance_path=work_dir)
+
+
+def server_app():
+    """Punto de entrada para gunicorn/waitress ('benchmark_storefront:server_app()')."""
+    return _bench_app(os.environ['BENCH_WORK_DIR'],
+                      snapshot=os.environ.get('BENCH_SNAPSHOT') == '1',
+                      page_cache=os.environ.get('BENCH_PAGE_CACHE') == '1')
+
+
+# --- Datos sintéticos ---
+
+def _moto_rows(count, rng):
+    for i in range(count):
+        marca = BRANDS[i % len(BRANDS)]
+        style = rng.choice(STYLES)
+        yield {
+            'marca': marca,
+            'modelo': f'{style.title()} {100 + i % 900}',
+            'año': 2010 + rng.randrange(16),
+            'precio': round(rng.uniform(1500, 45000), 2),
+            'descripcion': f'{marca} {style} ' + ' '.join(rng.choice(WORDS) for _ in range(25)),
+            'imagen_url': IMAGES[i % len(IMAGES)],
+        }
+
+
+def _invoice_rows(count, rng):
+    first_day = date(2024, 1, 1)
+    per_day = Counter()
+    for i in range(count):
+        day = first_day + timedelta(days=rng.randrange(730))
+        per_day[day] += 1
+        subtotal = round(rng.uniform(500, 40000), 2)
+        tax_rate = rng.choice((0.0, 0.16, 0.21))
+        tax = round(subtotal * tax_rate, 2)
+        customer = rng.randrange(5000)
+        yield {
+            'invoice_number': f"INV-{day.strftime('%Y%m%d')}-{per_day[day]:04d}",
+            'invoice_date': day,
+            'customer_name': f'Cliente {customer:04d}',
+            'customer_name_search': f'cliente {customer:04d}',
+            'customer_address': f'Calle {customer} nº {i % 200}, Ciudad',
+            'customer_email': f'cliente{customer}@example.com',
+            'items_description': f'1x {rng.choice(BRANDS)} {rng.choice(STYLES)}',
+            'subtotal_amount': subtotal,
+            'tax_rate': tax_rate,
+            'tax_amount': tax,
+            'total_amount': round(subtotal + tax, 2),
+            'notes': None,
+        }
+
+
+def _insert_chunks(connection, table, rows, chunk_size=5000):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            connection.execute(table.insert(), chunk)
+            chunk = []
+    if chunk:
+        connection.execute(table.insert(), chunk)
+
+
+def seed(work_dir, motos, invoices):
+    """
+    Crea el esquema con las migraciones y carga los datos con inserciones por lotes
+    (sin el ORM); después reconstruye el índice de búsqueda y los agregados de
+    facturación, y genera el catálogo PDF para que su descarga mida el servicio del archivo.
+    """
+    from extensions import db
+    from models import Invoice, Moto, User
+    from utils.catalog_revision import bump_catalog_revision
+    from utils.migrations import run_migrations
+    from utils.pdf_cache import pdf_catalog_cache
+    from utils.rollups import rebuild_rollups
+    from utils.search import rebuild_search_index
+
+    bench_app = _bench_app(work_dir)
+    rng = random.Random(SEED)
+    started = time.perf_counter()
+    with bench_app.app_context():
+        run_migrations(db)
+        with db.engine.begin() as connection:
+            _insert_chunks(connection, Moto.__table__, _moto_rows(motos, rng))
+            _insert_chunks(connection, Invoice.__table__, _invoice_rows(invoices, rng))
+            rebuild_search_index(connection)
+            rebuild_rollups(connection)
+        admin_user = User(username=ADMIN_USER)
+        admin_user.set_password(ADMIN_PASSWORD)
+        db.session.add(admin_user)
+        db.session.commit()
+        bump_catalog_revision(bench_app)
+        seed_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        pdf_catalog_cache.rebuild()
+        pdf_seconds = time.perf_counter() - started
+    return {'seed_s': round(seed_seconds, 2), 'pdf_rebuild_s': round(pdf_seconds, 2)}
+
+
+# --- Escenarios ---
+
+def scenarios(work_dir, motos, requests):
+    """
+    Lista de (nombre, rutas, requiere administrador, peticiones). Las rutas de un
+    escenario se recorren en orden circular.
+    """
+    from extensions import db
+    from models import Moto
+    from utils.pagination import encode_cursor
+
+    bench_app = _bench_app(work_dir)
+    with bench_app.app_context():
+        # Cursor cerca del final del orden por precio: la página más cara para OFFSET.
+        deep = db.session.query(Moto.precio, Moto.id).order_by(Moto.precio, Moto.id) \
+            .offset(max(motos - 20, 0)).first()
+    deep_cursor = encode_cursor(list(deep)) if deep else ''
+    last_page = max(1, math.ceil(motos / 9))
+    rng = random.Random(SEED)
+    return [
+        ('inicio', ['/'], False, requests),
+        ('catalogo', ['/catalogo-completo'], False, requests),
+        ('catalogo_marca', ['/catalogo-completo?brand_filter=Honda'], False, requests),
+        ('catalogo_filtros', ['/catalogo-completo?brand_filter=Honda&year_filter=2020'
+                              '&price_min=3000&price_max=30000&sort=precio_asc'], False, requests),
+        ('catalogo_busqueda', ['/catalogo-completo?search_query=naked',
+                               '/catalogo-completo?search_query=honda+aventura',
+                               '/catalogo-completo?search_query=cafe+italiano'], False, requests),
+        ('catalogo_pagina_profunda', [f'/catalogo-completo?page={max(last_page - 1, 1)}&sort=anio_desc'],
+         False, requests),
+        ('catalogo_cursor_profundo', [f'/catalogo-completo?sort=precio_asc&after={deep_cursor}'], False, requests),
+        ('moto_detalle', [f'/moto/{rng.randint(1, max(motos, 1))}' for _ in range(50)], False, requests),
+        ('admin_facturas', ['/admin/invoices/'], True, requests),
+        ('admin_facturas_filtro', ['/admin/invoices/?customer=cliente+01&date_from=2024-06-01'
+                                   '&date_to=2024-12-31'], True, requests),
+        # La descarga del PDF es mucho más pesada: menos peticiones.
+        ('admin_export_pdf', ['/admin/export_pdf_motos'], True, max(requests // 10, 5)),
+    ]
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def _summary(name, latencies, errors, elapsed):
+    return {
+        'escenario': name,
+        'peticiones': len(latencies),
+        'errores': errors,
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(_percentile(latencies, 0.50) * 1000, 2),
+        'p90_ms': round(_percentile(latencies, 0.90) * 1000, 2),
+        'p99_ms': round(_percentile(latencies, 0.99) * 1000, 2),
+        'media_ms': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+    }
+
+
+# --- Cliente de pruebas de Flask ---
+
+def run_testclient(work_dir, plan, snapshot, page_cache):
+    bench_app = _bench_app(work_dir, snapshot=snapshot, page_cache=page_cache)
+    public, admin = bench_app.test_client(), bench_app.test_client()
+    admin.post('/admin_login', data={'username': ADMIN_USER, 'password': ADMIN_PASSWORD})
+
+    results = []
+    for name, paths, needs_admin, count in plan:
+        client = admin if needs_admin else public
+        warmup = max(count // 20, 2)
+        latencies, errors = [], 0
+        started = time.perf_counter()
+        for i in range(warmup + count):
+            request_started = time.perf_counter()
+            response = client.get(paths[i % len(paths)])
+            response.get_data()
+            if i < warmup:
+                started = time.perf_counter()
+                continue
+            latencies.append(time.perf_counter() - request_started)
+            if response.status_code != 200:
+                errors += 1
+        results.append(_summary(name, latencies, errors, time.perf_counter() - started))
+    return results
+
+
+# --- Servidor local (gunicorn / waitress) ---
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _start_server(server, work_dir, port, concurrency, snapshot, page_cache):
+    env = dict(os.environ, BENCH_WORK_DIR=work_dir,
+               BENCH_SNAPSHOT='1' if snapshot else '0', BENCH_PAGE_CACHE='1' if page_cache else '0')
+    if server == 'gunicorn':
+        command = [sys.executable, '-m', 'gunicorn', '--workers', str(concurrency), '--bind', f'127.0.0.1:{port}',
+                   '--log-level', 'warning', 'benchmark_storefront:server_app()']
+    else:
+        command = [sys.executable, '-m', 'waitress', f'--listen=127.0.0.1:{port}', f'--threads={concurrency}',
+                   '--call', 'benchmark_storefront:server_app']
+    log = open(os.path.join(work_dir, f'{server}.log'), 'w')
+    process = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+                               stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'{server} terminó al arrancar (ver {log.name})')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return process, log
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f'{server} no respondió en 60 s (ver {log.name})')
+
+
+def _http_login(port):
+    from http.client import HTTPConnection
+    from urllib.parse import urlencode
+
+    connection = HTTPConnection('127.0.0.1', port, timeout=60)
+    connection.request('POST', '/admin_login', body=urlencode({'username': ADMIN_USER, 'password': ADMIN_PASSWORD}),
+                       headers={'Content-Type': 'application/x-www-form-urlencoded'})
+    response = connection.getresponse()
+    response.read()
+    connection.close()
+    return response.getheader('Set-Cookie', '').split(';', 1)[0]
+
+
+def run_http(server, work_dir, plan, concurrency, snapshot, page_cache):
+    from http.client import HTTPConnection
+
+    port = _free_port()
+    process, log = _start_server(server, work_dir, port, concurrency, snapshot, page_cache)
+    try:
+        cookie = _http_login(port)
+        local = threading.local()
+
+        def fetch(path, needs_admin):
+            # Una conexión persistente (keep-alive) por hilo del cliente.
+            if getattr(local, 'connection', None) is None:
+                local.connection = HTTPConnection('127.0.0.1', port, timeout=120)
+            headers = {'Cookie': cookie} if needs_admin else {}
+            started = time.perf_counter()
+            try:
+                local.connection.request('GET', path, headers=headers)
+                response = local.connection.getresponse()
+                response.read()
+                status = response.status
+            except OSError:
+                local.connection.close()
+                local.connection = None
+                status = 0
+            return time.perf_counter() - started, status
+
+        results = []
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for name, paths, needs_admin, count in plan:
+                warmup = max(count // 20, concurrency)
+                list(pool.map(lambda i: fetch(paths[i % len(paths)], needs_admin), range(warmup)))
+                started = time.perf_counter()
+                measured = list(pool.map(lambda i: fetch(paths[i % len(paths)], needs_admin), range(count)))
+                elapsed = time.perf_counter() - started
+                results.append(_summary(name, [latency for latency, _ in measured],
+                                        sum(1 for _, status in measured if status != 200), elapsed))
+        return results
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        log.close()
+
+
+# --- Orquestación ---
+
+def _child(*args):
+    """Cada tamaño y servidor se mide en un subproceso limpio (sin cachés de la medición anterior)."""
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), *map(str, args)],
+                            check=True, capture_output=True, text=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, previous_path, tolerance):
+    """Compara con otro archivo de resultados. Devuelve la lista de regresiones."""
+    with open(previous_path, encoding='utf-8') as f:
+        previous = json.load(f)
+    before = {(r['motos'], r['servidor'], r['escenario']): r for r in previous['resultados']}
+
+    regressions = []
+    print(f"\nComparación con {previous_path} (commit {previous['meta'].get('commit')}), "
+          f"tolerancia {tolerance:.0%}:")
+    print(f"{'motos':>7} {'servidor':<10} {'escenario':<26} {'p50':>15} {'p99':>15}")
+    for r in results:
+        old = before.get((r['motos'], r['servidor'], r['escenario']))
+        if old is None:
+            continue
+        flags = []
+        for metric in ('p50_ms', 'p99_ms'):
+            if old[metric] and r[metric] > old[metric] * (1 + tolerance):
+                flags.append(metric)
+        if flags:
+            regressions.append((r, flags))
+        print(f"{r['motos']:>7} {r['servidor']:<10} {r['escenario']:<26} "
+              f"{old['p50_ms']:>6.1f}→{r['p50_ms']:<6.1f}ms {old['p99_ms']:>6.1f}→{r['p99_ms']:<6.1f}ms"
+              f"{'  REGRESIÓN' if flags else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de las rutas públicas y de administración.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--invoices', type=int, default=100000)
+    parser.add_argument('--requests', type=int, default=200, help='Peticiones medidas por escenario.')
+    parser.add_argument('--servers', nargs='+', choices=SERVERS, default=['testclient', 'waitress'])
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='Conexiones concurrentes (y workers de gunicorn / hilos de waitress).')
+    parser.add_argument('--scenarios', nargs='+', help='Sólo estos escenarios.')
+    parser.add_argument('--snapshot', action='store_true', help='Catálogo desde la copia en memoria.')
+    parser.add_argument('--page-cache', action='store_true', help='Con la caché de páginas activada.')
+    parser.add_argument('--output', default='benchmark_resultados.json')
+    parser.add_argument('--compare', help='Resultados anteriores con los que comparar.')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    # Modos internos: cada paso se ejecuta en un subproceso.
+    parser.add_argument('--seed', nargs=3, metavar=('DIR', 'MOTOS', 'FACTURAS'), help=argparse.SUPPRESS)
+    parser.add_argument('--run', nargs=3, metavar=('DIR', 'MOTOS', 'SERVIDOR'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.seed:
+        print(json.dumps(seed(args.seed[0], int(args.seed[1]), int(args.seed[2]))))
+        return
+    if args.run:
+        work_dir, motos, server = args.run[0], int(args.run[1]), args.run[2]
+        plan = [s for s in scenarios(work_dir, motos, args.requests)
+                if not args.scenarios or s[0] in args.scenarios]
+        if server == 'testclient':
+            results = run_testclient(work_dir, plan, args.snapshot, args.page_cache)
+        else:
+            results = run_http(server, work_dir, plan, args.concurrency, args.snapshot, args.page_cache)
+        print(json.dumps(results))
+        return
+
+    options = [f'--requests={args.requests}', f'--concurrency={args.concurrency}']
+    options += ['--scenarios', *args.scenarios] if args.scenarios else []
+    options += ['--snapshot'] if args.snapshot else []
+    options += ['--page-cache'] if args.page_cache else []
+
+    meta = {
+        'commit': _git_commit(),
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'nucleos': os.cpu_count(),
+        'facturas': args.invoices,
+        'peticiones': args.requests,
+        'concurrencia': args.concurrency,
+        'snapshot': args.snapshot,
+        'page_cache': args.page_cache,
+    }
+    print(f"Commit {meta['commit']}, {meta['nucleos']} núcleos, {args.invoices} facturas, "
+          f"{args.requests} peticiones por escenario")
+    print(f"{'motos':>7} {'servidor':<10} {'escenario':<26} {'pet/s':>8} {'p50':>9} {'p90':>9} {'p99':>9} {'err':>4}")
+    results, preparation = [], {}
+    for motos in args.sizes:
+        with tempfile.TemporaryDirectory(prefix='bench-storefront-') as work_dir:
+            preparation[motos] = _child('--seed', work_dir, motos, args.invoices)
+            print(f"{motos:>7} datos cargados en {preparation[motos]['seed_s']:.1f}s, "
+                  f"PDF generado en {preparation[motos]['pdf_rebuild_s']:.1f}s")
+            for server in args.servers:
+                for r in _child('--run', work_dir, motos, server, *options):
+                    r = {'motos': motos, 'servidor': server, **r}
+                    results.append(r)
+                    print(f"{motos:>7} {server:<10} {r['escenario']:<26} {r['rps']:>8.1f} {r['p50_ms']:>7.2f}ms "
+                          f"{r['p90_ms']:>7.2f}ms {r['p99_ms']:>7.2f}ms {r['errores']:>4}")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta, 'preparacion': preparation, 'resultados': results}, f, indent=2,
+                  ensure_ascii=False)
+    print(f"Resultados guardados en {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} escenarios empeoraron más de un {args.tolerance:.0%}.")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
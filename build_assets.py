@@ -0,0 +1,28 @@
+# build_assets.py
+# Genera los recursos estáticos con huella de contenido en static/dist/ (ver
+# utils/assets.py): CSS y JS minificados con variantes .gz/.br y los logos de marcas
+# optimizados. Debe ejecutarse en cada despliegue, antes de arrancar los workers,
+# y tras modificar style.css, scripts.js o los logos.
+#
+# Uso: python build_assets.py
+
+import os
+
+from utils.assets import build_assets
+
+if __name__ == '__main__':
+    static_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+    manifest = build_assets(static_folder)
+
+    total_source = total_output = 0
+    for rel_path, entry in sorted(manifest.items()):
+        total_source += entry['source_size']
+        total_output += entry['size']
+        compressed = ''
+        for encoding in entry['encodings']:
+            suffix = '.br' if encoding == 'br' else '.gz'
+            size = os.path.getsize(os.path.join(static_folder, entry['path'] + suffix))
+            compressed += f", {encoding} {size / 1024:.1f} KB"
+        print(f"{rel_path} -> {entry['path']} ({entry['source_size'] / 1024:.1f} KB -> "
+              f"{entry['size'] / 1024:.1f} KB{compressed})")
+    print(f"Listo: {len(manifest)} recursos, {total_source / 1024:.0f} KB -> {total_output / 1024:.0f} KB.")
@@ -0,0 +1,90 @@
+# check_import_time.py
+# Comprueba el coste de arranque de un worker: importa 'app' (como hace gunicorn) en
+# procesos nuevos con 'python -X importtime' y termina con código de salida 1 si:
+#   - se carga al arrancar alguno de los módulos pesados que deben importarse sólo
+#     al usarse (ReportLab, Pillow, pypdf),
+#   - el tiempo de importación de 'app' supera el presupuesto, o
+#   - la memoria (RSS) del proceso tras la importación supera el presupuesto.
+# Se toma el mejor de varios arranques para reducir el ruido de la máquina.
+#
+# Uso: python check_import_time.py [--runs 5] [--budget-ms 550] [--rss-budget-mb 60] [--top 15]
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+# Módulos que sólo usan acciones poco frecuentes del panel (PDF, imágenes).
+LAZY_MODULES = ('reportlab', 'PIL', 'pypdf')
+
+DEFAULT_BUDGET_MS = 550
+DEFAULT_RSS_BUDGET_MB = 60
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+CHILD_CODE = f"""
+import json, resource, sys
+import app
+print(json.dumps({{
+    'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'lazy_loaded': sorted(name for name in {LAZY_MODULES!r} if name in sys.modules),
+}}))
+"""
+
+
+def measure_once():
+    """Importa 'app' en un proceso nuevo. Devuelve (métricas, [(módulo, µs acumulados, nivel)])."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHILD_CODE],
+                            cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True, check=True)
+    metrics = json.loads(result.stdout.strip().splitlines()[-1])
+    modules = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            modules.append((match.group(4), int(match.group(2)), len(match.group(3)) // 2))
+    metrics['app_ms'] = next(us for name, us, level in modules if name == 'app' and level == 0) / 1000
+    return metrics, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Presupuesto de tiempo de arranque de la aplicación.')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument('--rss-budget-mb', type=float, default=DEFAULT_RSS_BUDGET_MB)
+    parser.add_argument('--top', type=int, default=15, help='Importaciones más lentas a mostrar.')
+    args = parser.parse_args()
+
+    runs = [measure_once() for _ in range(args.runs)]
+    best, modules = min(runs, key=lambda run: run[0]['app_ms'])
+    rss_mb = min(metrics['rss_mb'] for metrics, _ in runs)
+
+    # Las importaciones directas de 'app' (nivel 1) dicen qué parte de la aplicación cuesta más.
+    print(f"Importaciones más lentas de 'app' (mejor de {args.runs} arranques):")
+    direct = sorted(((us, name) for name, us, level in modules if level == 1), reverse=True)
+    for us, name in direct[:args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+    print(f"\nimport app: {best['app_ms']:.0f} ms (presupuesto {args.budget_ms:.0f} ms)")
+    print(f"RSS tras importar: {rss_mb:.1f} MB (presupuesto {args.rss_budget_mb:.0f} MB)")
+
+    failures = []
+    if best['lazy_loaded']:
+        failures.append(f"se cargan al arrancar módulos que deben importarse al usarse: "
+                        f"{', '.join(best['lazy_loaded'])}")
+    if best['app_ms'] > args.budget_ms:
+        failures.append(f"la importación tarda {best['app_ms']:.0f} ms (presupuesto {args.budget_ms:.0f} ms)")
+    if rss_mb > args.rss_budget_mb:
+        failures.append(f"el proceso ocupa {rss_mb:.1f} MB (presupuesto {args.rss_budget_mb:.0f} MB)")
+
+    if failures:
+        print("\nFALLO:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("\nOK: el arranque está dentro del presupuesto.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# check_invoice_filters.py
+# Comprueba el filtro por cliente del listado de facturas (build_invoice_query) sobre
+# una base de datos SQLite temporal: la búsqueda por el comienzo del nombre no debe
+# distinguir mayúsculas ni acentos ("Álvaro", "álvaro" y "alvaro" encuentran
+# "Álvaro Ruiz"), también en las facturas anteriores a la columna normalizada que
+# rellena la migración 0007. Termina con código de salida 1 si algún caso falla.
+#
+# Uso: python check_invoice_filters.py
+
+import os
+import sys
+import tempfile
+from datetime import date
+
+from sqlalchemy import update
+
+CUSTOMERS = ['Álvaro Ruiz', 'Óscar Pérez', 'Juan Pérez', 'Ángela Núñez', 'Alba Soler']
+# Factura guardada sin customer_name_search, como las de antes de la migración 0007.
+LEGACY_CUSTOMER = 'Íñigo Martínez'
+
+# (texto del filtro, clientes esperados)
+CASES = [
+    ('Álvaro', {'Álvaro Ruiz'}),
+    ('álvaro', {'Álvaro Ruiz'}),
+    ('alvaro', {'Álvaro Ruiz'}),
+    ('ÁLVARO R', {'Álvaro Ruiz'}),
+    ('Óscar', {'Óscar Pérez'}),
+    ('óscar', {'Óscar Pérez'}),
+    ('oscar p', {'Óscar Pérez'}),
+    ('juan', {'Juan Pérez'}),
+    ('al', {'Álvaro Ruiz', 'Alba Soler'}),
+    ('án', {'Ángela Núñez'}),
+    ('iñigo', {LEGACY_CUSTOMER}),
+    ('inigo', {LEGACY_CUSTOMER}),
+    ('Pérez', set()),
+]
+
+
+def check_invoice_filters(work_dir):
+    """Devuelve la lista de casos cuyo resultado no es el esperado."""
+    from app import create_app
+    from extensions import db
+    from models import Invoice
+    from routes.invoices import build_invoice_query
+    from utils.migrations import run_migrations
+    from utils.search import fill_customer_search
+
+    check_app = create_app({
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(work_dir, 'check.db'),
+        'PAGE_CACHE_BACKEND': None,
+    }, instance_path=work_dir)
+
+    failures = []
+    with check_app.app_context():
+        run_migrations(db)
+        for i, name in enumerate(CUSTOMERS + [LEGACY_CUSTOMER], start=1):
+            db.session.add(Invoice(invoice_number=f'CHK-{i:04d}', invoice_date=date(2025, 1, i),
+                                   customer_name=name, items_description='1x Moto',
+                                   subtotal_amount=100.0, total_amount=100.0))
+        db.session.commit()
+
+        with db.engine.begin() as connection:
+            connection.execute(update(Invoice.__table__)
+                               .where(Invoice.__table__.c.customer_name == LEGACY_CUSTOMER)
+                               .values(customer_name_search=None))
+            fill_customer_search(connection)
+
+        for customer, expected in CASES:
+            found = {invoice.customer_name for invoice in build_invoice_query(customer=customer)}
+            status = 'OK' if found == expected else 'FALLO'
+            print(f"[{status}] {customer!r}: {sorted(found)}")
+            if found != expected:
+                failures.append((customer, expected, found))
+        db.session.remove()
+        db.engine.dispose()
+    return failures
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory(prefix='check-invoice-filters-') as work_dir:
+        failures = check_invoice_filters(work_dir)
+    if failures:
+        print(f"\n{len(failures)} filtros por cliente no devuelven lo esperado:")
+        for customer, expected, found in failures:
+            print(f"  - {customer!r}: esperado {sorted(expected)}, obtenido {sorted(found)}")
+        sys.exit(1)
+    print("\nEl filtro por cliente no distingue mayúsculas ni acentos.")
@@ -0,0 +1,128 @@
+# check_query_plans.py
+# Comprueba los planes de ejecución de las consultas del catálogo.
+# Ejecuta EXPLAIN sobre las consultas que generan las rutas públicas (con filtros,
+# búsqueda, ordenaciones y paginación por cursor) y termina con código de salida 1
+# si alguna recorre una tabla completa en lugar de usar un índice.
+#
+# Uso: python check_query_plans.py   (usa la misma base de datos que la aplicación)
+
+import re
+import sys
+from datetime import date
+
+from sqlalchemy import desc, func, select, text
+
+from app import app, db, Moto, Invoice
+from models import InvoiceDailyRollup
+from routes.main import build_catalog_query, CATALOG_SORTS
+from routes.invoices import build_invoice_query
+from utils.pagination import keyset_query
+from utils.migrations import pending_migrations
+
+# Escenarios representativos: (nombre, filtros, orden, cursor keyset de ejemplo).
+CATALOG_SCENARIOS = [
+    ('Catálogo sin filtros', {}, '', None),
+    ('Filtro por marca', {'brand_filter': 'Honda'}, '', None),
+    ('Filtro por año', {'year_filter': '2024'}, '', None),
+    ('Rango de precio', {'price_min': 3000.0, 'price_max': 9000.0}, '', None),
+    ('Marca + orden por precio', {'brand_filter': 'Honda'}, 'precio_asc', None),
+    ('Orden por precio', {}, 'precio_desc', [9000.0, 10]),
+    ('Orden por año', {}, 'anio_desc', [2023, 10]),
+    ('Búsqueda de texto', {'search_query': 'cafe racer'}, '', None),
+]
+
+# Filtros del listado de facturas del panel.
+INVOICE_SCENARIOS = [
+    ('Facturas por rango de fechas', {'date_from': date(2025, 1, 1), 'date_to': date(2025, 3, 31)}),
+    ('Facturas por cliente', {'customer': 'juan'}),
+    ('Facturas por número', {'number_prefix': 'INV-202506'}),
+]
+
+# Un "SCAN moto" sin índice sólo es aceptable cuando se recorre en orden de la
+# clave primaria con LIMIT: SQLite lee únicamente las filas de la página.
+PK_ORDERED_SCENARIOS = {'Catálogo sin filtros', 'Página de inicio (carrusel)'}
+
+SQLITE_FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(moto|invoice\w*)\b(?!.*\bUSING\b)')
+POSTGRES_FULL_SCAN = re.compile(r'Seq Scan on (moto|invoice\w*)\b')
+
+
+def catalog_statements():
+    """Genera (nombre, sentencia, admite recorrido por clave primaria) para cada consulta."""
+    for name, filters, sort, cursor in CATALOG_SCENARIOS:
+        query, search_score = build_catalog_query(**filters)
+        columns, descending = CATALOG_SORTS[sort]
+        allow_pk = name in PK_ORDERED_SCENARIOS
+
+        if search_score is not None and not sort:
+            page = query.order_by(search_score, Moto.id)
+        else:
+            page = query.order_by(*[col.desc() if descending else col.asc() for col in columns])
+        yield f'{name} - página', page.limit(9).offset(18).statement, allow_pk
+        yield f'{name} - total', select(func.count()).select_from(query.order_by(None).subquery()), allow_pk
+        if cursor:
+            yield f'{name} - cursor', keyset_query(query, columns, descending, cursor, 10).statement, allow_pk
+
+    yield 'Página de inicio (carrusel)', Moto.query.order_by(desc(Moto.id)).limit(8).statement, True
+    yield 'Años disponibles', db.session.query(Moto.año).distinct().statement, False
+    yield 'Exportación PDF', Moto.query.order_by(Moto.marca, Moto.modelo).statement, False
+    yield 'Referencias de una imagen', select(func.count()).select_from(
+        Moto.query.filter(Moto.imagen_url == 'images/uploads/x.png').subquery()), False
+    yield 'Listado de facturas', Invoice.query.order_by(Invoice.invoice_date.desc(), Invoice.id.desc()).limit(25).statement, False
+    yield 'Informe de facturación (agregados)', InvoiceDailyRollup.query.filter(
+        InvoiceDailyRollup.day.between(date(2025, 1, 1), date(2025, 12, 31))).statement, False
+    for name, filters in INVOICE_SCENARIOS:
+        query = build_invoice_query(**filters)
+        yield f'{name} - página', query.order_by(Invoice.invoice_date.desc(), Invoice.id.desc()).limit(25).statement, False
+        yield f'{name} - totales', query.with_entities(func.sum(Invoice.total_amount)).statement, False
+
+
+def explain(connection, statement):
+    """Devuelve las líneas del plan de ejecución de una sentencia."""
+    compiled = statement.compile(dialect=connection.dialect)
+    params = compiled.construct_params()
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+
+    if connection.dialect.name == 'sqlite':
+        rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + compiled.string, params)
+        return [row[-1] for row in rows]
+    # En PostgreSQL se desactiva el Seq Scan: si aun así aparece, no hay índice utilizable.
+    connection.execute(text('SET LOCAL enable_seqscan = off'))
+    rows = connection.exec_driver_sql('EXPLAIN ' + compiled.string, params)
+    return [row[0] for row in rows]
+
+
+def check_query_plans():
+    """Imprime el plan de cada consulta y devuelve la lista de consultas con recorrido completo."""
+    failures = []
+    with db.engine.begin() as connection:
+        full_scan = SQLITE_FULL_SCAN if connection.dialect.name == 'sqlite' else POSTGRES_FULL_SCAN
+        for name, statement, allow_pk in catalog_statements():
+            plan = explain(connection, statement)
+            scans = [line for line in plan if full_scan.search(line.strip())]
+            if allow_pk and connection.dialect.name == 'sqlite':
+                scans = []
+            status = 'FALLO' if scans else 'OK'
+            print(f"[{status}] {name}")
+            for line in plan:
+                print(f"        {line}")
+            if scans:
+                failures.append(name)
+    return failures
+
+
+if __name__ == '__main__':
+    with app.app_context():
+        pending = pending_migrations(db)
+        if pending:
+            print("Advertencia: hay migraciones pendientes (ejecuta init_db.py):")
+            for number, description in pending:
+                print(f"  {number:04d} {description}")
+
+        failures = check_query_plans()
+        if failures:
+            print(f"\n{len(failures)} consultas recorren una tabla completa:")
+            for name in failures:
+                print(f"  - {name}")
+            sys.exit(1)
+        print("\nTodas las consultas del catálogo usan índices.")
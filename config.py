@@ -0,0 +1,129 @@
+# config.py
+# Configuración de la aplicación a partir de variables de entorno.
+# create_app() (app.py) parte de load_config() y aplica encima la configuración que
+# reciba; después configure_database() calcula las opciones del engine y la réplica
+# de lectura a partir del resultado, así que cualquier clave se puede sustituir en
+# cualquiera de los dos niveles.
+#
+# Variables de entorno:
+#   DATABASE_URL           URL de la base de datos principal (por defecto, SQLite en motos.db).
+#   DATABASE_REPLICA_URL   URL opcional de una réplica de lectura para el catálogo público.
+#   DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING
+#                          Pool de conexiones (sólo bases de datos servidor, p. ej. PostgreSQL).
+#   CATALOG_SNAPSHOT       '1' para servir el catálogo público desde una copia en memoria.
+#   PDF_EXPORT_WORKERS     Procesos para generar el catálogo PDF por marcas en paralelo (por defecto 1).
+#   INSTRUMENTATION        '1' para medir las peticiones y publicar /metrics (utils/instrumentation.py).
+#   METRICS_TOKEN          Token para leer /metrics y /metrics/page-cache sin sesión de administrador
+#                          (cabecera 'Authorization: Bearer <token>').
+#   METRICS_ALLOWED_IPS    IPs o redes separadas por comas que pueden leer las métricas sin sesión.
+#   ASSET_PIPELINE         '0' para ignorar static/dist y servir CSS/JS/logos originales (utils/assets.py).
+#   COMPRESSION            '0' para no comprimir HTML/JSON con gzip/brotli (utils/compression.py).
+#   COMPRESSION_MIN_SIZE, COMPRESSION_GZIP_LEVEL, COMPRESSION_BROTLI_QUALITY, COMPRESSION_MINIFY_HTML
+#   SECRET_KEY, PAGE_CACHE_BACKEND, PAGE_CACHE_TTL
+
+import os
+
+from utils.read_replica import REPLICA_BIND_KEY
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+
+
+def _env_bool(environ, name, default):
+    value = environ.get(name)
+    if value is None or value == '':
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on', 'si', 'sí')
+
+
+def database_url(url):
+    """Normaliza la URL: Render y Heroku entregan 'postgres://', que SQLAlchemy ya no acepta."""
+    if url and url.startswith('postgres://'):
+        return 'postgresql://' + url[len('postgres://'):]
+    return url or None
+
+
+def load_config(environ=os.environ):
+    """Configuración por defecto de la aplicación, leída del entorno."""
+    return {
+        # Clave secreta para seguridad de sesiones y formularios WTForms.
+        'SECRET_KEY': environ.get('SECRET_KEY', 'your_super_secret_key_change_this_in_production_1234567890'),
+
+        'SQLALCHEMY_DATABASE_URI': database_url(environ.get('DATABASE_URL'))
+                                   or 'sqlite:///' + os.path.join(basedir, 'motos.db'),
+        'DATABASE_REPLICA_URL': database_url(environ.get('DATABASE_REPLICA_URL')),
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        'DB_POOL_SIZE': int(environ.get('DB_POOL_SIZE', 5)),
+        'DB_MAX_OVERFLOW': int(environ.get('DB_MAX_OVERFLOW', 10)),
+        'DB_POOL_TIMEOUT': int(environ.get('DB_POOL_TIMEOUT', 30)),
+        # Segundos tras los que se descarta una conexión (antes de que el servidor la cierre).
+        'DB_POOL_RECYCLE': int(environ.get('DB_POOL_RECYCLE', 1800)),
+        # Comprueba la conexión al sacarla del pool (evita errores tras un reinicio del servidor).
+        'DB_POOL_PRE_PING': _env_bool(environ, 'DB_POOL_PRE_PING', True),
+
+        # Subida de imágenes.
+        'UPLOAD_FOLDER': os.path.join(basedir, 'static', 'images', 'uploads'),
+        'ALLOWED_EXTENSIONS': {'png', 'jpg', 'jpeg', 'gif'},
+
+        # Caché de páginas públicas renderizadas ('memory' por proceso o 'filesystem'
+        # compartida entre workers). Se purga automáticamente al modificar motos.
+        'PAGE_CACHE_BACKEND': environ.get('PAGE_CACHE_BACKEND', 'memory') or None,
+        'PAGE_CACHE_TTL': int(environ.get('PAGE_CACHE_TTL', 300)),
+
+        # Las métricas (/metrics, /metrics/page-cache) exigen sesión de administrador, salvo
+        # para el recolector que presente este token o venga de una de estas direcciones.
+        'METRICS_TOKEN': environ.get('METRICS_TOKEN') or None,
+        'METRICS_ALLOWED_IPS': [value.strip() for value in environ.get('METRICS_ALLOWED_IPS', '').split(',')
+                                if value.strip()],
+
+        # Catálogo público servido desde una copia en memoria por worker (utils/catalog_snapshot.py).
+        'CATALOG_SNAPSHOT': _env_bool(environ, 'CATALOG_SNAPSHOT', False),
+
+        # Procesos para el catálogo PDF. El pool en paralelo tiene 2-3 s de coste fijo:
+        # sólo conviene con catálogos grandes y varios núcleos (benchmark_pdf_export.py).
+        'PDF_EXPORT_WORKERS': int(environ.get('PDF_EXPORT_WORKERS', 1)),
+
+        # Latencia, tiempo de plantillas y SQL por petición, /metrics y perfilado para administradores.
+        'INSTRUMENTATION': _env_bool(environ, 'INSTRUMENTATION', False),
+        'INSTRUMENTATION_SLOW_MS': int(environ.get('INSTRUMENTATION_SLOW_MS', 500)),
+
+        # URLs con hash de contenido y variantes precomprimidas generadas por build_assets.py.
+        'ASSET_PIPELINE': _env_bool(environ, 'ASSET_PIPELINE', True),
+
+        # Compresión gzip/brotli de las respuestas HTML y JSON (y quitar la sangría del HTML).
+        'COMPRESSION': _env_bool(environ, 'COMPRESSION', True),
+        'COMPRESSION_MIN_SIZE': int(environ.get('COMPRESSION_MIN_SIZE', 1024)),
+        'COMPRESSION_GZIP_LEVEL': int(environ.get('COMPRESSION_GZIP_LEVEL', 6)),
+        'COMPRESSION_BROTLI_QUALITY': int(environ.get('COMPRESSION_BROTLI_QUALITY', 4)),
+        'COMPRESSION_MINIFY_HTML': _env_bool(environ, 'COMPRESSION_MINIFY_HTML', False),
+    }
+
+
+def engine_options(url, config):
+    """
+    Opciones de create_engine() para una URL. SQLite no usa un servidor: su
+    configuración por conexión está en utils/sqlite_tuning.py.
+    """
+    if url.startswith('sqlite'):
+        return {}
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+    }
+
+
+def configure_database(config):
+    """
+    Completa SQLALCHEMY_ENGINE_OPTIONS y, si hay DATABASE_REPLICA_URL, el bind de
+    la réplica de lectura. Los valores puestos explícitamente se respetan.
+    """
+    config.setdefault('SQLALCHEMY_ENGINE_OPTIONS',
+                      engine_options(config['SQLALCHEMY_DATABASE_URI'], config))
+
+    replica_url = config.get('DATABASE_REPLICA_URL')
+    if replica_url:
+        binds = dict(config.get('SQLALCHEMY_BINDS') or {})
+        binds.setdefault(REPLICA_BIND_KEY, {'url': replica_url, **engine_options(replica_url, config)})
+        config['SQLALCHEMY_BINDS'] = binds
@@ -0,0 +1,33 @@
+# export_data.py
+# Exporta todas las motos o facturas a CSV o JSON Lines desde la línea de comandos.
+# Usa el mismo generador que la descarga del panel (lectura por lotes con
+# yield_per), así que la memoria no crece con la cantidad de filas.
+#
+# Uso: python export_data.py motos|facturas csv|jsonl [--salida archivo]   (sin --salida, a la salida estándar)
+
+import argparse
+import sys
+import time
+
+from app import app, db
+from utils.data_export import EXPORT_DATASETS, EXPORT_FORMATS, stream_export
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Exporta motos o facturas a CSV o JSON Lines.')
+    parser.add_argument('dataset', choices=sorted(EXPORT_DATASETS))
+    parser.add_argument('formato', choices=sorted(EXPORT_FORMATS))
+    parser.add_argument('--salida', help='Archivo de salida (por defecto, la salida estándar).')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    output = open(args.salida, 'w', encoding='utf-8', newline='') if args.salida else sys.stdout
+    try:
+        with app.app_context():
+            for chunk in stream_export(db.session, args.dataset, args.formato):
+                output.write(chunk)
+    finally:
+        if args.salida:
+            output.close()
+    print(f"Exportación de {args.dataset} ({args.formato}) terminada en "
+          f"{time.perf_counter() - started:.2f}s.", file=sys.stderr)
@@ -2,12 +2,17 @@
 # Este archivo centraliza la inicialización de extensiones como SQLAlchemy
 # y define decoradores globales para evitar importaciones circulares.
 
+import hmac
+
 from flask_sqlalchemy import SQLAlchemy
-from flask import session, redirect, url_for, flash
+from flask import current_app, request, session, redirect, url_for, flash
 from functools import wraps # Necesario para el decorador @wraps
 
+from utils.read_replica import ReplicaRoutingSession
+
 # Crea una instancia de SQLAlchemy que será usada por toda la aplicación.
-db = SQLAlchemy()
+# La sesión envía las lecturas de las vistas @read_replica a la réplica, si la hay.
+db = SQLAlchemy(session_options={'class_': ReplicaRoutingSession})
 
 # Define el decorador login_required aquí para que sea importable por los blueprints
 def login_required(f):
@@ -22,4 +27,43 @@ def login_required(f):
             flash('Por favor, inicia sesión para acceder a esta página.', 'danger')
             return redirect(url_for('admin_login'))
         return f(*args, **kwargs)
-    return decorated_function
\ No newline at end of file
+    return decorated_function
+
+
+def _metrics_client_allowed():
+    """
+    True si la petición trae el token METRICS_TOKEN (Authorization: Bearer ...) o
+    viene de una dirección de METRICS_ALLOWED_IPS (IPs o redes, p. ej. '10.0.0.0/8').
+    """
+    token = current_app.config.get('METRICS_TOKEN')
+    authorization = request.headers.get('Authorization', '')
+    if token and authorization.startswith('Bearer ') and hmac.compare_digest(
+            authorization[len('Bearer '):].encode(), token.encode()):
+        return True
+
+    allowed = current_app.config.get('METRICS_ALLOWED_IPS') or ()
+    if allowed and request.remote_addr:
+        import ipaddress  # Sólo hace falta con la lista de IPs configurada.
+
+        try:
+            address = ipaddress.ip_address(request.remote_addr)
+        except ValueError:
+            return False
+        return any(address in ipaddress.ip_network(network, strict=False) for network in allowed)
+    return False
+
+
+# Decorador para las rutas de métricas (/metrics y /metrics/page-cache).
+def metrics_access_required(f):
+    """
+    Como login_required, pero también deja pasar a un recolector (p. ej. Prometheus)
+    que se identifique con METRICS_TOKEN o venga de una IP de METRICS_ALLOWED_IPS.
+    """
+    protected = login_required(f)
+
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if _metrics_client_allowed():
+            return f(*args, **kwargs)
+        return protected(*args, **kwargs)
+    return decorated_function
@@ -51,4 +51,16 @@ class InvoiceForm(FlaskForm):
     tax_amount = FloatField('Monto de Impuesto', validators=[DataRequired(message="El monto de impuesto es requerido."), NumberRange(min=0)], default=0.0)
     total_amount = FloatField('Total', validators=[DataRequired(message="El total es requerido."), NumberRange(min=0)])
     notes = TextAreaField('Notas Adicionales', validators=[Optional(), Length(max=500)])
-    submit = SubmitField('Guardar Factura')
\ No newline at end of file
+    submit = SubmitField('Guardar Factura')
+
+
+class ImportMotosForm(FlaskForm):
+    archivo = FileField('Archivo de motos (CSV o JSONL)', validators=[
+        DataRequired(message="El archivo es requerido."),
+        FileAllowed(['csv', 'jsonl'], 'Solo se permiten archivos CSV o JSONL.')
+    ])
+    imagenes = FileField('Imágenes (zip, opcional)', validators=[
+        FileAllowed(['zip'], 'Las imágenes deben subirse en un archivo zip.'),
+        Optional()
+    ])
+    submit = SubmitField('Importar')
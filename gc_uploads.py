@@ -0,0 +1,17 @@
+# gc_uploads.py
+# Elimina de static/images/uploads las imágenes que ya no usa ninguna moto
+# (y sus derivados). Normalmente se borran al editar o eliminar la moto; este
+# script recoge las que quedaron pendientes, por ejemplo dentro del margen de
+# gracia de utils/storage.py o tras restaurar una copia de la base de datos.
+#
+# Uso: python gc_uploads.py
+
+from app import app
+from utils.storage import sweep_unreferenced_uploads
+
+if __name__ == '__main__':
+    with app.app_context():
+        removed = sweep_unreferenced_uploads(app.static_folder)
+    for image_rel_path in removed:
+        print(f"Eliminada: {image_rel_path}")
+    print(f"Listo: {len(removed)} imágenes sin referencias eliminadas.")
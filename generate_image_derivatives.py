@@ -0,0 +1,28 @@
+# generate_image_derivatives.py
+# Genera (o regenera) los derivados redimensionados WebP/JPEG de las imágenes
+# existentes en static/images y static/images/uploads. Las imágenes subidas desde
+# el panel ya los generan al guardarse; este script sirve para el contenido previo.
+#
+# Uso: python generate_image_derivatives.py [--force]
+
+import sys
+
+from app import app
+from utils.images import generate_derivatives, iter_source_images, load_manifest
+
+if __name__ == '__main__':
+    force = '--force' in sys.argv[1:]
+    generated = skipped = failed = 0
+
+    for image_rel_path in iter_source_images(app.static_folder):
+        if not force and load_manifest(app.static_folder, image_rel_path):
+            skipped += 1
+            continue
+        manifest = generate_derivatives(app.static_folder, image_rel_path)
+        if manifest:
+            generated += 1
+            print(f"Derivados generados: {image_rel_path} ({', '.join(str(w) for w in manifest['widths'])} px)")
+        else:
+            failed += 1
+
+    print(f"Listo: {generated} generados, {skipped} ya existían, {failed} con error.")
@@ -16,6 +16,19 @@ class Moto(db.Model):
     descripcion = db.Column(db.Text, nullable=True)
     imagen_url = db.Column(db.String(200), nullable=True)
 
+    # Índices para los accesos frecuentes del catálogo:
+    # - filtro por marca y orden marca/modelo del PDF,
+    # - filtro por año y orden/cursor (año, id),
+    # - rango de precio y orden/cursor (precio, id).
+    # El orden por id (página de inicio) ya lo cubre la clave primaria.
+    # imagen_url se indexa para el conteo de referencias de las imágenes subidas.
+    __table_args__ = (
+        db.Index('ix_moto_marca_modelo', 'marca', 'modelo'),
+        db.Index('ix_moto_anio_id', 'año', 'id'),
+        db.Index('ix_moto_precio_id', 'precio', 'id'),
+        db.Index('ix_moto_imagen_url', 'imagen_url'),
+    )
+
     def __repr__(self):
         return f'<Moto {self.marca} {self.modelo}>'
 
@@ -40,6 +53,8 @@ class Invoice(db.Model):
     invoice_number = db.Column(db.String(50), unique=True, nullable=False)
     invoice_date = db.Column(db.Date, nullable=False, default=datetime.utcnow)
     customer_name = db.Column(db.String(150), nullable=False)
+    # customer_name en minúsculas y sin acentos (utils/search.py lo mantiene al guardar).
+    customer_name_search = db.Column(db.String(150), nullable=True)
     customer_address = db.Column(db.Text, nullable=True)
     customer_email = db.Column(db.String(150), nullable=True)
     items_description = db.Column(db.Text, nullable=False)
@@ -49,5 +64,36 @@ class Invoice(db.Model):
     total_amount = db.Column(db.Float, nullable=False)
     notes = db.Column(db.Text, nullable=True)
 
+    # Listado de facturas ordenado por fecha (más recientes primero) y búsqueda por
+    # el comienzo del nombre del cliente sin distinguir mayúsculas ni acentos.
+    __table_args__ = (
+        db.Index('ix_invoice_invoice_date_id', 'invoice_date', 'id'),
+        db.Index('ix_invoice_customer_name_search', 'customer_name_search'),
+    )
+
+    def __repr__(self):
+        return f'<Invoice {self.invoice_number} - {self.customer_name}>'
+
+# Contador de números de factura por día (ver utils/invoice_numbers.py).
+class InvoiceCounter(db.Model):
+    __tablename__ = 'invoice_counter'
+    day = db.Column(db.Date, primary_key=True)
+    last_number = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<InvoiceCounter {self.day} - {self.last_number}>'
+
+
+# Agregados diarios de facturación por tasa de impuesto (ver utils/rollups.py).
+# Los informes leen sólo esta tabla, cuyo tamaño depende de los días y no de las facturas.
+class InvoiceDailyRollup(db.Model):
+    __tablename__ = 'invoice_daily_rollup'
+    day = db.Column(db.Date, primary_key=True)
+    tax_rate = db.Column(db.Float, primary_key=True)
+    invoice_count = db.Column(db.Integer, nullable=False, default=0)
+    subtotal_amount = db.Column(db.Float, nullable=False, default=0.0)
+    tax_amount = db.Column(db.Float, nullable=False, default=0.0)
+    total_amount = db.Column(db.Float, nullable=False, default=0.0)
+
     def __repr__(self):
-        return f'<Invoice {self.invoice_number} - {self.customer_name}>'
\ No newline at end of file
+        return f'<InvoiceDailyRollup {self.day} {self.tax_rate} - {self.invoice_count}>'
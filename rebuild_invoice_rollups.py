@@ -0,0 +1,21 @@
+# rebuild_invoice_rollups.py
+# Recalcula desde cero los agregados diarios de facturación (invoice_daily_rollup)
+# a partir de la tabla de facturas. Los agregados se mantienen solos al crear,
+# modificar o borrar facturas con el ORM; este script sirve para el histórico o tras
+# cargar facturas directamente en la base de datos.
+#
+# Uso: python rebuild_invoice_rollups.py
+
+import time
+
+from app import app, db
+from utils.rollups import rebuild_rollups
+
+
+if __name__ == '__main__':
+    with app.app_context():
+        started = time.perf_counter()
+        with db.engine.begin() as connection:
+            rows = rebuild_rollups(connection)
+        print(f"Agregados de facturación recalculados: {rows} filas (día, tasa) "
+              f"en {time.perf_counter() - started:.2f}s.")
@@ -2,14 +2,17 @@
 # Contiene las rutas del Blueprint 'admin_bp' para la gestión de motocicletas (CRUD).
 
 import os
-import re
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
-from werkzeug.utils import secure_filename
+import tempfile
+from flask import Blueprint, Response, render_template, request, redirect, url_for, flash, current_app, abort, stream_with_context
 from models import Moto # Importa el modelo Moto desde models.py
-from forms import MotoForm # Importa el formulario MotoForm desde forms.py
+from forms import MotoForm, ImportMotosForm # Importa los formularios desde forms.py
 # IMPORTANTE: Importa 'db' y 'login_required' desde extensions.py
 from extensions import db, login_required # <--- CAMBIO AQUÍ
-from utils.pdf_generator import export_pdf_motos as generate_catalog_pdf
+from utils.pdf_cache import pdf_catalog_cache
+from utils.http_cache import conditional
+from utils.storage import store_upload, release_upload
+from utils.data_export import EXPORT_DATASETS, EXPORT_FORMATS, stream_export
+from utils.bulk_import import import_motos, read_rows
 
 admin_bp = Blueprint('admin_bp', __name__)
 
@@ -17,23 +20,6 @@ admin_bp = Blueprint('admin_bp', __name__)
 def allowed_file(filename, app_config):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in app_config['ALLOWED_EXTENSIONS']
 
-def generate_unique_filename(marca, modelo, original_extension, upload_folder):
-    base_name = f"{marca}-{modelo}"
-    base_name = re.sub(r'[^a-zA-Z0-9_\-]', '', base_name).lower()
-    base_name = re.sub(r'[-_]+', '-', base_name)
-    base_name = base_name.strip('-').strip('_')
-
-    new_filename = f"{base_name}.{original_extension}"
-    safe_filename = secure_filename(new_filename)
-
-    counter = 1
-    final_filename = safe_filename
-    while os.path.exists(os.path.join(upload_folder, final_filename)):
-        name_part, ext_part = os.path.splitext(safe_filename)
-        final_filename = f"{name_part}-{counter}{ext_part}"
-        counter += 1
-    return final_filename
-
 # --- Rutas de Gestión de Motos (CRUD) ---
 
 @admin_bp.route('/motos')
@@ -52,14 +38,10 @@ def add_moto():
         if form.imagen.data:
             original_filename = form.imagen.data.filename
             if allowed_file(original_filename, current_app.config):
-                imagen_filename = generate_unique_filename(form.marca.data, form.modelo.data, 
-                                                           original_filename.rsplit('.', 1)[1].lower(),
-                                                           current_app.config['UPLOAD_FOLDER'])
-                
-                file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], imagen_filename)
-                os.makedirs(current_app.config['UPLOAD_FOLDER'], exist_ok=True)
-                form.imagen.data.save(file_path)
-                imagen_url_db = f'images/uploads/{imagen_filename}'
+                # Se guarda con el nombre de su hash (una sola copia por contenido).
+                imagen_url_db = store_upload(form.imagen.data,
+                                             original_filename.rsplit('.', 1)[1].lower(),
+                                             current_app.static_folder)
             else:
                 flash('Tipo de archivo no permitido para la imagen.', 'danger')
                 return render_template('add_edit_moto.html', form=form, moto=None)
@@ -90,28 +72,13 @@ def edit_moto(moto_id):
     form = MotoForm(obj=moto)
 
     if form.validate_on_submit():
+        old_imagen_url = moto.imagen_url
         if form.imagen.data:
             original_filename = form.imagen.data.filename
             if allowed_file(original_filename, current_app.config):
-                if moto.imagen_url and moto.imagen_url.startswith('images/uploads/'):
-                    image_path_to_delete = os.path.join(current_app.root_path, 'static', moto.imagen_url)
-                    if os.path.exists(image_path_to_delete):
-                        try:
-                            os.remove(image_path_to_delete)
-                            print(f"Old image removed: {image_path_to_delete}")
-                        except OSError as e:
-                            print(f"Error removing old image {image_path_to_delete}: {e}")
-                    else:
-                        print(f"Advertencia: La imagen antigua '{moto.imagen_url}' no existe en el disco.")
-
-                imagen_filename = generate_unique_filename(form.marca.data, form.modelo.data, 
-                                                           original_filename.rsplit('.', 1)[1].lower(),
-                                                           current_app.config['UPLOAD_FOLDER'])
-                
-                file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], imagen_filename)
-                os.makedirs(current_app.config['UPLOAD_FOLDER'], exist_ok=True)
-                form.imagen.data.save(file_path)
-                moto.imagen_url = f'images/uploads/{imagen_filename}'
+                moto.imagen_url = store_upload(form.imagen.data,
+                                               original_filename.rsplit('.', 1)[1].lower(),
+                                               current_app.static_folder)
             else:
                 flash('Tipo de archivo no permitido para la nueva imagen.', 'danger')
                 return render_template('add_edit_moto.html', form=form, moto=moto)
@@ -123,6 +90,12 @@ def edit_moto(moto_id):
         moto.descripcion = form.descripcion.data
 
         db.session.commit()
+
+        # La imagen anterior sólo se borra si ninguna otra moto la usa.
+        if old_imagen_url and old_imagen_url != moto.imagen_url:
+            if release_upload(old_imagen_url, current_app.static_folder):
+                print(f"Old image removed: {old_imagen_url}")
+
         flash('¡Moto actualizada exitosamente!', 'success')
         return redirect(url_for('admin_bp.admin_motos'))
     return render_template('add_edit_moto.html', form=form, moto=moto)
@@ -135,38 +108,84 @@ def delete_moto(moto_id):
         flash(f'La moto con ID {moto_id} no fue encontrada.', 'danger')
         return redirect(url_for('admin_bp.admin_motos'))
 
-    if moto.imagen_url:
-        if moto.imagen_url.startswith('images/uploads/'):
-            image_path = os.path.join(current_app.root_path, 'static', moto.imagen_url)
-            
-            if os.path.exists(image_path):
-                try:
-                    os.remove(image_path)
-                    print(f"Image deleted successfully: {image_path}")
-                except OSError as e:
-                    print(f"ERROR deleting image {image_path}: {e}")
-                    flash(f"Error al eliminar la imagen del servidor: {e}", 'danger')
-            else:
-                print(f"Advertencia: El archivo de imagen no existe en el disco: {image_path}")
-                flash("Advertencia: La imagen asociada no se encontró en el servidor, solo se eliminó la entrada de la base de datos.", 'info')
-        else:
-            print(f"Advertencia: La imagen {moto.imagen_url} no está en la carpeta de uploads, no se intentó eliminar del disco.")
-
+    imagen_url = moto.imagen_url
     db.session.delete(moto)
     db.session.commit()
+
+    # La imagen sólo se borra del disco si ya no la referencia ninguna otra moto.
+    if imagen_url:
+        try:
+            if release_upload(imagen_url, current_app.static_folder):
+                print(f"Image deleted successfully: {imagen_url}")
+        except OSError as e:
+            print(f"ERROR deleting image {imagen_url}: {e}")
+            flash(f"Error al eliminar la imagen del servidor: {e}", 'danger')
+
     flash('¡Moto eliminada exitosamente!', 'success')
 
     return redirect(url_for('admin_bp.admin_motos'))
 
+@admin_bp.route('/import_motos', methods=['GET', 'POST'])
+@login_required
+def import_motos_route():
+    """Importación masiva de motos desde un CSV/JSONL con un zip opcional de imágenes."""
+    form = ImportMotosForm()
+    if form.validate_on_submit():
+        file_format = form.archivo.data.filename.rsplit('.', 1)[1].lower()
+        images_path = None
+        try:
+            if form.imagenes.data:
+                # El zip se guarda en un temporal: zipfile necesita un archivo con acceso aleatorio.
+                fd, images_path = tempfile.mkstemp(suffix='.zip')
+                with os.fdopen(fd, 'wb') as f:
+                    form.imagenes.data.save(f)
+            result = import_motos(db.session, read_rows(form.archivo.data.stream, file_format),
+                                  current_app.config, current_app.static_folder, images_path=images_path)
+        finally:
+            if images_path:
+                os.remove(images_path)
+
+        print(f"Importación de motos: {result.summary()}")
+        flash(f'Importación terminada: {result.summary()}.', 'success' if not result.errors else 'warning')
+        for line_number, error in result.errors[:10]:
+            flash(f'Línea {line_number}: {error}', 'danger')
+        if len(result.errors) > 10:
+            flash(f'... y {len(result.errors) - 10} errores más.', 'danger')
+        return redirect(url_for('admin_bp.admin_motos'))
+    return render_template('import_motos.html', form=form)
+
 @admin_bp.route('/export_pdf_motos')
 @login_required
+@conditional(private=True)
 def export_pdf_motos_route():
     from flask import send_file
-    pdf_buffer = generate_catalog_pdf(current_app, db)
-    pdf_buffer.seek(0)
+    # El PDF se sirve desde la caché en disco (con soporte de Range); si la revisión
+    # actual aún no está generada, se genera en segundo plano y no se hace esperar
+    # a la petición.
+    pdf_path = pdf_catalog_cache.current_path()
+    if pdf_path is None:
+        pdf_catalog_cache.schedule_rebuild()
+        flash('El catálogo PDF se está generando. Vuelve a intentarlo en unos segundos.', 'info')
+        return redirect(url_for('admin_bp.admin_motos'))
     return send_file(
-        pdf_buffer,
+        pdf_path,
         as_attachment=True,
         download_name='catalogo_motos_motoshop.pdf',
-        mimetype='application/pdf'
-    )
\ No newline at end of file
+        mimetype='application/pdf',
+        conditional=True
+    )
+
+
+@admin_bp.route('/export/<dataset>.<export_format>')
+@login_required
+def export_data(dataset, export_format):
+    """
+    Descarga completa de motos o facturas en CSV o JSON Lines. El contenido se
+    genera a medida que se envía, leyendo la base de datos por lotes.
+    """
+    if dataset not in EXPORT_DATASETS or export_format not in EXPORT_FORMATS:
+        abort(404)
+    chunks = stream_export(db.session, dataset, export_format)
+    return Response(stream_with_context(chunks),
+                    mimetype=EXPORT_FORMATS[export_format],
+                    headers={'Content-Disposition': f'attachment; filename="{dataset}.{export_format}"'})
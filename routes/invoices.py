@@ -1,29 +1,138 @@
 # routes/invoices.py
 # Contiene las rutas del Blueprint 'invoices_bp' para la gestión de facturas (CRUD).
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+import os
+from flask import Blueprint, Response, current_app, jsonify, render_template, request, redirect, url_for, flash
+from sqlalchemy import func
 from models import Invoice # Importa el modelo Invoice desde models.py
 from forms import InvoiceForm # Importa el formulario InvoiceForm desde forms.py
 # IMPORTANTE: Importa 'db' y 'login_required' desde extensions.py
 from extensions import db, login_required # <--- CAMBIO AQUÍ
 from datetime import datetime
+from utils.pagination import paginate_offset
+from utils.invoice_numbers import allocate_invoice_number
+from utils.invoice_pdf import invoice_fields, stream_invoice_zip
+from utils.rollups import REPORT_GROUPS, rollup_report
+from utils.search import normalize_text
 
 invoices_bp = Blueprint('invoices_bp', __name__)
 
+INVOICES_PER_PAGE = 25
+
+# Límite superior para convertir un prefijo en un rango (prefijo <= valor < prefijo + '\uffff').
+PREFIX_UPPER_BOUND = '\uffff'
+
+
+def _parse_date(value):
+    """Convierte una fecha 'AAAA-MM-DD' de la URL (ValueError si no es válida)."""
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def _invoice_filters_from_request():
+    """Filtros del listado de facturas tomados de la URL (las fechas inválidas se ignoran)."""
+    return {
+        'date_from': request.args.get('date_from', type=_parse_date),
+        'date_to': request.args.get('date_to', type=_parse_date),
+        'customer': request.args.get('customer', '').strip(),
+        'number_prefix': request.args.get('number_prefix', '').strip(),
+    }
+
+
+def build_invoice_query(date_from=None, date_to=None, customer='', number_prefix=''):
+    """
+    Construye la consulta filtrada del listado de facturas.
+    Todos los filtros son rangos sobre columnas indexadas: la fecha usa
+    ix_invoice_invoice_date_id, el número de factura su índice único y el cliente
+    (búsqueda por el comienzo del nombre, sin distinguir mayúsculas ni acentos)
+    el índice sobre customer_name_search, normalizado en Python con normalize_text.
+    """
+    query = Invoice.query
+    if date_from:
+        query = query.filter(Invoice.invoice_date >= date_from)
+    if date_to:
+        query = query.filter(Invoice.invoice_date <= date_to)
+    if customer:
+        prefix = normalize_text(customer)
+        query = query.filter(Invoice.customer_name_search >= prefix,
+                             Invoice.customer_name_search < prefix + PREFIX_UPPER_BOUND)
+    if number_prefix:
+        query = query.filter(Invoice.invoice_number >= number_prefix,
+                             Invoice.invoice_number < number_prefix + PREFIX_UPPER_BOUND)
+    return query
+
+
+def invoice_totals(query):
+    """Suma de subtotales, impuestos y totales de la consulta, calculada en SQL."""
+    subtotal, tax, total = query.order_by(None).with_entities(
+        func.coalesce(func.sum(Invoice.subtotal_amount), 0.0),
+        func.coalesce(func.sum(Invoice.tax_amount), 0.0),
+        func.coalesce(func.sum(Invoice.total_amount), 0.0),
+    ).one()
+    return {'subtotal': subtotal, 'tax': tax, 'total': total}
+
+
 @invoices_bp.route('/')
 @login_required
 def admin_invoices():
-    invoices = Invoice.query.order_by(Invoice.invoice_date.desc()).all()
-    return render_template('admin_invoices.html', invoices=invoices)
+    """
+    Listado paginado de facturas, filtrable por rango de fechas, nombre del
+    cliente y prefijo del número de factura, con los totales del filtro actual.
+    """
+    filters = _invoice_filters_from_request()
+    query = build_invoice_query(**filters)
+    page = request.args.get('page', 1, type=int)
+    invoices, page, total_invoices, total_pages = paginate_offset(
+        query.order_by(Invoice.invoice_date.desc(), Invoice.id.desc()), page, INVOICES_PER_PAGE)
+
+    return render_template('admin_invoices.html',
+                           invoices=invoices,
+                           page=page,
+                           total_pages=total_pages,
+                           total_invoices=total_invoices,
+                           totals=invoice_totals(query),
+                           date_from=filters['date_from'].isoformat() if filters['date_from'] else '',
+                           date_to=filters['date_to'].isoformat() if filters['date_to'] else '',
+                           customer=filters['customer'],
+                           number_prefix=filters['number_prefix'])
+
+
+@invoices_bp.route('/export')
+@login_required
+def export_invoices():
+    """
+    Descarga en un zip los PDF de las facturas del filtro actual (por ejemplo, las
+    de un mes). Los PDF se generan en un pool de procesos y se reutilizan de la
+    caché mientras la factura no cambie; el zip se envía a medida que se produce.
+    """
+    filters = _invoice_filters_from_request()
+    query = build_invoice_query(**filters).order_by(Invoice.invoice_date, Invoice.id)
+    all_fields = [invoice_fields(invoice) for invoice in query]
+    if not all_fields:
+        flash('No hay facturas que exportar con los filtros seleccionados.', 'info')
+        return redirect(url_for('invoices_bp.admin_invoices', **request.args))
+
+    cache_dir = current_app.config.get('INVOICE_PDF_DIR') or os.path.join(current_app.instance_path, 'invoice_pdfs')
+    workers = current_app.config.get('PDF_EXPORT_WORKERS', 1)
+    stats = {}
+
+    def generate():
+        yield from stream_invoice_zip(all_fields, cache_dir, workers, stats)
+        print(f"Exportación de facturas: {stats['count']} PDF ({stats['rendered']} generados, "
+              f"{stats['cached']} desde caché) en {stats['seconds']:.2f}s "
+              f"({stats['per_second']:.1f} facturas/s)")
+
+    period = '-'.join(d.strftime('%Y%m%d') for d in (filters['date_from'], filters['date_to']) if d)
+    filename = f"facturas-{period}.zip" if period else "facturas.zip"
+    return Response(generate(), mimetype='application/zip',
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
 
 @invoices_bp.route('/add', methods=['GET', 'POST'])
 @login_required
 def add_invoice():
     form = InvoiceForm()
     if form.validate_on_submit():
-        last_invoice = Invoice.query.order_by(Invoice.id.desc()).first()
-        last_id = last_invoice.id if last_invoice else 0
-        new_invoice_number = f"INV-{datetime.now().strftime('%Y%m%d')}-{last_id + 1:04d}"
+        # El número se reserva en la misma transacción que inserta la factura.
+        new_invoice_number = allocate_invoice_number(db.session)
 
         nueva_factura = Invoice(
             invoice_number=new_invoice_number,
@@ -60,4 +169,32 @@ def print_invoice(invoice_id):
     if not invoice:
         flash('Factura no encontrada.', 'danger')
         return redirect(url_for('invoices_bp.admin_invoices'))
-    return render_template('invoice_template.html', invoice=invoice)
\ No newline at end of file
+    return render_template('invoice_template.html', invoice=invoice)
+
+
+def _report_from_request():
+    group = request.args.get('group', 'day')
+    if group not in REPORT_GROUPS:
+        group = 'day'
+    filters = _invoice_filters_from_request()
+    return rollup_report(db.session, group, filters['date_from'], filters['date_to']), filters
+
+
+@invoices_bp.route('/reports')
+@login_required
+def invoice_reports():
+    """Informe de facturación por día, mes o tasa de impuesto (lee sólo los agregados diarios)."""
+    report, filters = _report_from_request()
+    return render_template('invoice_reports.html',
+                           report=report,
+                           report_groups=[(name, label) for name, (label, _) in REPORT_GROUPS.items()],
+                           date_from=filters['date_from'].isoformat() if filters['date_from'] else '',
+                           date_to=filters['date_to'].isoformat() if filters['date_to'] else '')
+
+
+@invoices_bp.route('/reports.json')
+@login_required
+def invoice_reports_api():
+    """El mismo informe en JSON (parámetros: group=day|month|tax_rate, date_from, date_to)."""
+    report, _ = _report_from_request()
+    return jsonify(report)
@@ -1,31 +1,89 @@
 # routes/main.py
 # Contiene las rutas del Blueprint 'main_bp' para la parte pública de la aplicación.
 
-import math
-from flask import Blueprint, render_template, request, url_for, flash, redirect # <--- ¡Añadir 'redirect' aquí!
+from flask import Blueprint, render_template, request, url_for, flash, redirect, current_app # <--- ¡Añadir 'redirect' aquí!
 from sqlalchemy import desc
+from sqlalchemy.orm import defer
 # IMPORTANTE: Importa 'db' y 'login_required' desde extensions.py
 from extensions import db, login_required
 from models import Moto # Importa el modelo Moto desde el módulo models.py
+from utils.pagination import paginate_offset, paginate_keyset, encode_cursor, decode_cursor
+from utils.search import apply_search
+from utils.facets import get_catalog_facets
+from utils.catalog_snapshot import get_catalog_snapshot
+from utils.page_cache import page_cache
+from utils.http_cache import conditional
+from utils.read_replica import read_replica
 
 # Define el Blueprint para las rutas principales (públicas)
 main_bp = Blueprint('main_bp', __name__)
 
-# --- DEFINICIÓN DE MARCAS PARA EL FILTRO ---
-ALL_AVAILABLE_BRANDS = sorted([
-    "Harley-Davidson", "Kawasaki", "Yamaha", "Honda", "Triumph", "Suzuki",
-    "Ducati", "BMW", "Royal Enfield", "Benelli", "CFMoto", "Hero", "Keeway",
-    "KTM", "Motomel", "Serna", "Super Soco", "TVS", "UM", "Vespa"
-])
+# --- ÓRDENES DISPONIBLES PARA EL CATÁLOGO ---
+# Cada orden termina en Moto.id para que sea total y sirva como clave del cursor keyset.
+CATALOG_SORTS = {
+    '': ((Moto.id,), False),
+    'precio_asc': ((Moto.precio, Moto.id), False),
+    'precio_desc': ((Moto.precio, Moto.id), True),
+    'anio_desc': ((Moto.año, Moto.id), True),
+    'anio_asc': ((Moto.año, Moto.id), False),
+}
+
+CATALOG_SORT_LABELS = [
+    ('', 'Relevancia'),
+    ('precio_asc', 'Precio: menor a mayor'),
+    ('precio_desc', 'Precio: mayor a menor'),
+    ('anio_desc', 'Año: más nuevas'),
+    ('anio_asc', 'Año: más antiguas'),
+]
+
+# Parámetros de la URL que afectan al catálogo (el resto, p. ej. utm_*, no cambia la página).
+CATALOG_QUERY_PARAMS = ('search_query', 'brand_filter', 'year_filter', 'price_min', 'price_max',
+                        'sort', 'page', 'after')
+
+def build_catalog_query(search_query='', brand_filter='', year_filter='', price_min=None, price_max=None):
+    """
+    Construye la consulta filtrada del catálogo (sin orden ni paginación).
+    Se comparte con la comprobación de planes de consulta (check_query_plans.py).
+
+    Returns:
+        Una tupla (query, search_score); search_score es None si no hay búsqueda
+        de texto completo activa.
+    """
+    query = Moto.query
+
+    search_score = None
+    if search_query:
+        # Búsqueda de texto completo (FTS5 / tsvector) con ranking e insensible a acentos.
+        query, search_score = apply_search(query, db, search_query)
+
+    if brand_filter:
+        query = query.filter(Moto.marca == brand_filter)
+
+    if year_filter and year_filter.isdigit():
+        query = query.filter(Moto.año == int(year_filter))
+
+    if price_min is not None:
+        query = query.filter(Moto.precio >= price_min)
+
+    if price_max is not None:
+        query = query.filter(Moto.precio <= price_max)
+
+    return query, search_score
 
 @main_bp.route('/')
+@read_replica
+@conditional()
+@page_cache.cached('listing')
 def index():
     """
     Ruta para la página de inicio que muestra un carrusel de motos.
     """
     motos_carrusel = []
     try:
-        motos_carrusel = Moto.query.order_by(desc(Moto.id)).limit(8).all()
+        if current_app.config.get('CATALOG_SNAPSHOT'):
+            motos_carrusel = get_catalog_snapshot(current_app, db).latest(8)
+        else:
+            motos_carrusel = Moto.query.order_by(desc(Moto.id)).limit(8).all()
     except Exception as e:
         print(f"Error al cargar motos para el carrusel: {e}")
         motos_carrusel = []
@@ -33,78 +91,127 @@ def index():
     return render_template('index.html', motos_carrusel=motos_carrusel)
 
 @main_bp.route('/catalogo-completo')
+@read_replica
+@conditional()
+@page_cache.cached('listing', query_params=CATALOG_QUERY_PARAMS)
 def catalogo_completo():
     """
     Ruta para el catálogo completo de motos con filtros y paginación.
-    Permite buscar por marca y modelo, filtrar por marca, año y rango de precio.
+    Permite buscar por marca, modelo y descripción, filtrar por marca, año y rango de precio.
     """
-    query = Moto.query
-
     search_query = request.args.get('search_query', '').strip()
     brand_filter = request.args.get('brand_filter', '').strip()
     year_filter = request.args.get('year_filter', '').strip()
     price_min = request.args.get('price_min', type=float)
     price_max = request.args.get('price_max', type=float)
 
-    if search_query:
-        search_pattern = f"%{search_query}%"
-        query = query.filter(
-            (Moto.marca.ilike(search_pattern)) |
-            (Moto.modelo.ilike(search_pattern))
-        )
-            
-    if brand_filter:
-        query = query.filter(Moto.marca == brand_filter)
-
-    if year_filter and year_filter.isdigit():
-        query = query.filter(Moto.año == int(year_filter))
-
-    if price_min is not None:
-        query = query.filter(Moto.precio >= price_min)
-
-    if price_max is not None:
-        query = query.filter(Moto.precio <= price_max)
-
-    filtered_motos = query.all()
-    total_motos = len(filtered_motos)
-
-    page = request.args.get('page', 1, type=int)
+    sort = request.args.get('sort', '').strip()
+    if sort not in CATALOG_SORTS:
+        sort = ''
+    sort_columns, sort_descending = CATALOG_SORTS[sort]
     per_page = 9
-    total_pages = math.ceil(total_motos / per_page)
-            
-    if page < 1:
-        page = 1
-    elif page > total_pages and total_pages > 0:
-        page = total_pages
-    elif total_pages == 0:
+    after = request.args.get('after', '').strip()
+
+    # Modo copia en memoria: todo menos la búsqueda de texto (su ranking lo da la base de datos).
+    if current_app.config.get('CATALOG_SNAPSHOT') and not search_query:
+        snapshot = get_catalog_snapshot(current_app, db)
+        paginated_motos, page, total_pages, next_cursor = _snapshot_page(
+            snapshot, sort_columns, sort_descending, after, per_page,
+            brand=brand_filter or None,
+            year=int(year_filter) if year_filter.isdigit() else None,
+            price_min=price_min, price_max=price_max)
+        return _render_catalog(snapshot.facets, paginated_motos, page, total_pages, sort, next_cursor,
+                               search_query, brand_filter, year_filter, price_min, price_max)
+
+    query, search_score = build_catalog_query(search_query, brand_filter, year_filter,
+                                              price_min, price_max)
+
+    # Las tarjetas del catálogo no muestran la descripción: se evita cargarla.
+    query = query.options(defer(Moto.descripcion))
+
+    # Modo cursor (keyset): se activa con el parámetro 'after' ("Cargar más").
+    next_cursor = None
+    if after:
+        cursor = decode_cursor(after, len(sort_columns))
+        paginated_motos, next_values = paginate_keyset(query, sort_columns, sort_descending,
+                                                       cursor, per_page)
+        if next_values:
+            next_cursor = encode_cursor(next_values)
         page = 1
+        total_pages = 0
+    else:
+        if search_score is not None and not sort:
+            # Sin un orden explícito, los resultados de búsqueda se ordenan por relevancia.
+            ordered_query = query.order_by(search_score, Moto.id)
+        else:
+            ordered_query = query.order_by(*[col.desc() if sort_descending else col.asc()
+                                             for col in sort_columns])
+        page = request.args.get('page', 1, type=int)
+        paginated_motos, page, total_motos, total_pages = paginate_offset(ordered_query, page, per_page)
+        # El cursor keyset sólo aplica a órdenes por columnas; el ranking de búsqueda usa páginas.
+        if page < total_pages and paginated_motos and not (search_score is not None and not sort):
+            last_moto = paginated_motos[-1]
+            next_cursor = encode_cursor([getattr(last_moto, col.key) for col in sort_columns])
+
+    # Marcas, años y rango de precios desde la caché de facetas (sin consultas extra
+    # mientras el inventario no cambie).
+    facets = get_catalog_facets(current_app, db)
+
+    return _render_catalog(facets, paginated_motos, page, total_pages, sort, next_cursor,
+                           search_query, brand_filter, year_filter, price_min, price_max)
+
+
+def _snapshot_page(snapshot, sort_columns, sort_descending, after, per_page, **filters):
+    """
+    Página del catálogo desde la copia en memoria, con la misma paginación y los
+    mismos cursores que el modo SQL. Devuelve (motos, página, total de páginas, cursor).
+    """
+    sort_key = tuple(col.key for col in sort_columns)
+    if after:
+        cursor = decode_cursor(after, len(sort_columns))
+        motos, next_values = snapshot.window(sort_key, sort_descending, cursor, per_page, **filters)
+        return motos, 1, 0, encode_cursor(next_values) if next_values else None
 
-    start_index = (page - 1) * per_page
-    end_index = start_index + per_page
-    paginated_motos = filtered_motos[start_index:end_index]
+    page = request.args.get('page', 1, type=int)
+    motos, page, total_motos, total_pages = snapshot.paginate(sort_key, sort_descending, page, per_page,
+                                                              **filters)
+    next_cursor = None
+    if page < total_pages and motos:
+        next_cursor = encode_cursor([getattr(motos[-1], name) for name in sort_key])
+    return motos, page, total_pages, next_cursor
 
-    available_brands = ALL_AVAILABLE_BRANDS    
-    available_years = sorted(list(set(moto.año for moto in db.session.query(Moto.año).distinct())), reverse=True)
 
+def _render_catalog(facets, paginated_motos, page, total_pages, sort, next_cursor,
+                    search_query, brand_filter, year_filter, price_min, price_max):
     return render_template('catalogo_completo.html',    
                             motos=paginated_motos,
                             page=page,
                             total_pages=total_pages,
+                            sort=sort,
+                            catalog_sorts=CATALOG_SORT_LABELS,
+                            next_cursor=next_cursor,
                             search_query=search_query,
                             brand_filter=brand_filter,
                             year_filter=year_filter,
                             price_min=price_min,
                             price_max=price_max,
-                            available_brands=available_brands,
-                            available_years=available_years
+                            available_brands=facets['brands'],
+                            available_years=facets['years'],
+                            price_bounds=(facets['price_min'], facets['price_max'])
                         )
 
 @main_bp.route('/moto/<int:moto_id>')
+@read_replica
+@conditional()
+@page_cache.cached(lambda moto_id: f'moto-{moto_id}')
 def moto_detalle(moto_id):
     """
     Ruta para ver los detalles de una moto específica.
     """
-    moto = db.session.get(Moto, moto_id)
+    if current_app.config.get('CATALOG_SNAPSHOT'):
+        moto = get_catalog_snapshot(current_app, db).get(moto_id)
+    else:
+        moto = db.session.get(Moto, moto_id)
     if not moto:
         flash('Motocicleta no encontrada.', 'danger')
         return redirect(url_for('main_bp.catalogo_completo'))
@@ -0,0 +1,123 @@
+# stress_invoice_numbers.py
+# Prueba de concurrencia de la numeración de facturas.
+# Lanza varios procesos (como los workers de gunicorn) que crean facturas a la vez
+# contra una base de datos SQLite temporal (no toca motos.db) y comprueba que todas
+# se guardaron al primer intento, que no hay números repetidos y que la numeración
+# del día es consecutiva. Termina con código de salida 1 si algo falla.
+#
+# Uso: python stress_invoice_numbers.py [--workers 8] [--invoices 50] [--legacy]
+#   --legacy usa el cálculo anterior (último id + 1) para reproducir el problema.
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import date
+
+
+def _stress_app(db_path):
+    from flask import Flask
+    from extensions import db
+    import models  # Registra los modelos para create_all().
+
+    stress_app = Flask(__name__, instance_path=os.path.dirname(db_path))
+    stress_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + db_path
+    db.init_app(stress_app)
+    return stress_app, db
+
+
+def _legacy_invoice_number(session):
+    from models import Invoice
+
+    last_invoice = session.query(Invoice).order_by(Invoice.id.desc()).first()
+    last_id = last_invoice.id if last_invoice else 0
+    return f"INV-{date.today().strftime('%Y%m%d')}-{last_id + 1:04d}"
+
+
+def create_invoices(db_path, worker, count, legacy, barrier, results):
+    """Crea 'count' facturas, una por transacción, como haría add_invoice."""
+    from models import Invoice
+    from utils.invoice_numbers import allocate_invoice_number
+
+    stress_app, db = _stress_app(db_path)
+    errors = []
+    with stress_app.app_context():
+        barrier.wait()
+        for i in range(count):
+            try:
+                if legacy:
+                    number = _legacy_invoice_number(db.session)
+                else:
+                    number = allocate_invoice_number(db.session)
+                db.session.add(Invoice(
+                    invoice_number=number,
+                    customer_name=f'Cliente {worker}-{i}',
+                    invoice_date=date.today(),
+                    items_description='1x Moto de prueba',
+                    subtotal_amount=1000.0,
+                    tax_rate=0.16,
+                    tax_amount=160.0,
+                    total_amount=1160.0,
+                ))
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                errors.append(f'{type(e).__name__}: {str(e).splitlines()[0]}')
+    results.put(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prueba de concurrencia de la numeración de facturas.')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--invoices', type=int, default=50, help='Facturas por worker.')
+    parser.add_argument('--legacy', action='store_true')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='stress-invoices-') as work_dir:
+        db_path = os.path.join(work_dir, 'stress.db')
+        stress_app, db = _stress_app(db_path)
+        with stress_app.app_context():
+            db.create_all()
+
+        context = multiprocessing.get_context('spawn')
+        barrier = context.Barrier(args.workers)
+        results = context.Queue()
+        processes = [context.Process(target=create_invoices,
+                                     args=(db_path, worker, args.invoices, args.legacy, barrier, results))
+                     for worker in range(args.workers)]
+        started = time.perf_counter()
+        for process in processes:
+            process.start()
+        errors = [error for _ in processes for error in results.get()]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - started
+
+        from models import Invoice
+        with stress_app.app_context():
+            numbers = [number for (number,) in db.session.query(Invoice.invoice_number)]
+
+    expected = args.workers * args.invoices
+    duplicates = [number for number, count in Counter(numbers).items() if count > 1]
+    sequence = sorted(int(number.rsplit('-', 1)[1]) for number in numbers)
+    consecutive = sequence == list(range(1, len(sequence) + 1))
+
+    print(f"Facturas: {len(numbers)} de {expected} en {elapsed:.2f}s "
+          f"({args.workers} workers x {args.invoices})")
+    print(f"Errores (cada uno habría requerido un reintento): {len(errors)}")
+    for error, count in Counter(errors).most_common(5):
+        print(f"  {count} x {error}")
+    print(f"Números repetidos: {len(duplicates)}")
+    print(f"Numeración consecutiva: {'sí' if consecutive else 'no'}")
+
+    if errors or duplicates or len(numbers) != expected or not consecutive:
+        print("FALLO")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
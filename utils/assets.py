@@ -0,0 +1,426 @@
+# utils/assets.py
+# Pipeline de archivos estáticos: huella de contenido, minificado y precompresión.
+# build_assets.py genera en static/dist/ una copia de cada recurso con el hash de su
+# contenido en el nombre (css/style.3f2a9c1b07de.css), así la URL cambia con cada
+# versión y el navegador puede cachearla un año sin revalidar:
+#   - CSS y JS minificados, con variantes .gz y .br (si está instalado 'brotli'),
+#   - los logos de marcas redimensionados al tamaño en que se muestran y recomprimidos.
+# Las rutas originales y las generadas se guardan en static/dist/manifest.json.
+#
+# En la aplicación, AssetPipeline sustituye url_for('static', filename='css/style.css')
+# por la versión con hash y sirve las variantes precomprimidas según Accept-Encoding.
+# Sin manifiesto (p. ej. en desarrollo, sin ejecutar build_assets.py) todo se sirve
+# como antes desde los archivos originales.
+#
+# Pillow y brotli se importan sólo al construir: los workers web sólo leen el manifiesto.
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+
+from flask import request, send_from_directory
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# Recursos de texto que se minifican y precomprimen (rutas relativas a static/).
+TEXT_ASSETS = ('css/style.css', 'js/scripts.js')
+# Carpeta de logos de marcas (index.html) que se optimizan.
+LOGOS_DIR = 'images/logos'
+
+# Los logos se muestran en cajas de 150 px de alto (110 px útiles y escala 1.1 al
+# pasar el ratón, ver .logo-item en style.css): con densidad 2x basta este tamaño.
+LOGO_MAX_SIZE = (720, 240)
+
+HASH_LENGTH = 12
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+# Codificaciones precomprimidas, en orden de preferencia: (Content-Encoding, sufijo).
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+# --- Minificado ---
+
+CSS_TOKEN_RE = re.compile(
+    r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')'  # cadenas
+    r'|(/\*.*?\*/)'                              # comentarios
+    r'|(\s+)'                                    # espacios
+    r'|([^"\'/\s]+|/)',                          # resto
+    re.S,
+)
+# Un espacio junto a estos caracteres nunca es significativo. No se incluye ':' a la
+# izquierda ('a :hover' no es 'a:hover') ni '(' a la izquierda ('and (max-width...)').
+CSS_NO_SPACE_BEFORE = set('{};,>)')
+CSS_NO_SPACE_AFTER = set('{};,>:(')
+
+CSS_URL_RE = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+
+
+def minify_css(source):
+    """Quita comentarios y espacios sobrantes del CSS sin tocar el contenido de las cadenas."""
+    out = []
+    pending_space = False
+    for match in CSS_TOKEN_RE.finditer(source):
+        string, comment, space, other = match.groups()
+        if comment is not None or space is not None:
+            pending_space = bool(out)
+            continue
+        token = string if string is not None else other
+        if pending_space and out[-1][-1] not in CSS_NO_SPACE_AFTER and token[0] not in CSS_NO_SPACE_BEFORE:
+            out.append(' ')
+        pending_space = False
+        if string is None:
+            token = token.replace(';}', '}')
+            if token[0] == '}' and out and out[-1].endswith(';') and out[-1][0] not in '"\'':
+                out[-1] = out[-1][:-1]
+        out.append(token)
+    return ''.join(out)
+
+
+def rewrite_css_urls(css, source_rel, output_rel, asset_map):
+    """
+    Ajusta las url() relativas del CSS a su nueva ubicación en dist/ y, si el
+    recurso referenciado también tiene huella, a su versión con hash.
+    """
+    source_dir = posixpath.dirname(source_rel)
+    output_dir = posixpath.dirname(output_rel)
+
+    def replace(match):
+        quote, url = match.groups()
+        if re.match(r'^(?:[a-z]+:|/|#)', url, re.I):
+            return match.group(0)
+        target = posixpath.normpath(posixpath.join(source_dir, url))
+        target = asset_map.get(target, {}).get('path', target)
+        return f'url({quote}{posixpath.relpath(target, output_dir)}{quote})'
+
+    return CSS_URL_RE.sub(replace, css)
+
+
+JS_WORD_RE = re.compile(r'[\w$]+|\S')
+# Tras estos caracteres o palabras una '/' empieza una expresión regular, no una división.
+JS_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+JS_REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete', 'void', 'throw'}
+# Un espacio junto a estos caracteres sobra; un salto de línea tras ellos, también
+# (JS_NO_NEWLINE_AFTER), porque ahí nunca se inserta un punto y coma automático.
+JS_PUNCTUATION = set('{}();,=:[]<>?!&|')
+JS_NO_NEWLINE_AFTER = set('{;,(')
+
+
+def _js_string_end(source, start):
+    """Posición tras la cadena (o plantilla) que empieza en start."""
+    quote = source[start]
+    i = start + 1
+    while i < len(source) and source[i] != quote:
+        i += 2 if source[i] == '\\' else 1
+    return i + 1
+
+
+def _js_regex_end(source, start):
+    """Posición tras la expresión regular que empieza en start, o None si no lo es."""
+    i, in_class = start + 1, False
+    while i < len(source):
+        ch = source[i]
+        if ch == '\n':
+            return None
+        if ch == '\\':
+            i += 2
+            continue
+        if ch == '[':
+            in_class = True
+        elif ch == ']':
+            in_class = False
+        elif ch == '/' and not in_class:
+            i += 1
+            while i < len(source) and source[i].isalpha():
+                i += 1
+            return i
+        i += 1
+    return None
+
+
+def minify_js(source):
+    """
+    Minificado conservador de JavaScript: quita comentarios, sangría, líneas vacías y
+    espacios junto a signos de puntuación, pero conserva los saltos de línea que
+    pueden terminar una sentencia para no depender de la inserción automática de
+    punto y coma. Cadenas, plantillas y expresiones regulares se copian intactas.
+    """
+    out = []
+    last = ''
+    separator = ''
+    i, n = 0, len(source)
+    while i < n:
+        ch = source[i]
+        if ch.isspace():
+            if ch == '\n' or separator != '\n':
+                separator = '\n' if ch == '\n' else ' '
+            i += 1
+            continue
+        if source.startswith('//', i):
+            end = source.find('\n', i)
+            i = n if end < 0 else end
+            continue
+        if source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            end = n if end < 0 else end + 2
+            if '\n' in source[i:end]:
+                separator = '\n'
+            elif not separator:
+                separator = ' '
+            i = end
+            continue
+
+        end = None
+        if ch in '"\'`':
+            end = _js_string_end(source, i)
+        elif ch == '/' and (not last or last[-1] in JS_REGEX_PRECEDERS or last in JS_REGEX_KEYWORDS):
+            end = _js_regex_end(source, i)
+        if end is None:
+            end = JS_WORD_RE.match(source, i).end()
+        token = source[i:end]
+
+        if out and separator == '\n' and last[-1] not in JS_NO_NEWLINE_AFTER and token[0] != '}':
+            out.append('\n')
+        elif out and separator and last[-1] not in JS_PUNCTUATION and token[0] not in JS_PUNCTUATION:
+            out.append(' ')
+        out.append(token)
+        last = token
+        separator = ''
+        i = end
+    return ''.join(out)
+
+
+# --- Construcción ---
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def fingerprinted_path(rel_path, data):
+    """Ruta en dist/ con el hash del contenido: css/style.css -> dist/css/style.<hash>.css."""
+    base, ext = posixpath.splitext(rel_path)
+    return f'{DIST_DIR}/{base}.{content_hash(data)}{ext}'
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _precompress(data):
+    """Variantes comprimidas {encoding: bytes}, sólo las que ocupan menos que el original."""
+    variants = {'gzip': gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)}
+    try:
+        import brotli
+    except ImportError:
+        print("El paquete 'brotli' no está instalado: no se generan variantes .br.")
+    else:
+        variants['br'] = brotli.compress(data, quality=BROTLI_QUALITY, mode=brotli.MODE_TEXT)
+    return {encoding: compressed for encoding, compressed in variants.items() if len(compressed) < len(data)}
+
+
+def optimize_logo(source_path):
+    """
+    Reduce un logo a LOGO_MAX_SIZE y lo recomprime como PNG. Si una versión con
+    paleta de 256 colores ocupa menos, se usa esa (los logos son planos y se muestran
+    en escala de grises). Devuelve los bytes del PNG, o None si no se pudo procesar.
+    """
+    import io
+
+    from PIL import Image
+
+    try:
+        with Image.open(source_path) as image:
+            image.load()
+    except OSError as e:
+        print(f"No se pudo optimizar el logo {source_path}: {e}")
+        return None
+
+    image = image.convert('RGBA')
+    image.thumbnail(LOGO_MAX_SIZE, Image.Resampling.LANCZOS)
+
+    candidates = []
+    for variant in (image, image.quantize(colors=256, method=Image.Quantize.FASTOCTREE)):
+        buffer = io.BytesIO()
+        variant.save(buffer, 'PNG', optimize=True)
+        candidates.append(buffer.getvalue())
+    return min(candidates, key=len)
+
+
+def _build_file(static_folder, rel_path, data, precompress):
+    output_rel = fingerprinted_path(rel_path, data)
+    output_path = os.path.join(static_folder, output_rel)
+    _write_atomic(output_path, data)
+    encodings = []
+    if precompress:
+        for encoding, compressed in _precompress(data).items():
+            suffix = dict(ENCODINGS)[encoding]
+            _write_atomic(output_path + suffix, compressed)
+            encodings.append(encoding)
+    return {'path': output_rel, 'size': len(data), 'encodings': sorted(encodings)}
+
+
+def build_assets(static_folder):
+    """
+    Genera los recursos de dist/ y su manifiesto.
+
+    Args:
+        static_folder: Ruta absoluta de la carpeta static/.
+
+    Returns:
+        El manifiesto: {ruta original: {'path', 'size', 'source_size', 'encodings'}}.
+    """
+    manifest = {}
+
+    # Primero los logos, para que las url() del CSS puedan apuntar a sus versiones con hash.
+    logos_folder = os.path.join(static_folder, LOGOS_DIR)
+    if os.path.isdir(logos_folder):
+        for filename in sorted(os.listdir(logos_folder)):
+            if not filename.lower().endswith('.png'):
+                continue
+            rel_path = f'{LOGOS_DIR}/{filename}'
+            source_path = os.path.join(static_folder, rel_path)
+            with open(source_path, 'rb') as f:
+                original = f.read()
+            data = optimize_logo(source_path)
+            if data is None or len(data) >= len(original):
+                data = original
+            manifest[rel_path] = _build_file(static_folder, rel_path, data, precompress=False)
+            manifest[rel_path]['source_size'] = len(original)
+
+    for rel_path in TEXT_ASSETS:
+        source_path = os.path.join(static_folder, rel_path)
+        if not os.path.exists(source_path):
+            print(f"No existe el recurso {rel_path}; se omite.")
+            continue
+        with open(source_path, encoding='utf-8') as f:
+            source = f.read()
+        if rel_path.endswith('.css'):
+            # La ubicación final depende del hash, que depende de las url() reescritas:
+            # todas las salidas están en dist/<misma carpeta>, así que basta una ruta provisional.
+            provisional = f'{DIST_DIR}/{rel_path}'
+            text = rewrite_css_urls(minify_css(source), rel_path, provisional, manifest)
+        else:
+            text = minify_js(source)
+        data = text.encode('utf-8')
+        manifest[rel_path] = _build_file(static_folder, rel_path, data, precompress=True)
+        manifest[rel_path]['source_size'] = len(source.encode('utf-8'))
+
+    _remove_stale_files(static_folder, manifest)
+    manifest_path = os.path.join(static_folder, DIST_DIR, MANIFEST_NAME)
+    _write_atomic(manifest_path, json.dumps(manifest, indent=1, sort_keys=True).encode('utf-8'))
+    return manifest
+
+
+def _remove_stale_files(static_folder, manifest):
+    """
+    Borra de dist/ lo que no pertenece al manifiesto nuevo ni al anterior: los
+    workers que aún sirven la versión previa durante un despliegue siguen encontrando
+    sus archivos.
+    """
+    keep = set()
+    for entries in (manifest, load_asset_manifest(static_folder)):
+        for entry in entries.values():
+            keep.add(entry['path'])
+            keep.update(entry['path'] + dict(ENCODINGS)[encoding] for encoding in entry['encodings'])
+
+    dist_folder = os.path.join(static_folder, DIST_DIR)
+    for root, _, files in os.walk(dist_folder):
+        for filename in files:
+            rel = posixpath.join(os.path.relpath(root, static_folder).replace(os.sep, '/'), filename)
+            if filename != MANIFEST_NAME and rel not in keep:
+                os.remove(os.path.join(root, filename))
+
+
+def load_asset_manifest(static_folder):
+    """Lee static/dist/manifest.json ({} si no existe o no es válido)."""
+    path = os.path.join(static_folder, DIST_DIR, MANIFEST_NAME)
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+# --- Integración con Flask ---
+
+class AssetPipeline:
+    """
+    Extensión de Flask que aplica el manifiesto de build_assets(): url_for('static')
+    devuelve la ruta con hash y la vista 'static' negocia las variantes .br/.gz.
+    Se configura con ASSET_PIPELINE (activado por defecto).
+    """
+
+    def __init__(self, app=None):
+        self.urls = {}
+        self.encodings = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('ASSET_PIPELINE', True)
+        self.urls = {}
+        self.encodings = {}
+        if not app.config['ASSET_PIPELINE']:
+            return
+
+        manifest = load_asset_manifest(app.static_folder)
+        manifest_path = os.path.join(app.static_folder, DIST_DIR, MANIFEST_NAME)
+        stale = []
+        for rel_path, entry in manifest.items():
+            source_path = os.path.join(app.static_folder, rel_path)
+            # Un original modificado después del build se sirve tal cual hasta reconstruir.
+            try:
+                if os.stat(source_path).st_mtime_ns > os.stat(manifest_path).st_mtime_ns:
+                    stale.append(rel_path)
+                    continue
+            except OSError:
+                continue
+            self.urls[rel_path] = entry['path']
+            self.encodings[entry['path']] = entry['encodings']
+        if stale:
+            print(f"Recursos modificados después de build_assets.py (se sirven sin huella): {', '.join(stale)}")
+
+        app.extensions['asset_pipeline'] = self
+        if self.urls:
+            app.url_defaults(self._fingerprint_url)
+            static_view = app.view_functions['static']
+            app.view_functions['static'] = lambda filename: self._serve(app, static_view, filename)
+
+    def _fingerprint_url(self, endpoint, values):
+        """url_defaults: cambia filename por su versión con hash, si la hay."""
+        if endpoint == 'static':
+            fingerprinted = self.urls.get(values.get('filename'))
+            if fingerprinted:
+                values['filename'] = fingerprinted
+
+    def _serve(self, app, static_view, filename):
+        encodings = self.encodings.get(filename)
+        if encodings is None:
+            return static_view(filename=filename)
+
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        for encoding, suffix in ENCODINGS:
+            if encoding in encodings and request.accept_encodings[encoding]:
+                response = send_from_directory(app.static_folder, filename + suffix, mimetype=mimetype)
+                response.headers['Content-Encoding'] = encoding
+                break
+        else:
+            response = send_from_directory(app.static_folder, filename, mimetype=mimetype)
+        if encodings:
+            response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+
+# Instancia compartida, inicializada en app.py con asset_pipeline.init_app(app).
+asset_pipeline = AssetPipeline()
@@ -0,0 +1,240 @@
+# utils/bulk_import.py
+# Importación masiva de motos desde CSV o JSON Lines (con una carpeta o un zip de imágenes).
+# - Cada fila se valida con las mismas reglas que MotoForm (se usa el propio formulario).
+# - Las filas válidas se guardan por lotes: un lote es una transacción, así que o se
+#   guarda entero o no se guarda nada de él.
+# - Una moto con la misma marca, modelo y año que una existente se actualiza (upsert).
+# - Las imágenes se procesan en un pool de hilos (Pillow libera el GIL al redimensionar)
+#   y se guardan con el almacenamiento direccionado por contenido de utils/storage.py.
+
+import csv
+import io
+import json
+import os
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import tuple_
+from werkzeug.datastructures import FileStorage, MultiDict
+
+from forms import MotoForm
+from models import Moto
+from utils.storage import store_upload, release_upload
+
+IMPORT_FIELDS = ('marca', 'modelo', 'año', 'precio', 'descripcion')
+# Columna opcional con el nombre del archivo de imagen dentro de la carpeta o el zip.
+IMAGE_FIELD = 'imagen'
+
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_IMAGE_THREADS = 4
+
+
+class ImportResult:
+    """Resumen de una importación."""
+
+    def __init__(self):
+        self.inserted = 0
+        self.updated = 0
+        # Lista de (línea, mensaje) de las filas rechazadas o de los lotes fallidos.
+        self.errors = []
+        self.seconds = 0.0
+
+    @property
+    def saved(self):
+        return self.inserted + self.updated
+
+    @property
+    def rows_per_second(self):
+        return self.saved / self.seconds if self.seconds else 0.0
+
+    def summary(self):
+        return (f"{self.saved} motos importadas ({self.inserted} nuevas, {self.updated} actualizadas), "
+                f"{len(self.errors)} errores, en {self.seconds:.2f}s ({self.rows_per_second:.1f} filas/s)")
+
+
+def read_rows(stream, file_format):
+    """
+    Recorre las filas de un archivo CSV o JSON Lines como (número de línea, diccionario).
+
+    Args:
+        stream: Archivo abierto en modo binario.
+        file_format: 'csv' o 'jsonl'.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if file_format == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, {'__error__': f'JSON inválido: {e}'}
+            continue
+        yield line_number, row if isinstance(row, dict) else {'__error__': 'Se esperaba un objeto JSON.'}
+
+
+def validate_row(row):
+    """
+    Valida una fila con las reglas de MotoForm.
+
+    Returns:
+        (datos, None) si es válida, o (None, mensaje de error).
+    """
+    if '__error__' in row:
+        return None, row['__error__']
+    formdata = MultiDict({name: str(row.get(name) if row.get(name) is not None else '').strip()
+                          for name in IMPORT_FIELDS})
+    form = MotoForm(formdata=formdata, meta={'csrf': False})
+    if not form.validate():
+        return None, '; '.join(f"{name}: {' '.join(errors)}" for name, errors in form.errors.items())
+    data = {name: getattr(form, name).data for name in IMPORT_FIELDS}
+    data[IMAGE_FIELD] = str(row.get(IMAGE_FIELD) or '').strip()
+    return data, None
+
+
+class ImageSource:
+    """Imágenes de la importación: una carpeta, un zip o ninguna."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self._zip = zipfile.ZipFile(path) if path and zipfile.is_zipfile(path) else None
+        if self._zip is not None:
+            # Se busca por nombre de archivo sin importar las carpetas dentro del zip.
+            self._members = {os.path.basename(name): name for name in self._zip.namelist() if not name.endswith('/')}
+
+    def open(self, name):
+        """Abre una imagen por nombre (sin salir de la carpeta indicada)."""
+        if self._zip is not None:
+            member = self._members.get(os.path.basename(name))
+            if member is None:
+                raise FileNotFoundError(name)
+            return io.BytesIO(self._zip.read(member))
+        if not self.path:
+            raise FileNotFoundError(name)
+        folder = os.path.realpath(self.path)
+        full_path = os.path.realpath(os.path.join(folder, name))
+        if not full_path.startswith(folder + os.sep):
+            raise FileNotFoundError(name)
+        return open(full_path, 'rb')
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+
+
+def _store_image(images, name, allowed_extensions, static_folder):
+    extension = name.rsplit('.', 1)[-1].lower() if '.' in name else ''
+    if extension not in allowed_extensions:
+        raise ValueError(f"tipo de archivo no permitido para la imagen '{name}'")
+    with images.open(name) as f:
+        return store_upload(FileStorage(stream=f, filename=name), extension, static_folder)
+
+
+def _save_batch(session, batch, image_urls, result):
+    """
+    Inserta o actualiza las motos de un lote en una sola transacción.
+
+    Returns:
+        Las imágenes que dejaron de usarse (para liberarlas tras el commit).
+    """
+    keys = {(data['marca'], data['modelo'], data['año']) for _, data in batch}
+    existing = {(moto.marca, moto.modelo, moto.año): moto for moto in
+                session.query(Moto).filter(tuple_(Moto.marca, Moto.modelo, Moto.año).in_(keys))}
+
+    replaced_images = []
+    inserted = updated = 0
+    for _, data in batch:
+        key = (data['marca'], data['modelo'], data['año'])
+        imagen_url = image_urls.get(data[IMAGE_FIELD])
+        moto = existing.get(key)
+        if moto is None:
+            moto = Moto(marca=data['marca'], modelo=data['modelo'], año=data['año'])
+            session.add(moto)
+            existing[key] = moto
+            inserted += 1
+        else:
+            updated += 1
+        moto.precio = data['precio']
+        moto.descripcion = data['descripcion']
+        if imagen_url and imagen_url != moto.imagen_url:
+            if moto.imagen_url:
+                replaced_images.append(moto.imagen_url)
+            moto.imagen_url = imagen_url
+    session.commit()
+    result.inserted += inserted
+    result.updated += updated
+    return replaced_images
+
+
+def import_motos(session, rows, app_config, static_folder, images_path=None,
+                 batch_size=DEFAULT_BATCH_SIZE, image_threads=DEFAULT_IMAGE_THREADS):
+    """
+    Importa motos a partir de filas (número de línea, diccionario) de read_rows().
+    Requiere un contexto de aplicación.
+
+    Returns:
+        Un ImportResult con las cantidades, los errores y las filas por segundo.
+    """
+    result = ImportResult()
+    started = time.perf_counter()
+    images = ImageSource(images_path)
+    # Imágenes ya guardadas en esta importación: nombre en el archivo -> imagen_url.
+    stored_images = {}
+    allowed_extensions = app_config['ALLOWED_EXTENSIONS']
+
+    def flush(batch):
+        pending = sorted({data[IMAGE_FIELD] for _, data in batch
+                          if data[IMAGE_FIELD] and data[IMAGE_FIELD] not in stored_images})
+        futures = {name: pool.submit(_store_image, images, name, allowed_extensions, static_folder)
+                   for name in pending}
+        image_errors = {}
+        for name, future in futures.items():
+            try:
+                stored_images[name] = future.result()
+            except FileNotFoundError:
+                image_errors[name] = f"no se encontró el archivo '{name}'"
+            except (OSError, ValueError) as e:
+                image_errors[name] = str(e)
+
+        valid = []
+        for line_number, data in batch:
+            if data[IMAGE_FIELD] in image_errors:
+                result.errors.append((line_number, f"imagen: {image_errors[data[IMAGE_FIELD]]}"))
+            else:
+                valid.append((line_number, data))
+        if not valid:
+            return
+        try:
+            replaced_images = _save_batch(session, valid, stored_images, result)
+        except Exception as e:
+            session.rollback()
+            first, last = valid[0][0], valid[-1][0]
+            result.errors.append((first, f"lote de las líneas {first}-{last} descartado: {e}"))
+            return
+        for imagen_url in replaced_images:
+            release_upload(imagen_url, static_folder)
+
+    try:
+        with ThreadPoolExecutor(max_workers=image_threads, thread_name_prefix='import-images') as pool:
+            batch = []
+            for line_number, row in rows:
+                data, error = validate_row(row)
+                if error:
+                    result.errors.append((line_number, error))
+                    continue
+                batch.append((line_number, data))
+                if len(batch) >= batch_size:
+                    flush(batch)
+                    batch = []
+            if batch:
+                flush(batch)
+    finally:
+        images.close()
+
+    result.seconds = time.perf_counter() - started
+    return result
@@ -0,0 +1,110 @@
+# utils/catalog_revision.py
+# Revisión global del catálogo de motos.
+# Cada commit que inserta, modifica o elimina una Moto cambia la revisión. Las
+# cachés del catálogo (facetas, páginas renderizadas, PDF...) guardan la revisión
+# con la que se calcularon y se recalculan cuando ésta cambia.
+#
+# La revisión se guarda en un archivo de la carpeta 'instance' para que todos los
+# workers de gunicorn la compartan: leerla cuesta un os.stat(), no una consulta SQL.
+
+import os
+import time
+import uuid
+
+from blinker import Namespace
+from flask import current_app, has_app_context
+from sqlalchemy import event
+
+from extensions import db
+from models import Moto
+
+REVISION_FILENAME = 'catalog_revision'
+
+# Última revisión leída por este proceso: (ruta, (inodo, mtime_ns), revisión).
+# os.replace() crea siempre un inodo nuevo, así que el inodo detecta el cambio aunque
+# dos escrituras seguidas tengan la misma fecha (sistemas de archivos con poca resolución).
+_revision_cache = None
+
+
+def _revision_path(app_instance):
+    return os.path.join(app_instance.instance_path, REVISION_FILENAME)
+
+
+def bump_catalog_revision(app_instance):
+    """
+    Marca el catálogo como modificado escribiendo una revisión nueva.
+    La escritura es atómica (archivo temporal + os.replace), así que un lector
+    nunca ve un archivo a medio escribir. El temporal tiene un nombre único por
+    llamada: varios hilos del mismo proceso pueden cambiar la revisión a la vez.
+    """
+    global _revision_cache
+    path = _revision_path(app_instance)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    revision = f"{time.time_ns():x}-{uuid.uuid4().hex[:8]}"
+    tmp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, 'w', encoding='ascii') as f:
+        f.write(revision)
+    os.replace(tmp_path, path)
+    _revision_cache = None
+    return revision
+
+
+def get_catalog_revision(app_instance):
+    """
+    Devuelve la revisión actual del catálogo. Sólo se vuelve a leer el archivo
+    cuando el archivo cambia (otro inodo u otra fecha de modificación).
+    """
+    global _revision_cache
+    path = _revision_path(app_instance)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return bump_catalog_revision(app_instance)
+
+    version = (stat.st_ino, stat.st_mtime_ns)
+    cached = _revision_cache
+    if cached and cached[0] == path and cached[1] == version:
+        return cached[2]
+
+    with open(path, encoding='ascii') as f:
+        revision = f.read().strip()
+    _revision_cache = (path, version, revision)
+    return revision
+
+
+def get_catalog_revision_time(app_instance):
+    """Devuelve la fecha (timestamp) de la última modificación del catálogo."""
+    get_catalog_revision(app_instance)
+    return os.stat(_revision_path(app_instance)).st_mtime
+
+
+# --- Detección automática de cambios en Moto ---
+# Durante el flush se anotan en la sesión los ids de las motos tocadas; tras el
+# commit se cambia la revisión y se emite la señal 'catalog_changed' con esos ids
+# (la usan, por ejemplo, la caché de páginas para purgar sólo lo afectado).
+# Si la transacción se revierte no se cambia nada.
+
+_signals = Namespace()
+catalog_changed = _signals.signal('catalog-changed')
+
+
+@event.listens_for(db.session, 'after_flush')
+def _track_moto_changes(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Moto):
+            session.info.setdefault('changed_moto_ids', set()).add(obj.id)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _bump_on_commit(session):
+    moto_ids = session.info.pop('changed_moto_ids', None)
+    if moto_ids and has_app_context():
+        app_instance = current_app._get_current_object()
+        bump_catalog_revision(app_instance)
+        catalog_changed.send(app_instance, moto_ids=moto_ids)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_on_rollback(session):
+    session.info.pop('changed_moto_ids', None)
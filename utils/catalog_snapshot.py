@@ -0,0 +1,183 @@
+# utils/catalog_snapshot.py
+# Copia en memoria, de sólo lectura, del catálogo de motos (modo CATALOG_SNAPSHOT).
+# El catálogo es pequeño y casi nunca cambia, así que cada worker puede guardar todas
+# las motos como registros compactos (__slots__) con índices ya ordenados por id,
+# marca, año y precio, y responder al filtrado, el orden y la paginación de las
+# rutas públicas sin consultas SQL ni objetos del ORM.
+#
+# La copia está asociada a una revisión del catálogo (utils/catalog_revision.py):
+# cuando un commit modifica motos la revisión cambia y la siguiente petición carga
+# una copia nueva, que sustituye a la anterior de una sola vez (las peticiones en
+# curso siguen usando la que ya tenían).
+#
+# La búsqueda de texto no se resuelve aquí: su ranking lo calcula el índice de texto
+# completo de la base de datos (utils/search.py).
+
+import math
+import threading
+from bisect import bisect_left, bisect_right
+from operator import attrgetter
+
+from sqlalchemy import select
+
+from models import Moto
+from utils.catalog_revision import get_catalog_revision
+
+MOTO_FIELDS = ('id', 'marca', 'modelo', 'año', 'precio', 'descripcion', 'imagen_url')
+
+# Órdenes precalculados (los mismos que CATALOG_SORTS en routes/main.py).
+SORT_KEYS = (('id',), ('precio', 'id'), ('año', 'id'))
+
+_lock = threading.Lock()
+# Copia vigente en este proceso.
+_snapshot = None
+
+
+class MotoRecord:
+    """Una moto del catálogo: los mismos atributos que el modelo Moto, sin el ORM."""
+    __slots__ = MOTO_FIELDS
+
+    def __init__(self, id, marca, modelo, año, precio, descripcion, imagen_url):
+        self.id = id
+        self.marca = marca
+        self.modelo = modelo
+        self.año = año
+        self.precio = precio
+        self.descripcion = descripcion
+        self.imagen_url = imagen_url
+
+    def __repr__(self):
+        return f'<MotoRecord {self.marca} {self.modelo}>'
+
+
+class CatalogSnapshot:
+    """Motos de una revisión del catálogo con sus índices. No se modifica tras crearse."""
+
+    def __init__(self, revision, records):
+        self.revision = revision
+        self.by_id = {record.id: record for record in records}
+
+        # Para cada orden: los registros ordenados y sus claves (para bisect con cursores).
+        self._sorted = {}
+        for sort_key in SORT_KEYS:
+            key = attrgetter(*sort_key)
+            ordered = tuple(sorted(records, key=key))
+            self._sorted[sort_key] = (ordered, [key(record) for record in ordered])
+
+        by_id = self._sorted[('id',)][0]
+        self.by_brand = {}
+        self.by_year = {}
+        for record in by_id:
+            self.by_brand.setdefault(record.marca, []).append(record)
+            self.by_year.setdefault(record.año, []).append(record)
+        self.by_brand = {marca: tuple(rows) for marca, rows in self.by_brand.items()}
+        self.by_year = {año: tuple(rows) for año, rows in self.by_year.items()}
+
+        prices = [record.precio for record in records]
+        # Mismo formato que utils/facets.compute_catalog_facets().
+        self.facets = {
+            'brands': sorted((marca, len(rows)) for marca, rows in self.by_brand.items()),
+            'years': sorted(((año, len(rows)) for año, rows in self.by_year.items()), reverse=True),
+            'price_min': min(prices) if prices else None,
+            'price_max': max(prices) if prices else None,
+        }
+
+    def get(self, moto_id):
+        return self.by_id.get(moto_id)
+
+    def latest(self, limit):
+        """Las últimas motos añadidas (mayor id primero), como el carrusel de inicio."""
+        ordered = self._sorted[('id',)][0]
+        return list(reversed(ordered[-limit:])) if limit else []
+
+    def _select(self, sort_key, brand=None, year=None, price_min=None, price_max=None):
+        """
+        Las motos que cumplen los filtros, en orden ascendente según sort_key, y sus claves.
+        Se parte del índice más selectivo (marca, año o rango de precio) y se filtra el resto.
+        """
+        ordered, keys = self._sorted[sort_key]
+        if not brand and year is None and price_min is None and price_max is None:
+            return ordered, keys
+
+        if brand:
+            candidates = self.by_brand.get(brand, ())
+        elif year is not None:
+            candidates = self.by_year.get(year, ())
+        else:
+            price_ordered, price_keys = self._sorted[('precio', 'id')]
+            start = 0 if price_min is None else bisect_left(price_keys, (price_min,))
+            end = len(price_keys) if price_max is None else bisect_right(price_keys, (price_max, math.inf))
+            candidates = price_ordered[start:end]
+
+        rows = [record for record in candidates
+                if (not brand or record.marca == brand)
+                and (year is None or record.año == year)
+                and (price_min is None or record.precio >= price_min)
+                and (price_max is None or record.precio <= price_max)]
+        key = attrgetter(*sort_key)
+        rows.sort(key=key)
+        return rows, [key(record) for record in rows]
+
+    def paginate(self, sort_key, descending, page, per_page, **filters):
+        """Equivalente en memoria de utils/pagination.paginate_offset: (items, page, total, total_pages)."""
+        rows, _ = self._select(sort_key, **filters)
+        total = len(rows)
+        total_pages = math.ceil(total / per_page)
+        page = min(max(page, 1), max(total_pages, 1))
+
+        start = (page - 1) * per_page
+        if descending:
+            end = total - start
+            items = list(reversed(rows[max(end - per_page, 0):end]))
+        else:
+            items = list(rows[start:start + per_page])
+        return items, page, total, total_pages
+
+    def window(self, sort_key, descending, cursor, per_page, **filters):
+        """Equivalente en memoria de utils/pagination.paginate_keyset: (items, next_values)."""
+        rows, keys = self._select(sort_key, **filters)
+        # Las claves de un solo campo se guardan sin tupla (attrgetter de un atributo).
+        last = (tuple(cursor) if len(sort_key) > 1 else cursor[0]) if cursor else None
+        if descending:
+            end = len(rows) if last is None else bisect_left(keys, last)
+            items = list(reversed(rows[max(end - per_page, 0):end]))
+            has_more = end - per_page > 0
+        else:
+            start = 0 if last is None else bisect_right(keys, last)
+            items = list(rows[start:start + per_page])
+            has_more = start + per_page < len(rows)
+
+        next_values = [getattr(items[-1], name) for name in sort_key] if has_more and items else None
+        return items, next_values
+
+
+def load_catalog_snapshot(db_instance, revision):
+    """
+    Lee todas las motos y construye la copia. Se lee siempre de la base de datos
+    principal: una réplica con retraso dejaría la copia desactualizada hasta la
+    siguiente revisión.
+    """
+    columns = [getattr(Moto, name) for name in MOTO_FIELDS]
+    with db_instance.engine.connect() as connection:
+        records = [MotoRecord(*row) for row in connection.execute(select(*columns))]
+    return CatalogSnapshot(revision, records)
+
+
+def get_catalog_snapshot(app_instance, db_instance):
+    """
+    Devuelve la copia del catálogo de la revisión actual; si la revisión cambió,
+    carga una nueva (sólo un hilo por proceso la carga).
+    """
+    global _snapshot
+    revision = get_catalog_revision(app_instance)
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.revision == revision:
+        return snapshot
+
+    with _lock:
+        snapshot = _snapshot
+        if snapshot is not None and snapshot.revision == revision:
+            return snapshot
+        snapshot = load_catalog_snapshot(db_instance, revision)
+        _snapshot = snapshot
+        return snapshot
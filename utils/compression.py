@@ -0,0 +1,215 @@
+# utils/compression.py
+# Compresión de las respuestas dinámicas (middleware WSGI).
+# Las páginas renderizadas (HTML) y las respuestas JSON de más de COMPRESSION_MIN_SIZE
+# bytes se comprimen con brotli o gzip según Accept-Encoding del cliente. Los archivos
+# estáticos no pasan por aquí con otro tipo de contenido, y CSS/JS ya se sirven
+# precomprimidos desde static/dist (utils/assets.py).
+#
+# Opcionalmente (COMPRESSION_MINIFY_HTML) se eliminan antes la sangría y las líneas
+# vacías que deja Jinja, salvo dentro de <pre>, <textarea>, <script> y <style>.
+#
+# Al comprimir, el ETag pasa a ser débil (W/"..."): la representación comprimida no es
+# idéntica byte a byte, y las peticiones condicionales siguen funcionando porque
+# If-None-Match usa comparación débil. brotli es opcional: sin él sólo se usa gzip.
+#
+# benchmark_compression.py compara bytes ahorrados y coste de CPU por nivel.
+
+import gzip
+import re
+
+from werkzeug.http import parse_accept_header, parse_options_header
+
+# Tipos de contenido que se comprimen (las descargas de CSV/JSON Lines del panel se
+# envían a medida que se generan y no se retienen en memoria).
+COMPRESSIBLE_MIMETYPES = frozenset({'text/html', 'application/json'})
+
+DEFAULT_MIN_SIZE = 1024
+# Niveles por defecto pensados para respuestas dinámicas: buena compresión con poco
+# coste por petición (ver benchmark_compression.py). Los estáticos se comprimen al
+# máximo una sola vez en build_assets.py.
+DEFAULT_GZIP_LEVEL = 6
+DEFAULT_BROTLI_QUALITY = 4
+
+# Bloques cuyo contenido no se toca al quitar espacios.
+PRESERVE_BLOCK_RE = re.compile(r'<(pre|textarea|script|style)\b.*?</\1\s*>', re.S | re.I)
+# Sangría y líneas vacías de las plantillas: un salto de línea seguido de espacios se
+# sustituye por un único salto de línea (el navegador los trata igual). Los espacios al
+# final de línea se dejan: son pocos y buscarlos hace el minificado varias veces más lento.
+NEWLINE_RUN_RE = re.compile(r'\n\s+')
+
+
+def minify_html(html):
+    """Quita la sangría y las líneas vacías del HTML, sin cambiar cómo se muestra."""
+    out = []
+    position = 0
+    for match in PRESERVE_BLOCK_RE.finditer(html):
+        out.append(NEWLINE_RUN_RE.sub('\n', html[position:match.start()]))
+        out.append(match.group(0))
+        position = match.end()
+    out.append(NEWLINE_RUN_RE.sub('\n', html[position:]))
+    return ''.join(out).strip()
+
+
+def load_brotli():
+    """El módulo brotli, o None si no está instalado."""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def compress(body, encoding, gzip_level=DEFAULT_GZIP_LEVEL, brotli_quality=DEFAULT_BROTLI_QUALITY,
+             brotli_module=None):
+    """Comprime body con 'gzip' o 'br' (brotli_module es necesario para 'br')."""
+    if encoding == 'br':
+        return brotli_module.compress(body, quality=brotli_quality, mode=brotli_module.MODE_TEXT)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+def choose_encoding(accept_encoding, brotli_available):
+    """La codificación preferida por el cliente entre las disponibles ('br', 'gzip' o None)."""
+    if not accept_encoding:
+        return None
+    accept = parse_accept_header(accept_encoding)
+    candidates = [('br', accept['br'])] if brotli_available else []
+    candidates.append(('gzip', accept['gzip']))
+    # A igual calidad se prefiere brotli (va primero y max() se queda con el primero).
+    encoding, quality = max(candidates, key=lambda candidate: candidate[1])
+    return encoding if quality > 0 else None
+
+
+class CompressionMiddleware:
+    """
+    Middleware WSGI que comprime (y opcionalmente minifica) las respuestas HTML y
+    JSON. El resto de respuestas pasan sin retenerse en memoria.
+    """
+
+    def __init__(self, wsgi_app, min_size=DEFAULT_MIN_SIZE, gzip_level=DEFAULT_GZIP_LEVEL,
+                 brotli_quality=DEFAULT_BROTLI_QUALITY, minify=False, mimetypes=COMPRESSIBLE_MIMETYPES):
+        self.wsgi_app = wsgi_app
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.minify = minify
+        self.mimetypes = frozenset(mimetypes)
+        self.brotli = load_brotli()
+
+    def __call__(self, environ, start_response):
+        captured = []
+        body_written = []
+
+        def capture(status, headers, exc_info=None):
+            captured[:] = [status, headers, exc_info]
+            return body_written.append
+
+        app_iter = self.wsgi_app(environ, capture)
+        if not captured:
+            # La aplicación llama a start_response al empezar a iterar: hay que leerla entera.
+            try:
+                chunks = list(app_iter)
+            finally:
+                if hasattr(app_iter, 'close'):
+                    app_iter.close()
+            app_iter = chunks
+
+        status, headers, exc_info = captured
+        if body_written or not self._should_process(environ, status, headers):
+            start_response(status, headers, exc_info)
+            return body_written + list(app_iter) if body_written else app_iter
+
+        try:
+            body = b''.join(app_iter)
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+        headers = list(headers)
+        content_type = _header(headers, 'Content-Type')
+        if self.minify and content_type.startswith('text/html'):
+            body = self._minify(body, content_type)
+
+        _add_vary(headers)
+        encoding = choose_encoding(environ.get('HTTP_ACCEPT_ENCODING'), self.brotli is not None)
+        if encoding and len(body) >= self.min_size:
+            body = compress(body, encoding, self.gzip_level, self.brotli_quality, self.brotli)
+            headers.append(('Content-Encoding', encoding))
+            etag = _header(headers, 'ETag')
+            if etag and not etag.startswith('W/'):
+                _set_header(headers, 'ETag', 'W/' + etag)
+        _set_header(headers, 'Content-Length', str(len(body)))
+        start_response(status, headers, exc_info)
+        return [body]
+
+    def _should_process(self, environ, status, headers):
+        if environ.get('REQUEST_METHOD') == 'HEAD' or status[:3] in ('204', '304') or status[0] == '1':
+            return False
+        mimetype = parse_options_header(_header(headers, 'Content-Type'))[0]
+        if mimetype not in self.mimetypes or _header(headers, 'Content-Encoding'):
+            return False
+        return 'no-transform' not in _header(headers, 'Cache-Control')
+
+    @staticmethod
+    def _minify(body, content_type):
+        charset = parse_options_header(content_type)[1].get('charset', 'utf-8')
+        try:
+            return minify_html(body.decode(charset)).encode(charset)
+        except (LookupError, UnicodeError):
+            return body
+
+
+def _header(headers, name):
+    name = name.lower()
+    return next((value for key, value in headers if key.lower() == name), '')
+
+
+def _set_header(headers, name, value):
+    lowered = name.lower()
+    headers[:] = [(key, v) for key, v in headers if key.lower() != lowered]
+    headers.append((name, value))
+
+
+def _add_vary(headers):
+    """Añade Accept-Encoding a Vary: la respuesta depende de esa cabecera aunque no se comprima."""
+    vary = _header(headers, 'Vary')
+    values = [value.strip().lower() for value in vary.split(',') if value.strip()]
+    if '*' in values or 'accept-encoding' in values:
+        return
+    _set_header(headers, 'Vary', f'{vary}, Accept-Encoding' if vary else 'Accept-Encoding')
+
+
+class Compression:
+    """
+    Extensión de Flask que envuelve app.wsgi_app con CompressionMiddleware. Se
+    configura con COMPRESSION, COMPRESSION_MIN_SIZE, COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_BROTLI_QUALITY, COMPRESSION_MINIFY_HTML y COMPRESSION_MIMETYPES.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESSION', True)
+        app.config.setdefault('COMPRESSION_MIN_SIZE', DEFAULT_MIN_SIZE)
+        app.config.setdefault('COMPRESSION_GZIP_LEVEL', DEFAULT_GZIP_LEVEL)
+        app.config.setdefault('COMPRESSION_BROTLI_QUALITY', DEFAULT_BROTLI_QUALITY)
+        app.config.setdefault('COMPRESSION_MINIFY_HTML', False)
+        app.config.setdefault('COMPRESSION_MIMETYPES', COMPRESSIBLE_MIMETYPES)
+        if not app.config['COMPRESSION']:
+            return
+
+        middleware = CompressionMiddleware(
+            app.wsgi_app,
+            min_size=app.config['COMPRESSION_MIN_SIZE'],
+            gzip_level=app.config['COMPRESSION_GZIP_LEVEL'],
+            brotli_quality=app.config['COMPRESSION_BROTLI_QUALITY'],
+            minify=app.config['COMPRESSION_MINIFY_HTML'],
+            mimetypes=app.config['COMPRESSION_MIMETYPES'],
+        )
+        app.wsgi_app = middleware
+        app.extensions['compression'] = middleware
+
+
+# Instancia compartida, inicializada en app.py con compression.init_app(app).
+compression = Compression()
@@ -0,0 +1,91 @@
+# utils/data_export.py
+# Exportación masiva de motos y facturas en CSV y JSON Lines.
+# Las filas se leen con yield_per (cursor del lado del servidor en PostgreSQL,
+# fetchmany en SQLite) como tuplas de columnas, sin crear objetos del ORM, y se
+# emiten con generadores en bloques de texto: la memoria usada es la misma para
+# cien filas que para un millón.
+
+import csv
+import io
+import json
+from datetime import date, datetime
+
+from sqlalchemy import select
+
+from models import Moto, Invoice
+
+# Conjuntos exportables: nombre -> modelo. Se exportan todas las columnas de la tabla.
+EXPORT_DATASETS = {
+    'motos': Moto,
+    'facturas': Invoice,
+}
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+# Filas leídas por cada viaje a la base de datos y filas por bloque de salida.
+BATCH_SIZE = 1000
+
+
+def export_columns(dataset):
+    return list(EXPORT_DATASETS[dataset].__table__.columns)
+
+
+def iter_rows(session, dataset, batch_size=BATCH_SIZE):
+    """Recorre las filas del conjunto como tuplas, en orden de clave primaria."""
+    model = EXPORT_DATASETS[dataset]
+    statement = select(*export_columns(dataset)).order_by(*model.__table__.primary_key.columns)
+    result = session.execute(statement.execution_options(yield_per=batch_size))
+    try:
+        yield from result
+    finally:
+        result.close()
+
+
+def _json_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f'Tipo no serializable: {type(value).__name__}')
+
+
+def iter_csv(rows, names, batch_size=BATCH_SIZE):
+    """Convierte las filas en bloques de texto CSV (con encabezado)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_jsonl(rows, names, batch_size=BATCH_SIZE):
+    """Convierte las filas en bloques de JSON Lines (un objeto por línea)."""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(names, row)), ensure_ascii=False, default=_json_value))
+        if len(lines) == batch_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def stream_export(session, dataset, export_format, batch_size=BATCH_SIZE):
+    """
+    Generador con el contenido completo de la exportación, por bloques de texto.
+
+    Args:
+        dataset: 'motos' o 'facturas'.
+        export_format: 'csv' o 'jsonl'.
+    """
+    names = [column.key for column in export_columns(dataset)]
+    rows = iter_rows(session, dataset, batch_size)
+    if export_format == 'csv':
+        return iter_csv(rows, names, batch_size)
+    return iter_jsonl(rows, names, batch_size)
@@ -0,0 +1,58 @@
+# utils/facets.py
+# Metadatos de filtrado del catálogo ("facetas"): marcas y años con su cantidad
+# de motos, y precio mínimo/máximo. Se calculan una vez por revisión del
+# catálogo y se guardan en memoria del proceso, de modo que renderizar los
+# filtros no cuesta consultas extra mientras el inventario no cambie.
+
+import threading
+
+from sqlalchemy import func, select
+
+from models import Moto
+from utils.catalog_revision import get_catalog_revision
+
+_lock = threading.Lock()
+# (revisión, facetas) calculadas por este proceso.
+_facets_cache = None
+
+
+def compute_catalog_facets(db_instance):
+    """
+    Calcula las facetas directamente desde la base de datos. Se lee siempre de la
+    base de datos principal: el resultado se guarda hasta la siguiente revisión, y
+    una réplica con retraso lo dejaría desactualizado todo ese tiempo.
+    """
+    with db_instance.engine.connect() as connection:
+        brands = connection.execute(
+            select(Moto.marca, func.count(Moto.id)).group_by(Moto.marca).order_by(Moto.marca)).all()
+        years = connection.execute(
+            select(Moto.año, func.count(Moto.id)).group_by(Moto.año).order_by(Moto.año.desc())).all()
+        price_min, price_max = connection.execute(select(func.min(Moto.precio), func.max(Moto.precio))).one()
+
+    return {
+        'brands': [(marca, count) for marca, count in brands],
+        'years': [(año, count) for año, count in years],
+        'price_min': price_min,
+        'price_max': price_max,
+    }
+
+
+def get_catalog_facets(app_instance, db_instance):
+    """
+    Devuelve las facetas del catálogo desde la caché del proceso. Se recalculan
+    sólo cuando cambia la revisión del catálogo (un commit que modificó motos).
+    """
+    global _facets_cache
+    revision = get_catalog_revision(app_instance)
+    cached = _facets_cache
+    if cached and cached[0] == revision:
+        return cached[1]
+
+    with _lock:
+        cached = _facets_cache
+        if cached and cached[0] == revision:
+            return cached[1]
+        facets = compute_catalog_facets(db_instance)
+        _facets_cache = (revision, facets)
+        return facets
+
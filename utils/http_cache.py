@@ -0,0 +1,106 @@
+# utils/http_cache.py
+# Validadores HTTP (ETag / Last-Modified) para las respuestas del catálogo.
+# El contenido de estas páginas sólo depende de la revisión del catálogo, de los
+# parámetros de la URL, de si hay un administrador conectado y de las plantillas
+# desplegadas. Con eso se calcula un ETag fuerte y se responde 304 Not Modified
+# a las peticiones condicionales antes de consultar la base de datos, renderizar
+# Jinja o generar el PDF con ReportLab.
+
+import hashlib
+import os
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import current_app, request, session
+from werkzeug.http import is_resource_modified
+
+from utils.assets import DIST_DIR, MANIFEST_NAME
+from utils.catalog_revision import get_catalog_revision, get_catalog_revision_time
+from utils.read_replica import read_from_primary
+
+# (token, timestamp) del despliegue actual, calculado una vez por proceso.
+_deploy_cache = None
+
+
+def _deploy_token(app_instance):
+    """
+    Identifica la versión desplegada de las plantillas a partir de sus nombres y
+    fechas de modificación, para que un despliegue nuevo invalide los ETags aunque
+    el catálogo no haya cambiado. Es igual en todos los workers del mismo despliegue.
+    También incluye el manifiesto de static/dist (utils/assets.py): el HTML enlaza
+    las URLs con hash de CSS/JS/logos, así que reconstruirlos cambia las páginas.
+    """
+    global _deploy_cache
+    if _deploy_cache is None:
+        digest = hashlib.sha1()
+        latest = 0.0
+        template_folder = os.path.join(app_instance.root_path, app_instance.template_folder)
+        for root, _, files in os.walk(template_folder):
+            for filename in sorted(files):
+                mtime = os.stat(os.path.join(root, filename)).st_mtime
+                digest.update(f'{filename}:{mtime}'.encode('utf-8'))
+                latest = max(latest, mtime)
+        manifest_path = os.path.join(app_instance.static_folder, DIST_DIR, MANIFEST_NAME)
+        try:
+            with open(manifest_path, 'rb') as f:
+                digest.update(f.read())
+            latest = max(latest, os.stat(manifest_path).st_mtime)
+        except OSError:
+            pass
+        _deploy_cache = (digest.hexdigest()[:12], latest)
+    return _deploy_cache
+
+
+def catalog_etag(*parts):
+    """Calcula el ETag de una respuesta a partir de la revisión y de partes extra."""
+    deploy_token, _ = _deploy_token(current_app)
+    revision = get_catalog_revision(current_app)
+    args = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+    raw = '|'.join([revision, deploy_token, request.endpoint or '', args, *map(str, parts)])
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def catalog_last_modified():
+    """Fecha de la última modificación del catálogo o del despliegue, lo que sea posterior."""
+    _, deploy_time = _deploy_token(current_app)
+    timestamp = max(get_catalog_revision_time(current_app), deploy_time)
+    return datetime.fromtimestamp(int(timestamp), tz=timezone.utc)
+
+
+def conditional(private=False):
+    """
+    Decorador que añade ETag, Last-Modified y Cache-Control a la respuesta de la
+    vista y responde 304 si el cliente ya tiene esa versión (If-None-Match /
+    If-Modified-Since), sin ejecutar la vista.
+
+    Args:
+        private: True para respuestas que no deben guardar las cachés compartidas
+            (p. ej. el PDF del panel de administración).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Con mensajes flash pendientes la página no es la "versión" cacheada.
+            if request.method != 'GET' or session.get('_flashes'):
+                return view(*args, **kwargs)
+
+            logged_in = bool(session.get('logged_in'))
+            etag = catalog_etag(logged_in)
+            last_modified = catalog_last_modified()
+            cache_control = 'private, no-cache' if private or logged_in else 'public, no-cache'
+
+            if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                # La página recibirá el ETag de la revisión actual: no puede venir de una réplica atrasada.
+                read_from_primary()
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            response.last_modified = last_modified
+            response.headers['Cache-Control'] = cache_control
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,230 @@
+# utils/images.py
+# Derivados redimensionados de las imágenes del catálogo.
+# Para cada imagen original se generan versiones en WebP (con JPEG de respaldo)
+# a varios anchos, y una miniatura JPEG cacheada para el PDF. Las plantillas usan
+# estos derivados con srcset/sizes, así el navegador descarga sólo el tamaño que
+# necesita en lugar del original de varios megas.
+#
+# Estructura en disco (dentro de static/):
+#   images/uploads/honda-cb1000r.png
+#   images/derivatives/uploads/honda-cb1000r/manifest.json
+#   images/derivatives/uploads/honda-cb1000r/w480.webp, w480.jpg, ...
+# Las miniaturas del PDF se guardan aparte (ver pdf_thumbnail()).
+#
+# Pillow se importa dentro de las funciones que procesan imágenes: los workers web
+# sólo leen manifiestos (responsive_image) y no cargan Pillow al arrancar.
+
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+
+DERIVATIVES_DIR = 'images/derivatives'
+
+# Anchos generados (en píxeles). No se amplía nunca una imagen más pequeña.
+DERIVATIVE_WIDTHS = (320, 480, 640, 960, 1280)
+# Miniatura para el PDF: 1.0 x 0.75 pulgadas a ~300 ppp.
+PDF_THUMBNAIL_SIZE = (300, 225)
+
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+
+# Anchos y atributo 'sizes' por tipo de uso en las plantillas.
+IMAGE_KINDS = {
+    'card': ((320, 480, 640), '(max-width: 768px) 100vw, (max-width: 1024px) 50vw, 33vw'),
+    'detail': ((640, 960, 1280), '(max-width: 768px) 100vw, 50vw'),
+}
+
+SOURCE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp'}
+
+# Manifiestos leídos por este proceso: ruta relativa -> (mtime_ns, manifiesto).
+_manifest_cache = {}
+
+
+def derivatives_folder(image_rel_path):
+    """Carpeta relativa a static/ donde se guardan los derivados de una imagen."""
+    rel = image_rel_path
+    if rel.startswith('images/'):
+        rel = rel[len('images/'):]
+    return f'{DERIVATIVES_DIR}/{os.path.splitext(rel)[0]}'
+
+
+def _to_rgb(image):
+    """Aplana la transparencia sobre fondo blanco (JPEG no admite canal alfa)."""
+    from PIL import Image
+
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[-1])
+        return background
+    return image.convert('RGB')
+
+
+def generate_derivatives(static_folder, image_rel_path):
+    """
+    Genera los derivados de una imagen y escribe su manifiesto.
+
+    Args:
+        static_folder: Ruta absoluta de la carpeta static/.
+        image_rel_path: Ruta de la imagen relativa a static/ (como Moto.imagen_url).
+
+    Returns:
+        El manifiesto generado, o None si la imagen no se pudo procesar.
+    """
+    from PIL import Image, ImageOps
+
+    source_path = os.path.join(static_folder, image_rel_path)
+    folder_rel = derivatives_folder(image_rel_path)
+    folder = os.path.join(static_folder, folder_rel)
+
+    try:
+        with Image.open(source_path) as original:
+            original = ImageOps.exif_transpose(original)
+            original.load()
+    except (OSError, ValueError) as e:
+        print(f"Error al generar derivados de '{image_rel_path}': {e}")
+        return None
+
+    os.makedirs(folder, exist_ok=True)
+    source_width, source_height = original.size
+    widths = [w for w in DERIVATIVE_WIDTHS if w < source_width] or [source_width]
+    if source_width <= DERIVATIVE_WIDTHS[-1] and source_width not in widths:
+        widths.append(source_width)
+
+    has_alpha = original.mode in ('RGBA', 'LA') or (original.mode == 'P' and 'transparency' in original.info)
+    webp_base = original.convert('RGBA' if has_alpha else 'RGB')
+    jpeg_base = _to_rgb(original)
+
+    generated = []
+    for width in widths:
+        height = max(1, round(source_height * width / source_width))
+        webp_base.resize((width, height), Image.LANCZOS).save(
+            os.path.join(folder, f'w{width}.webp'), 'WEBP', quality=WEBP_QUALITY, method=6)
+        jpeg_base.resize((width, height), Image.LANCZOS).save(
+            os.path.join(folder, f'w{width}.jpg'), 'JPEG', quality=JPEG_QUALITY,
+            optimize=True, progressive=True)
+        generated.append(width)
+
+    manifest = {
+        'source': image_rel_path,
+        'width': source_width,
+        'height': source_height,
+        'widths': generated,
+    }
+    tmp_path = os.path.join(folder, f'manifest.json.{os.getpid()}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, os.path.join(folder, 'manifest.json'))
+    return manifest
+
+
+def remove_derivatives(static_folder, image_rel_path):
+    """Elimina los derivados de una imagen (al borrarla o reemplazarla)."""
+    shutil.rmtree(os.path.join(static_folder, derivatives_folder(image_rel_path)), ignore_errors=True)
+    _manifest_cache.pop(image_rel_path, None)
+
+
+def load_manifest(static_folder, image_rel_path):
+    """Devuelve el manifiesto de derivados de una imagen, o None si no existe."""
+    path = os.path.join(static_folder, derivatives_folder(image_rel_path), 'manifest.json')
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+    cached = _manifest_cache.get(image_rel_path)
+    if cached and cached[0] == mtime_ns:
+        return cached[1]
+    try:
+        with open(path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    _manifest_cache[image_rel_path] = (mtime_ns, manifest)
+    return manifest
+
+
+def responsive_image(static_folder, image_rel_path, kind, url_for_static):
+    """
+    Datos para renderizar una imagen adaptable en una plantilla.
+
+    Returns:
+        Un diccionario con 'src', 'webp_srcset', 'jpeg_srcset', 'sizes', 'width'
+        y 'height', o None si la imagen no tiene derivados (se usa el original).
+    """
+    if not image_rel_path:
+        return None
+    manifest = load_manifest(static_folder, image_rel_path)
+    if not manifest:
+        return None
+
+    kind_widths, sizes = IMAGE_KINDS[kind]
+    available = manifest['widths']
+    widths = [w for w in available if w <= kind_widths[-1]] or available[:1]
+    folder = derivatives_folder(image_rel_path)
+
+    def srcset(ext):
+        return ', '.join(f"{url_for_static(filename=f'{folder}/w{w}.{ext}')} {w}w" for w in widths)
+
+    fallback_width = next((w for w in widths if w >= kind_widths[0]), widths[-1])
+    return {
+        'src': url_for_static(filename=f'{folder}/w{fallback_width}.jpg'),
+        'webp_srcset': srcset('webp'),
+        'jpeg_srcset': srcset('jpg'),
+        'sizes': sizes,
+        'width': manifest['width'],
+        'height': manifest['height'],
+    }
+
+
+def pdf_thumbnail(source_path, cache_dir):
+    """
+    Miniatura JPEG de una imagen para el PDF, a resolución de impresión.
+    Se guarda en cache_dir con una clave derivada de la ruta, la fecha de
+    modificación y el tamaño del original, así que se regenera sola si la imagen
+    cambia y las siguientes exportaciones la reutilizan sin decodificar el original.
+
+    Returns:
+        La ruta absoluta de la miniatura, o None si el original no existe o no se pudo leer.
+    """
+    try:
+        stat = os.stat(source_path)
+    except OSError:
+        return None
+    key = hashlib.sha1(f'{source_path}:{stat.st_mtime_ns}:{stat.st_size}'.encode('utf-8')).hexdigest()
+    thumbnail_path = os.path.join(cache_dir, f'{key}.jpg')
+    if os.path.exists(thumbnail_path):
+        return thumbnail_path
+
+    from PIL import Image, ImageOps
+
+    try:
+        with Image.open(source_path) as original:
+            # En JPEG, draft() decodifica directamente a una escala reducida (mucho más rápido).
+            original.draft('RGB', (PDF_THUMBNAIL_SIZE[0] * 2, PDF_THUMBNAIL_SIZE[1] * 2))
+            image = _to_rgb(ImageOps.exif_transpose(original))
+    except (OSError, ValueError) as e:
+        print(f"Error al generar miniatura para PDF '{source_path}': {e}")
+        return None
+
+    # Se recorta al formato 4:3 de la celda en lugar de deformar la imagen.
+    thumbnail = ImageOps.fit(image, PDF_THUMBNAIL_SIZE, Image.LANCZOS)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f'{thumbnail_path}.{uuid.uuid4().hex}.tmp'
+    thumbnail.save(tmp_path, 'JPEG', quality=JPEG_QUALITY, optimize=True)
+    os.replace(tmp_path, thumbnail_path)
+    return thumbnail_path
+
+
+def iter_source_images(static_folder):
+    """Recorre las imágenes originales (images/ y images/uploads/) relativas a static/."""
+    for folder_rel in ('images', 'images/uploads'):
+        folder = os.path.join(static_folder, folder_rel)
+        if not os.path.isdir(folder):
+            continue
+        for filename in sorted(os.listdir(folder)):
+            if os.path.splitext(filename)[1].lower() in SOURCE_EXTENSIONS:
+                yield f'{folder_rel}/{filename}'
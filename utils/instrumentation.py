@@ -0,0 +1,265 @@
+# utils/instrumentation.py
+# Instrumentación de peticiones (opcional, INSTRUMENTATION=1).
+# Para cada petición se mide:
+#   - la latencia total y el tiempo de renderizado de plantillas (señales de Flask),
+#   - la cantidad de consultas SQL y su tiempo (eventos del engine de SQLAlchemy),
+#   - posibles N+1: la misma sentencia SQL repetida muchas veces en una petición.
+# Los datos se publican en /metrics en formato de texto de Prometheus (histogramas
+# por endpoint, por proceso como /metrics/page-cache) y en la cabecera Server-Timing
+# de cada respuesta. Las peticiones lentas y los N+1 se anotan con print().
+# /metrics exige sesión de administrador; un recolector como Prometheus se identifica
+# con METRICS_TOKEN o desde una IP de METRICS_ALLOWED_IPS (ver config.py).
+#
+# Perfilado bajo demanda: un administrador con sesión iniciada puede enviar la
+# cabecera 'X-Profile: cprofile' (o 'pyinstrument', si está instalado) y recibe el
+# informe del perfilador en lugar de la página. Para el resto, la cabecera se ignora.
+
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+from collections import Counter
+
+from flask import before_render_template, current_app, g, has_request_context, request, session, template_rendered
+from sqlalchemy import event
+
+from extensions import db, metrics_access_required
+
+# Límites (en segundos) de los buckets del histograma de latencia.
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Límites de los buckets del histograma de consultas SQL por petición.
+SQL_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class _Histogram:
+    """Histograma de Prometheus con etiquetas (acumulativo, como exige el formato)."""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        # etiquetas -> [conteo por bucket..., suma, total]
+        self._series = {}
+
+    def observe(self, labels, value):
+        series = self._series.setdefault(labels, [0] * len(self.buckets) + [0.0, 0])
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self, label_names, extra):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for labels, series in sorted(self._series.items()):
+            base = ','.join(f'{name}="{value}"' for name, value in zip(label_names, labels)) + extra
+            for bound, count in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{{{base},le="{bound:g}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {series[-1]}')
+            lines.append(f'{self.name}_sum{{{base}}} {series[-2]:.6f}')
+            lines.append(f'{self.name}_count{{{base}}} {series[-1]}')
+        return lines
+
+
+class _Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._values = Counter()
+
+    def inc(self, labels, value=1):
+        self._values[labels] += value
+
+    def render(self, label_names, extra):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        for labels, value in sorted(self._values.items()):
+            base = ','.join(f'{name}="{v}"' for name, v in zip(label_names, labels)) + extra
+            lines.append(f'{self.name}{{{base}}} {value:g}')
+        return lines
+
+
+class _RequestStats:
+    """Mediciones de la petición en curso (se guardan en flask.g)."""
+    __slots__ = ('started', 'sql_count', 'sql_time', 'template_time', 'template_starts', 'statements',
+                 'profiler')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.template_starts = []
+        self.statements = Counter()
+        self.profiler = None
+
+
+def _current_stats():
+    return g.get('_instrumentation') if has_request_context() else None
+
+
+class Instrumentation:
+    """
+    Extensión de Flask que mide las peticiones. Se configura con INSTRUMENTATION,
+    INSTRUMENTATION_BUCKETS, INSTRUMENTATION_SLOW_MS, N_PLUS_ONE_THRESHOLD y
+    PROFILE_HEADER.
+    """
+
+    def __init__(self, app=None):
+        self.n_plus_one_threshold = 5
+        self.slow_seconds = 0.5
+        self.profile_header = 'X-Profile'
+        self._lock = threading.Lock()
+        self._label_names = ('endpoint', 'method')
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('INSTRUMENTATION', False)
+        app.config.setdefault('INSTRUMENTATION_BUCKETS', DEFAULT_LATENCY_BUCKETS)
+        app.config.setdefault('INSTRUMENTATION_SLOW_MS', 500)
+        app.config.setdefault('N_PLUS_ONE_THRESHOLD', 5)
+        app.config.setdefault('PROFILE_HEADER', 'X-Profile')
+        if not app.config['INSTRUMENTATION']:
+            return
+
+        self.n_plus_one_threshold = app.config['N_PLUS_ONE_THRESHOLD']
+        self.slow_seconds = app.config['INSTRUMENTATION_SLOW_MS'] / 1000
+        self.profile_header = app.config['PROFILE_HEADER']
+        self.latency = _Histogram('motoshop_request_duration_seconds',
+                                  'Latencia de las peticiones por endpoint.', app.config['INSTRUMENTATION_BUCKETS'])
+        self.template_latency = _Histogram('motoshop_template_render_seconds',
+                                           'Tiempo de renderizado de plantillas por petición.',
+                                           app.config['INSTRUMENTATION_BUCKETS'])
+        self.sql_latency = _Histogram('motoshop_request_sql_seconds',
+                                      'Tiempo en consultas SQL por petición.', app.config['INSTRUMENTATION_BUCKETS'])
+        self.sql_queries = _Histogram('motoshop_request_sql_queries',
+                                      'Consultas SQL por petición.', SQL_COUNT_BUCKETS)
+        self.responses = _Counter('motoshop_requests_total', 'Peticiones por endpoint y código de estado.')
+        self.n_plus_one = _Counter('motoshop_n_plus_one_total', 'Peticiones con un posible patrón N+1.')
+
+        app.extensions['instrumentation'] = self
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        before_render_template.connect(self._before_render, sender=app, weak=False)
+        template_rendered.connect(self._after_render, sender=app, weak=False)
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+                event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        app.add_url_rule('/metrics', 'metrics', metrics_access_required(self.metrics_view))
+
+    # --- Eventos de SQLAlchemy y de las plantillas ---
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None and _current_stats() is not None:
+            context._instrumentation_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        stats = _current_stats()
+        started = getattr(context, '_instrumentation_started', None)
+        if stats is None or started is None:
+            return
+        stats.sql_count += 1
+        stats.sql_time += time.perf_counter() - started
+        stats.statements[statement] += 1
+
+    def _before_render(self, sender, template, context, **extra):
+        stats = _current_stats()
+        if stats is not None:
+            stats.template_starts.append(time.perf_counter())
+
+    def _after_render(self, sender, template, context, **extra):
+        stats = _current_stats()
+        if stats is not None and stats.template_starts:
+            started = stats.template_starts.pop()
+            # Las plantillas anidadas ya están incluidas en el tiempo de la exterior.
+            if not stats.template_starts:
+                stats.template_time += time.perf_counter() - started
+
+    # --- Ciclo de la petición ---
+
+    def _before_request(self):
+        stats = _RequestStats()
+        g._instrumentation = stats
+        mode = request.headers.get(self.profile_header, '').strip().lower()
+        if mode and session.get('logged_in'):
+            stats.profiler = _start_profiler(mode)
+
+    def _after_request(self, response):
+        stats = g.pop('_instrumentation', None)
+        if stats is None:
+            return response
+        if stats.profiler is not None:
+            return _profile_response(stats.profiler)
+
+        elapsed = time.perf_counter() - stats.started
+        endpoint = request.endpoint or 'sin_ruta'
+        labels = (endpoint, request.method)
+        repeated, repeats = stats.statements.most_common(1)[0] if stats.statements else ('', 0)
+        n_plus_one = repeats >= self.n_plus_one_threshold
+
+        with self._lock:
+            self.latency.observe(labels, elapsed)
+            self.template_latency.observe(labels, stats.template_time)
+            self.sql_latency.observe(labels, stats.sql_time)
+            self.sql_queries.observe(labels, stats.sql_count)
+            self.responses.inc((endpoint, request.method, str(response.status_code)))
+            if n_plus_one:
+                self.n_plus_one.inc(labels)
+
+        response.headers.add('Server-Timing', f'app;dur={elapsed * 1000:.1f}')
+        response.headers.add('Server-Timing', f'db;dur={stats.sql_time * 1000:.1f};desc="{stats.sql_count} consultas"')
+        response.headers.add('Server-Timing', f'tpl;dur={stats.template_time * 1000:.1f}')
+
+        if n_plus_one:
+            statement = ' '.join(repeated.split())[:160]
+            print(f"Posible N+1 en {endpoint}: {repeats} veces la misma consulta ({statement})")
+        if elapsed >= self.slow_seconds:
+            print(f"Petición lenta: {request.method} {request.path} ({endpoint}) {elapsed * 1000:.0f} ms, "
+                  f"{stats.sql_count} consultas SQL en {stats.sql_time * 1000:.0f} ms, "
+                  f"plantillas {stats.template_time * 1000:.0f} ms")
+        return response
+
+    def metrics_view(self):
+        """Métricas de las peticiones en formato de texto de Prometheus (por proceso)."""
+        extra = f',pid="{os.getpid()}"'
+        lines = []
+        with self._lock:
+            for metric in (self.latency, self.template_latency, self.sql_latency, self.sql_queries,
+                           self.n_plus_one):
+                lines += metric.render(self._label_names, extra)
+            lines += self.responses.render(('endpoint', 'method', 'status'), extra)
+        return current_app.response_class('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+
+def _start_profiler(mode):
+    """Inicia el perfilador pedido; pyinstrument es opcional y, si falta, se usa cProfile."""
+    if mode == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            print("pyinstrument no está instalado; se usa cProfile.")
+        else:
+            profiler = Profiler()
+            profiler.start()
+            return profiler
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def _profile_response(profiler):
+    """El informe del perfilador como respuesta (HTML de pyinstrument o texto de pstats)."""
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(60)
+        return current_app.response_class(output.getvalue(), mimetype='text/plain')
+    profiler.stop()
+    return current_app.response_class(profiler.output_html(), mimetype='text/html')
+
+
+# Instancia compartida, inicializada en app.py con instrumentation.init_app(app).
+instrumentation = Instrumentation()
@@ -0,0 +1,69 @@
+# utils/invoice_numbers.py
+# Asignación de números de factura (INV-AAAAMMDD-NNNN) segura ante concurrencia.
+# Cada día tiene una fila en 'invoice_counter' que se incrementa con un único
+# INSERT ... ON CONFLICT DO UPDATE ... RETURNING dentro de la misma transacción que
+# inserta la factura. La fila queda bloqueada hasta el commit (en SQLite, toda la
+# base de datos), así que dos workers nunca obtienen el mismo número y no hace falta
+# reintentar. Si la transacción se revierte, el número no se consume.
+
+import re
+from datetime import date
+
+from sqlalchemy import select
+
+from models import InvoiceCounter
+from utils.upsert import dialect_insert
+
+INVOICE_NUMBER_RE = re.compile(r'^INV-(\d{8})-(\d+)$')
+
+
+def format_invoice_number(day, number):
+    return f"INV-{day.strftime('%Y%m%d')}-{number:04d}"
+
+
+def allocate_invoice_number(session, day=None):
+    """
+    Reserva el siguiente número de factura del día dentro de la transacción actual.
+    Debe ser la primera escritura de la transacción: en SQLite así se toma el
+    bloqueo de escritura de inmediato en lugar de intentar ampliarlo desde una lectura.
+
+    Args:
+        session: La sesión de SQLAlchemy (db.session) que luego hará el commit.
+        day: Día del número (por defecto, hoy).
+
+    Returns:
+        El número de factura con formato INV-AAAAMMDD-NNNN.
+    """
+    day = day or date.today()
+    insert = dialect_insert(session.get_bind().dialect.name)
+    table = InvoiceCounter.__table__
+    statement = insert(table).values(day=day, last_number=1)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.day],
+        set_={'last_number': table.c.last_number + 1},
+    ).returning(table.c.last_number)
+    number = session.execute(statement).scalar_one()
+    return format_invoice_number(day, number)
+
+
+def seed_invoice_counters(connection, invoice_table):
+    """
+    Inicializa los contadores con el mayor número ya emitido de cada día, para que
+    los números nuevos no choquen con las facturas existentes.
+    """
+    last_numbers = {}
+    for (invoice_number,) in connection.execute(select(invoice_table.c.invoice_number)):
+        match = INVOICE_NUMBER_RE.match(invoice_number or '')
+        if not match:
+            continue
+        day = date(int(match.group(1)[:4]), int(match.group(1)[4:6]), int(match.group(1)[6:]))
+        last_numbers[day] = max(last_numbers.get(day, 0), int(match.group(2)))
+
+    table = InvoiceCounter.__table__
+    insert = dialect_insert(connection.dialect.name)
+    for day, last_number in last_numbers.items():
+        statement = insert(table).values(day=day, last_number=last_number)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=[table.c.day],
+            set_={'last_number': last_number},
+        ))
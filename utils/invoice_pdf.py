@@ -0,0 +1,227 @@
+# utils/invoice_pdf.py
+# Exportación masiva de facturas en PDF.
+# Cada factura se genera con ReportLab (la misma base que utils/pdf_generator.py) y
+# se guarda en instance/invoice_pdfs/ con su id y un hash de su contenido en el
+# nombre: una factura que no cambió no se vuelve a generar, y si cambia, el hash
+# nuevo invalida el archivo anterior. Las que faltan se generan en un pool de
+# procesos y el resultado se entrega como un zip que se va produciendo por partes,
+# sin tener el archivo completo en memoria.
+#
+# ReportLab se importa al generar el primer PDF: el listado de facturas y el zip
+# con PDF ya cacheados no lo cargan.
+
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+# Cambiar este número invalida todos los PDF cacheados (por ejemplo, al cambiar el diseño).
+RENDER_VERSION = 1
+
+COMPANY_LINES = ('MotoShop S.A.', 'Calle Ficticia 123', 'Ciudad, País',
+                 'Tel: +123 456 7890', 'Email: info@motoshop.com')
+
+# Campos de la factura que aparecen en el PDF (y por tanto forman parte del hash).
+INVOICE_FIELDS = ('id', 'invoice_number', 'invoice_date', 'customer_name', 'customer_address',
+                  'customer_email', 'items_description', 'subtotal_amount', 'tax_rate',
+                  'tax_amount', 'total_amount', 'notes')
+
+
+def invoice_fields(invoice):
+    """Los datos de una factura como diccionario simple (se envía a los procesos del pool)."""
+    fields = {name: getattr(invoice, name) for name in INVOICE_FIELDS}
+    fields['invoice_date'] = invoice.invoice_date.isoformat()
+    return fields
+
+
+def content_hash(fields):
+    payload = json.dumps([RENDER_VERSION, fields], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def cached_pdf_path(cache_dir, fields):
+    return os.path.join(cache_dir, f"{fields['id']}-{content_hash(fields)}.pdf")
+
+
+def _text(value):
+    """Escapa el texto libre para el marcado de Paragraph y conserva los saltos de línea."""
+    return escape(value or '').replace('\n', '<br/>')
+
+
+@lru_cache(maxsize=None)
+def _invoice_styles():
+    """Estilos del catálogo más los de la factura, creados una vez por proceso."""
+    from reportlab.lib import colors
+    from reportlab.lib.styles import ParagraphStyle
+
+    from utils.pdf_generator import create_styles
+
+    styles = create_styles()
+    styles.add(ParagraphStyle(name='InvoiceTitle', fontSize=20, leading=24, spaceAfter=6,
+                              fontName='Helvetica-Bold', textColor=colors.HexColor('#2C3E50')))
+    styles.add(ParagraphStyle(name='InvoiceSection', fontSize=12, leading=14, spaceBefore=12,
+                              spaceAfter=4, fontName='Helvetica-Bold'))
+    styles.add(ParagraphStyle(name='InvoiceTotal', fontSize=13, leading=16, alignment=2,
+                              fontName='Helvetica-Bold', textColor=colors.HexColor('#E74C3C')))
+    styles.add(ParagraphStyle(name='InvoiceAmount', fontSize=10, leading=13, alignment=2,
+                              fontName='Helvetica'))
+    return styles
+
+
+def render_invoice_pdf(fields, output_path):
+    """Genera el PDF de una factura (el mismo contenido que invoice_template.html)."""
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, Spacer, Table, TableStyle
+
+    from utils.pdf_generator import new_document
+
+    styles = _invoice_styles()
+    text = styles['MotoDetailText']
+
+    header = Table([[
+        Paragraph('MotoShop', styles['InvoiceTitle']),
+        Paragraph('<br/>'.join(COMPANY_LINES), text),
+    ]], colWidths=[3.75 * inch, 3.75 * inch])
+    header.setStyle(TableStyle([('VALIGN', (0, 0), (-1, -1), 'TOP')]))
+
+    year, month, day = fields['invoice_date'].split('-')
+    Story = [
+        header,
+        Spacer(1, 0.2 * inch),
+        Paragraph('FACTURA', styles['InvoiceTitle']),
+        Paragraph(f"<b>Nº Factura:</b> {_text(fields['invoice_number'])}", text),
+        Paragraph(f"<b>Fecha:</b> {day}-{month}-{year}", text),
+        Paragraph('Facturar a:', styles['InvoiceSection']),
+        Paragraph(f"<b>{_text(fields['customer_name'])}</b>", text),
+    ]
+    if fields['customer_address']:
+        Story.append(Paragraph(_text(fields['customer_address']), text))
+    if fields['customer_email']:
+        Story.append(Paragraph(_text(fields['customer_email']), text))
+
+    Story += [
+        Paragraph('Detalle de Artículos:', styles['InvoiceSection']),
+        Paragraph(_text(fields['items_description']), text),
+        Spacer(1, 0.2 * inch),
+        Paragraph(f"Subtotal: <b>${fields['subtotal_amount']:,.2f}</b>", styles['InvoiceAmount']),
+        Paragraph(f"Impuesto ({fields['tax_rate'] * 100:g}%): <b>${fields['tax_amount']:,.2f}</b>",
+                  styles['InvoiceAmount']),
+        Paragraph(f"TOTAL: ${fields['total_amount']:,.2f}", styles['InvoiceTotal']),
+    ]
+    if fields['notes']:
+        Story += [Paragraph('Notas:', styles['InvoiceSection']), Paragraph(_text(fields['notes']), text)]
+    Story += [
+        Spacer(1, 0.4 * inch),
+        Paragraph('Gracias por su compra.<br/>MotoShop - Su tienda de confianza.', styles['SubtitleStyle']),
+    ]
+
+    # Se escribe en un archivo temporal y se renombra: un lector nunca ve un PDF a medias.
+    tmp_path = f'{output_path}.{uuid.uuid4().hex}.tmp'
+    new_document(tmp_path).build(Story)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+def _render_job(job):
+    fields, output_path = job
+    return render_invoice_pdf(fields, output_path)
+
+
+def _remove_stale_versions(cache_dir, fields, keep):
+    """Elimina los PDF de versiones anteriores de la misma factura."""
+    prefix = f"{fields['id']}-"
+    for filename in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, filename)
+        if filename.startswith(prefix) and filename.endswith('.pdf') and path != keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def iter_invoice_pdfs(all_fields, cache_dir, workers=None, stats=None):
+    """
+    Genera (campos, ruta del PDF) para cada factura, en el orden recibido.
+    Los PDF cacheados se devuelven de inmediato; los que faltan se generan en un
+    pool de procesos (o en este proceso si workers <= 1).
+
+    Args:
+        stats: Diccionario opcional donde se anotan 'cached' y 'rendered'.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    stats = stats if stats is not None else {}
+    stats.setdefault('cached', 0)
+    stats.setdefault('rendered', 0)
+
+    paths = [cached_pdf_path(cache_dir, fields) for fields in all_fields]
+    missing = [(fields, path) for fields, path in zip(all_fields, paths) if not os.path.exists(path)]
+
+    if missing and workers and workers > 1 and len(missing) > 1:
+        # 'spawn' por el mismo motivo que en pdf_generator: el proceso web tiene hilos.
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(missing)),
+                                   mp_context=multiprocessing.get_context('spawn'))
+        rendered = pool.map(_render_job, missing, chunksize=8)
+    else:
+        pool = None
+        rendered = map(_render_job, missing)
+
+    try:
+        missing_paths = {path for _, path in missing}
+        for fields, path in zip(all_fields, paths):
+            if path in missing_paths:
+                # El pool devuelve los resultados en el mismo orden en que se enviaron.
+                next(rendered)
+                _remove_stale_versions(cache_dir, fields, keep=path)
+                stats['rendered'] += 1
+            else:
+                stats['cached'] += 1
+            yield fields, path
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+class _ZipChunks:
+    """Destino de escritura para ZipFile que acumula los bytes hasta que se recogen."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def collect(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_invoice_zip(all_fields, cache_dir, workers=None, stats=None):
+    """
+    Produce el zip con los PDF de las facturas por partes (una por factura).
+    Los PDF ya están comprimidos, así que se guardan sin volver a comprimir.
+    Al terminar, stats incluye 'count', 'seconds' y 'per_second'.
+    """
+    stats = stats if stats is not None else {}
+    started = time.perf_counter()
+    sink = _ZipChunks()
+    count = 0
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for fields, path in iter_invoice_pdfs(all_fields, cache_dir, workers, stats):
+            archive.write(path, arcname=f"{fields['invoice_number']}.pdf")
+            count += 1
+            yield sink.collect()
+    yield sink.collect()
+
+    elapsed = time.perf_counter() - started
+    stats.update(count=count, seconds=elapsed, per_second=count / elapsed if elapsed else 0.0)
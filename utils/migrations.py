@@ -0,0 +1,119 @@
+# utils/migrations.py
+# Ejecutor de migraciones versionadas del esquema de la base de datos.
+# db.create_all() sólo crea tablas nuevas: no añade índices ni columnas a tablas
+# que ya existen. Las migraciones de esta lista se aplican una única vez, en orden,
+# y la versión aplicada se guarda en la tabla 'schema_version', de modo que una
+# base de datos de producción existente (motos.db) se actualiza sin reconstruirla.
+
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateIndex
+
+from models import Moto, Invoice
+from utils.search import create_search_index, fill_customer_search
+from utils.invoice_numbers import seed_invoice_counters
+from utils.rollups import rebuild_rollups
+
+
+def _create_indexes(connection, table, names):
+    """Crea los índices indicados de una tabla si todavía no existen."""
+    # IF NOT EXISTS en lugar de checkfirst: la inspección no detecta los índices
+    # sobre expresiones (como lower(customer_name)) y volvería a crearlos.
+    for index in table.indexes:
+        if index.name in names:
+            connection.execute(CreateIndex(index, if_not_exists=True))
+
+
+def _migration_0001_catalog_indexes(connection):
+    _create_indexes(connection, Moto.__table__,
+                    {'ix_moto_marca_modelo', 'ix_moto_anio_id', 'ix_moto_precio_id'})
+    _create_indexes(connection, Invoice.__table__, {'ix_invoice_invoice_date_id'})
+
+
+def _migration_0002_search_index(connection):
+    create_search_index(connection)
+
+
+def _migration_0003_image_references(connection):
+    _create_indexes(connection, Moto.__table__, {'ix_moto_imagen_url'})
+
+
+def _migration_0004_invoice_filters(connection):
+    _create_indexes(connection, Invoice.__table__, {'ix_invoice_customer_name_lower'})
+
+
+def _migration_0005_invoice_counters(connection):
+    # La tabla 'invoice_counter' la crea create_all(); aquí sólo se inicializa.
+    seed_invoice_counters(connection, Invoice.__table__)
+
+
+def _migration_0006_invoice_rollups(connection):
+    # La tabla 'invoice_daily_rollup' la crea create_all(); aquí se calcula el histórico.
+    rebuild_rollups(connection)
+
+
+def _migration_0007_invoice_customer_search(connection):
+    # Filtro por cliente sin distinguir acentos: lower() de SQLite sólo convierte ASCII,
+    # así que el índice de la migración 0004 se sustituye por una columna normalizada.
+    columns = {column['name'] for column in inspect(connection).get_columns('invoice')}
+    if 'customer_name_search' not in columns:
+        connection.execute(text("ALTER TABLE invoice ADD COLUMN customer_name_search VARCHAR(150)"))
+    fill_customer_search(connection)
+    _create_indexes(connection, Invoice.__table__, {'ix_invoice_customer_name_search'})
+    connection.execute(text("DROP INDEX IF EXISTS ix_invoice_customer_name_lower"))
+
+
+# Lista ordenada de migraciones: (versión, descripción, función).
+# Nunca se modifica una migración ya publicada; los cambios nuevos van al final.
+MIGRATIONS = [
+    (1, 'Índices del catálogo de motos y del listado de facturas', _migration_0001_catalog_indexes),
+    (2, 'Índice de texto completo para la búsqueda del catálogo', _migration_0002_search_index),
+    (3, 'Índice de imagen_url para el conteo de referencias de imágenes', _migration_0003_image_references),
+    (4, 'Índice por nombre de cliente para los filtros del listado de facturas', _migration_0004_invoice_filters),
+    (5, 'Contadores diarios para la numeración de facturas', _migration_0005_invoice_counters),
+    (6, 'Agregados diarios de facturación para los informes', _migration_0006_invoice_rollups),
+    (7, 'Nombre de cliente normalizado para el filtro de facturas', _migration_0007_invoice_customer_search),
+]
+
+
+def current_version(connection):
+    """Devuelve la última versión de esquema aplicada (0 si no hay ninguna)."""
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version INTEGER PRIMARY KEY, description VARCHAR(200) NOT NULL)"
+    ))
+    return connection.execute(text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+
+
+def run_migrations(db_instance):
+    """
+    Crea las tablas que falten y aplica las migraciones pendientes.
+    Cada migración se ejecuta en su propia transacción junto con el registro de su versión.
+
+    Returns:
+        La lista de versiones aplicadas en esta ejecución.
+    """
+    db_instance.create_all()
+
+    with db_instance.engine.begin() as connection:
+        version = current_version(connection)
+
+    applied = []
+    for number, description, migration in MIGRATIONS:
+        if number <= version:
+            continue
+        with db_instance.engine.begin() as connection:
+            migration(connection)
+            connection.execute(
+                text("INSERT INTO schema_version (version, description) VALUES (:version, :description)"),
+                {'version': number, 'description': description}
+            )
+        print(f"Migración {number:04d} aplicada: {description}")
+        applied.append(number)
+    return applied
+
+
+def pending_migrations(db_instance):
+    """Devuelve las migraciones que aún no se aplicaron a la base de datos."""
+    with db_instance.engine.begin() as connection:
+        version = current_version(connection)
+    return [(number, description) for number, description, _ in MIGRATIONS if number > version]
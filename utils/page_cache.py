@@ -0,0 +1,257 @@
+# utils/page_cache.py
+# Caché de páginas renderizadas para la parte pública de la tienda.
+# Guarda el HTML de las respuestas anónimas (inicio, catálogo, detalle) y lo
+# sirve sin tocar la base de datos ni Jinja. Las entradas se agrupan por
+# "espacio de nombres" ('listing' para los listados y 'moto-<id>' para cada
+# detalle) y se purgan con precisión cuando el panel de administración modifica
+# una moto (señal 'catalog_changed').
+#
+# Backends disponibles (configuración PAGE_CACHE_BACKEND):
+#   - 'memory': LRU con TTL en la memoria de cada proceso.
+#   - 'filesystem': archivos en PAGE_CACHE_DIR, compartidos entre workers de gunicorn.
+#   - None: caché desactivada.
+#
+# /metrics/page-cache publica los contadores de la caché; como el resto del panel,
+# exige sesión de administrador (o METRICS_TOKEN / METRICS_ALLOWED_IPS, ver config.py).
+
+import hashlib
+import os
+import pickle
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import current_app, make_response, request, session
+
+from extensions import metrics_access_required
+from utils.catalog_revision import catalog_changed, get_catalog_revision
+from utils.read_replica import read_from_primary
+
+
+class CachedPage:
+    """Respuesta almacenada en la caché (sólo lo necesario para reconstruirla)."""
+    __slots__ = ('body', 'status', 'headers', 'revision', 'expires')
+
+    def __init__(self, body, status, headers, revision, expires):
+        self.body = body
+        self.status = status
+        self.headers = headers
+        self.revision = revision
+        self.expires = expires
+
+
+class MemoryLRUBackend:
+    """LRU en memoria con expiración por TTL. No se comparte entre procesos."""
+    shared = False
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, namespace, key):
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None:
+                return None
+            if entry.expires < time.time():
+                del self._entries[(namespace, key)]
+                return None
+            self._entries.move_to_end((namespace, key))
+            return entry
+
+    def set(self, namespace, key, entry):
+        with self._lock:
+            self._entries[(namespace, key)] = entry
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def purge(self, namespace):
+        with self._lock:
+            for cache_key in [k for k in self._entries if k[0] == namespace]:
+                del self._entries[cache_key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class FileSystemBackend:
+    """
+    Caché en disco compartida por todos los workers de la máquina.
+    Cada espacio de nombres es un directorio, así que purgarlo es borrar la carpeta.
+    """
+    shared = True
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, namespace, key):
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, namespace, f'{digest}.cache')
+
+    def get(self, namespace, key):
+        path = self._path(namespace, key)
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+        if entry.expires < time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return entry
+
+    def set(self, namespace, key, entry):
+        path = self._path(namespace, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def purge(self, namespace):
+        shutil.rmtree(os.path.join(self.directory, namespace), ignore_errors=True)
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class PageCache:
+    """
+    Extensión de Flask que cachea vistas públicas mediante el decorador @cached.
+    Se configura con PAGE_CACHE_BACKEND, PAGE_CACHE_TTL, PAGE_CACHE_MAX_ENTRIES y
+    PAGE_CACHE_DIR.
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.ttl = 300
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'bypasses': 0, 'purges': 0}
+        self._stats_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PAGE_CACHE_BACKEND', 'memory')
+        app.config.setdefault('PAGE_CACHE_TTL', 300)
+        app.config.setdefault('PAGE_CACHE_MAX_ENTRIES', 512)
+        app.config.setdefault('PAGE_CACHE_DIR', os.path.join(app.instance_path, 'page_cache'))
+
+        backend_name = app.config['PAGE_CACHE_BACKEND']
+        # Con create_app() puede haber varias aplicaciones: no se hereda el backend de otra.
+        self.backend = None
+        if backend_name == 'memory':
+            self.backend = MemoryLRUBackend(app.config['PAGE_CACHE_MAX_ENTRIES'])
+        elif backend_name == 'filesystem':
+            self.backend = FileSystemBackend(app.config['PAGE_CACHE_DIR'])
+        elif backend_name:
+            raise ValueError(f"PAGE_CACHE_BACKEND desconocido: {backend_name!r}")
+        self.ttl = app.config['PAGE_CACHE_TTL']
+
+        app.extensions['page_cache'] = self
+        catalog_changed.connect(self._on_catalog_changed, sender=app, weak=False)
+        app.add_url_rule('/metrics/page-cache', 'page_cache_metrics', metrics_access_required(self.metrics_view))
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def _on_catalog_changed(self, sender, moto_ids=(), **extra):
+        """Purga los listados y el detalle de cada moto modificada."""
+        if self.backend is None:
+            return
+        self.backend.purge('listing')
+        for moto_id in moto_ids:
+            self.backend.purge(f'moto-{moto_id}')
+        self._count('purges')
+
+    @staticmethod
+    def make_key(query_params):
+        """
+        Clave = ruta + parámetros de consulta normalizados: sólo los parámetros
+        que la vista usa, sin valores vacíos y en orden alfabético, para que
+        '?page=2&brand_filter=' y '?page=2' compartan entrada.
+        """
+        items = sorted((name, request.args.get(name, '').strip()) for name in query_params)
+        normalized = urlencode([(name, value) for name, value in items if value])
+        return f'{request.path}?{normalized}'
+
+    @staticmethod
+    def _is_cacheable_request():
+        # Sólo visitantes anónimos y sin mensajes flash pendientes de mostrar.
+        if request.method != 'GET':
+            return False
+        return not session.get('logged_in') and not session.get('_flashes')
+
+    def cached(self, namespace, query_params=()):
+        """
+        Decorador para cachear una vista pública.
+
+        Args:
+            namespace: Nombre del grupo de entradas, o una función que lo calcula a
+                partir de los argumentos de la vista (p. ej. lambda moto_id: f'moto-{moto_id}').
+            query_params: Parámetros de la URL que afectan a la respuesta.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if self.backend is None or not self._is_cacheable_request():
+                    if self.backend is not None:
+                        self._count('bypasses')
+                    return view(*args, **kwargs)
+
+                name = namespace(**kwargs) if callable(namespace) else namespace
+                key = self.make_key(query_params)
+                revision = get_catalog_revision(current_app)
+
+                entry = self.backend.get(name, key)
+                # Un backend no compartido no recibe las purgas de otros workers:
+                # sus entradas sólo valen para la revisión con la que se generaron.
+                if entry is not None and (self.backend.shared or entry.revision == revision):
+                    self._count('hits')
+                    response = current_app.response_class(entry.body, status=entry.status,
+                                                          headers=entry.headers)
+                    response.headers['X-Cache'] = 'HIT'
+                    return response
+
+                self._count('misses')
+                # Se guardará con la revisión actual: se renderiza desde la base de datos principal.
+                read_from_primary()
+                response = make_response(view(*args, **kwargs))
+                # No se guarda si el catálogo cambió mientras se renderizaba la página.
+                if (response.status_code == 200 and not response.direct_passthrough
+                        and 'Set-Cookie' not in response.headers
+                        and get_catalog_revision(current_app) == revision):
+                    headers = [(k, v) for k, v in response.headers.items()
+                               if k not in ('Content-Length', 'Vary')]
+                    self.backend.set(name, key, CachedPage(response.get_data(), response.status_code,
+                                                          headers, revision, time.time() + self.ttl))
+                    self._count('stores')
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return wrapper
+        return decorator
+
+    def metrics_view(self):
+        """Contadores de la caché en formato de texto de Prometheus (por proceso)."""
+        lines = [
+            '# HELP motoshop_page_cache_events_total Eventos de la caché de páginas.',
+            '# TYPE motoshop_page_cache_events_total counter',
+        ]
+        pid = os.getpid()
+        with self._stats_lock:
+            for event_name, value in self.stats.items():
+                lines.append(f'motoshop_page_cache_events_total{{event="{event_name}",pid="{pid}"}} {value}')
+        return current_app.response_class('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+
+# Instancia compartida, inicializada en app.py con page_cache.init_app(app).
+page_cache = PageCache()
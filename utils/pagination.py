@@ -0,0 +1,105 @@
+# utils/pagination.py
+# Funciones auxiliares para paginar consultas directamente en la base de datos.
+# Ofrece dos modos: paginación clásica por páginas (LIMIT/OFFSET) y paginación
+# por cursor (keyset / "seek"), que no degrada su rendimiento en páginas profundas.
+
+import base64
+import json
+import math
+
+from sqlalchemy import tuple_
+
+
+def paginate_offset(query, page, per_page):
+    """
+    Cuenta y obtiene sólo la página solicitada de una consulta usando LIMIT/OFFSET.
+
+    Args:
+        query: Consulta de SQLAlchemy ya filtrada y ordenada.
+        page: Número de página solicitado (se ajusta al rango válido).
+        per_page: Cantidad de elementos por página.
+
+    Returns:
+        Una tupla (items, page, total, total_pages).
+    """
+    # El COUNT se hace sin ORDER BY: el orden no cambia el total y sólo encarece la consulta.
+    total = query.order_by(None).count()
+    total_pages = math.ceil(total / per_page)
+
+    if page < 1:
+        page = 1
+    elif page > total_pages and total_pages > 0:
+        page = total_pages
+    elif total_pages == 0:
+        page = 1
+
+    items = query.limit(per_page).offset((page - 1) * per_page).all()
+    return items, page, total, total_pages
+
+
+def paginate_keyset(query, columns, descending, cursor, per_page):
+    """
+    Obtiene la siguiente "ventana" de resultados a partir de un cursor (keyset).
+
+    En lugar de saltar N filas con OFFSET, filtra por las filas que van después
+    de la última fila vista según (columna de orden, id), por lo que el coste es
+    proporcional al tamaño de la página y no a la profundidad.
+
+    Args:
+        query: Consulta de SQLAlchemy ya filtrada (sin ORDER BY).
+        columns: Columnas de orden; la última debe ser única (normalmente el id).
+        descending: True si el orden es descendente.
+        cursor: Lista de valores de la última fila vista, o None para empezar.
+        per_page: Cantidad de elementos por página.
+
+    Returns:
+        Una tupla (items, next_values). next_values es None si no hay más filas.
+    """
+    # Se pide una fila extra para saber si existe una página siguiente sin hacer COUNT.
+    rows = keyset_query(query, columns, descending, cursor, per_page + 1).all()
+
+    items = rows[:per_page]
+    next_values = None
+    if len(rows) > per_page:
+        last_item = items[-1]
+        next_values = [getattr(last_item, col.key) for col in columns]
+    return items, next_values
+
+
+def keyset_query(query, columns, descending, cursor, limit):
+    """
+    Añade a la consulta el filtro "después del cursor", el orden y el LIMIT del
+    modo keyset, sin ejecutarla.
+    """
+    key = tuple_(*columns) if len(columns) > 1 else columns[0]
+    if cursor:
+        last = tuple_(*cursor) if len(columns) > 1 else cursor[0]
+        query = query.filter(key < last if descending else key > last)
+
+    order = [col.desc() if descending else col.asc() for col in columns]
+    return query.order_by(*order).limit(limit)
+
+
+def encode_cursor(values):
+    """Codifica los valores de un cursor keyset como un token opaco apto para URLs."""
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, expected_length):
+    """
+    Decodifica un token de cursor. Devuelve None si el token es inválido
+    (por ejemplo, manipulado a mano o generado para otro orden).
+    """
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != expected_length:
+        return None
+    if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+        return None
+    return values
@@ -0,0 +1,147 @@
+# utils/pdf_cache.py
+# Caché en disco del catálogo PDF.
+# El PDF terminado se guarda en instance/pdf_cache/ con la revisión del catálogo
+# en el nombre y se sirve directamente desde el archivo (con soporte de Range)
+# mientras el inventario no cambie. Cuando el panel modifica una moto, la revisión
+# cambia, el archivo deja de ser válido y se reconstruye en un hilo en segundo
+# plano: ninguna petición espera a que ReportLab genere el documento.
+# ReportLab (utils/pdf_generator.py) se importa al generar el primer PDF, no al
+# arrancar cada worker.
+
+import os
+import threading
+import time
+
+from extensions import db
+from utils.catalog_revision import catalog_changed, get_catalog_revision
+
+# Si un archivo de bloqueo es más antiguo que esto, se asume que su proceso murió.
+STALE_LOCK_SECONDS = 600
+
+
+class PdfCatalogCache:
+    """Extensión que mantiene el PDF del catálogo pre-generado para la revisión actual."""
+
+    def __init__(self, app=None):
+        self.app = None
+        self._thread = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.config.setdefault('PDF_CACHE_DIR', os.path.join(app.instance_path, 'pdf_cache'))
+        # Procesos para generar las secciones de marca en paralelo. Por defecto 1 (en el
+        # propio hilo): arrancar el pool cuesta 2-3 s fijos y sólo compensa con catálogos
+        # grandes (ver benchmark_pdf_export.py).
+        app.config.setdefault('PDF_EXPORT_WORKERS', 1)
+        app.extensions['pdf_catalog_cache'] = self
+        # Cada cambio del catálogo deja obsoleto el PDF: se reconstruye en segundo plano.
+        catalog_changed.connect(self._on_catalog_changed, sender=app, weak=False)
+
+    @property
+    def directory(self):
+        return self.app.config['PDF_CACHE_DIR']
+
+    def _path_for(self, revision):
+        return os.path.join(self.directory, f'catalogo-{revision}.pdf')
+
+    def current_path(self):
+        """Ruta del PDF de la revisión actual, o None si todavía no está generado."""
+        path = self._path_for(get_catalog_revision(self.app))
+        return path if os.path.exists(path) else None
+
+    def _on_catalog_changed(self, sender, **extra):
+        self.schedule_rebuild()
+
+    def schedule_rebuild(self):
+        """Lanza la reconstrucción en un hilo si no hay otra en curso en este proceso."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._thread = threading.Thread(target=self._rebuild_in_background,
+                                            name='pdf-catalog-rebuild', daemon=True)
+            self._thread.start()
+            return True
+
+    def _rebuild_in_background(self):
+        try:
+            with self.app.app_context():
+                self.rebuild()
+        except Exception as e:
+            print(f"Error al regenerar el PDF del catálogo en segundo plano: {e}")
+
+    def rebuild(self):
+        """
+        Genera el PDF de la revisión actual si aún no existe. Un archivo de bloqueo
+        evita que varios workers de gunicorn lo generen a la vez.
+
+        Returns:
+            La ruta del PDF, o None si otro proceso lo está generando.
+        """
+        revision = get_catalog_revision(self.app)
+        path = self._path_for(revision)
+        if os.path.exists(path):
+            return path
+
+        os.makedirs(self.directory, exist_ok=True)
+        lock_path = os.path.join(self.directory, '.building')
+        if not self._acquire_lock(lock_path):
+            return None
+        try:
+            from utils.pdf_generator import write_pdf_motos, write_pdf_motos_parallel
+
+            started = time.perf_counter()
+            # El PDF se escribe directamente a disco, sin pasar por un buffer en memoria.
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            workers = self.app.config['PDF_EXPORT_WORKERS']
+            try:
+                if workers > 1:
+                    write_pdf_motos_parallel(self.app, db, tmp_path, workers=workers)
+                else:
+                    write_pdf_motos(self.app, db, tmp_path)
+                os.replace(tmp_path, path)
+            except BaseException:
+                # _remove_old_files() sólo borra *.pdf: un temporal a medias quedaría para siempre.
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            print(f"PDF del catálogo generado ({revision}) en {time.perf_counter() - started:.2f}s")
+            self._remove_old_files(keep=path)
+        finally:
+            os.remove(lock_path)
+
+        # Si el catálogo cambió durante la generación, se vuelve a empezar.
+        if get_catalog_revision(self.app) != revision:
+            return self.rebuild()
+        return path
+
+    @staticmethod
+    def _acquire_lock(lock_path):
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - os.stat(lock_path).st_mtime < STALE_LOCK_SECONDS:
+                    return False
+                os.remove(lock_path)
+            except FileNotFoundError:
+                pass
+            return PdfCatalogCache._acquire_lock(lock_path)
+        with os.fdopen(fd, 'w') as f:
+            f.write(str(os.getpid()))
+        return True
+
+    def _remove_old_files(self, keep):
+        for filename in os.listdir(self.directory):
+            path = os.path.join(self.directory, filename)
+            if filename.startswith('catalogo-') and filename.endswith('.pdf') and path != keep:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+# Instancia compartida, inicializada en app.py con pdf_catalog_cache.init_app(app).
+pdf_catalog_cache = PdfCatalogCache()
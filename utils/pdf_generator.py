@@ -1,8 +1,21 @@
 # utils/pdf_generator.py
 # Contiene la lógica para generar el catálogo de motos en formato PDF.
+# Hay dos modos de generación:
+#   - write_pdf_motos(): todo el documento en este proceso (export_pdf_motos() lo
+#     devuelve en un BytesIO).
+#   - write_pdf_motos_parallel(): cada sección de marca se genera en un pool de
+#     procesos y las partes se concatenan en un único archivo en disco, así el
+#     trabajo se reparte entre núcleos y ningún proceso tiene el catálogo entero
+#     como Story de ReportLab en memoria.
 
+import multiprocessing
 import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from io import BytesIO
+from itertools import groupby
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
@@ -12,38 +25,19 @@ from reportlab.lib.pagesizes import letter
 # Importa el modelo Moto para hacer consultas.
 # La instancia de db se pasa como argumento desde el blueprint.
 from models import Moto
+from utils.images import pdf_thumbnail
 
-def export_pdf_motos(app_instance, db_instance):
-    """
-    Genera un documento PDF del catálogo de motos, ordenado por marca,
-    e incluye detalles e imágenes para cada moto.
-
-    Args:
-        app_instance: La instancia de la aplicación Flask (current_app).
-        db_instance: La instancia de SQLAlchemy (db).
+# Dimensiones de la imagen en la tabla.
+IMG_WIDTH = 1.0 * inch
+IMG_HEIGHT = 0.75 * inch
 
-    Returns:
-        Un objeto BytesIO que contiene el PDF generado.
-    """
-    # Se requiere un contexto de aplicación para acceder a la base de datos.
-    # El blueprint pasa 'current_app' y 'db', por lo que podemos usarlos aquí.
-    with app_instance.app_context():
-        motos = db_instance.session.query(Moto).order_by(Moto.marca, Moto.modelo).all()
+# En el modo paralelo, las marcas con más motos que esto se reparten en varias partes
+# para que el trabajo se equilibre entre procesos y cada uno use poca memoria.
+SECTION_MAX_ROWS = 500
 
-    # Agrupa las motos por marca para una mejor organización en el PDF.
-    motos_by_brand = {}
-    for moto in motos:
-        if moto.marca not in motos_by_brand:
-            motos_by_brand[moto.marca] = []
-        motos_by_brand[moto.marca].append(moto)
 
-    # Crea un buffer en memoria para almacenar el PDF generado.
-    buffer = BytesIO()
-    # Define las propiedades del documento PDF (tamaño de página, márgenes).
-    doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=inch/2, leftMargin=inch/2, topMargin=inch/2, bottomMargin=inch/2)
-    
-    # Lista para almacenar los elementos del Story (contenido del PDF).
-    Story = []
+def create_styles():
+    """Hoja de estilos del catálogo (los de ReportLab más los propios), nueva y modificable."""
     # Obtiene los estilos de párrafo predefinidos de ReportLab.
     styles = getSampleStyleSheet()
 
@@ -90,117 +84,260 @@ def export_pdf_motos(app_instance, db_instance):
                              spaceAfter=8,
                              fontName='Helvetica-Oblique',
                              textColor=colors.HexColor('#34495E'))) # Gris oscuro para la descripción
+    return styles
+
 
-    # --- Construcción del Contenido del PDF ---
+@lru_cache(maxsize=None)
+def build_styles():
+    """
+    Hoja de estilos compartida, creada una sola vez por proceso (cada sección del
+    catálogo y cada factura la reutilizan). No debe modificarse: para añadir estilos,
+    partir de create_styles().
+    """
+    return create_styles()
 
-    # Título principal del catálogo
-    Story.append(Paragraph("Catálogo Completo de Motocicletas", styles['TitleStyle']))
-    Story.append(Paragraph("Presentado por MotoShop - Su fuente de pasión sobre ruedas", styles['SubtitleStyle']))
-    Story.append(Spacer(1, 0.3 * inch)) # Espacio vertical
 
-    # Itera sobre cada marca de motos (ordenadas alfabéticamente)
-    for brand in sorted(motos_by_brand.keys()):
-        Story.append(Paragraph(f"Marca: {brand}", styles['BrandHeader'])) # Encabezado para la marca
-        Story.append(Spacer(1, 0.1 * inch))
-
-        # Define los anchos de las columnas para la tabla de motos.
-        # Imagen, Moto (Marca/Modelo/Año), Precio, Descripción
-        col_widths = [1.2 * inch, 2.0 * inch, 0.8 * inch, 2.5 * inch]
-
-        # Define los encabezados de la tabla.
-        table_headers = [
-            Paragraph("Imagen", styles['MotoDetailHeader']),
-            Paragraph("Moto (Marca / Modelo / Año)", styles['MotoDetailHeader']),
-            Paragraph("Precio", styles['MotoDetailHeader']),
-            Paragraph("Descripción", styles['MotoDetailHeader'])
-        ]
-        data = [table_headers] # La primera fila de la tabla son los encabezados.
-
-        # Itera sobre cada moto dentro de la marca actual.
-        for moto in motos_by_brand[brand]:
-            img_element = "" # Elemento de imagen para la celda de la tabla
-            # Construye la ruta absoluta de la imagen.
-            image_absolute_path = os.path.join(app_instance.root_path, 'static', moto.imagen_url) if moto.imagen_url else ''
-            
-            # Dimensiones deseadas para la imagen en la tabla.
-            img_width = 1.0 * inch
-            img_height = 0.75 * inch
-
-            # Intenta cargar la imagen si la URL existe y el archivo es accesible.
-            if moto.imagen_url and os.path.exists(image_absolute_path):
-                try:
-                    # Crea un objeto Image de ReportLab.
-                    img = Image(image_absolute_path, img_width, img_height)
-                    img_element = img
-                except Exception as e:
-                    # En caso de error al cargar la imagen, muestra un texto.
-                    print(f"Error al cargar imagen para PDF '{image_absolute_path}': {e}")
-                    img_element = Paragraph("<i>No image found</i>", styles['MotoDetailText'])
-            else:
-                # Si no hay imagen o el archivo no existe, usa una imagen de placeholder.
-                placeholder_path = os.path.join(app_instance.root_path, 'static', 'images', 'placeholder.jpg')
-                if os.path.exists(placeholder_path):
-                    try:
-                        img = Image(placeholder_path, img_width, img_height)
-                        img_element = img
-                    except Exception as e:
-                        print(f"Error al cargar placeholder para PDF '{placeholder_path}': {e}")
-                        img_element = Paragraph("<i>No image</i>", styles['MotoDetailText'])
-                else:
-                    img_element = Paragraph("<i>No image</i>", styles['MotoDetailText'])
-
-            # Construye el contenido de las celdas de la tabla para cada moto.
-            moto_info = Paragraph(
-                f"<b>{moto.marca}</b><br/>" # Marca en negrita
-                f"{moto.modelo}<br/>"       # Modelo
-                f"Año: {moto.año}",         # Año
-                styles['MotoDetailText']
-            )
-
-            precio_info = Paragraph(f"${moto.precio:,.2f}", styles['MotoDetailText']) # Precio formateado
-
-            desc_info = Paragraph(moto.descripcion if moto.descripcion else "Sin descripción.", styles['DescriptionStyle'])
-            
-            # Añade la fila de datos de la moto a la tabla.
-            data.append([
-                img_element,
-                moto_info,
-                precio_info,
-                desc_info
-            ])
-
-        # Crea el objeto Table con los datos y anchos de columna definidos.
-        table = Table(data, colWidths=col_widths)
+def new_document(output):
+    """Define las propiedades del documento PDF (tamaño de página, márgenes)."""
+    return SimpleDocTemplate(output, pagesize=letter, rightMargin=inch/2, leftMargin=inch/2, topMargin=inch/2, bottomMargin=inch/2)
+
+
+def _title_flowables(styles):
+    """Título principal del catálogo."""
+    return [
+        Paragraph("Catálogo Completo de Motocicletas", styles['TitleStyle']),
+        Paragraph("Presentado por MotoShop - Su fuente de pasión sobre ruedas", styles['SubtitleStyle']),
+        Spacer(1, 0.3 * inch), # Espacio vertical
+    ]
+
+
+class _ImageResolver:
+    """
+    Devuelve el elemento de la celda de imagen de cada moto. Usa las miniaturas
+    cacheadas (300x225 px) en lugar del original a resolución completa: el PDF sólo
+    las dibuja a 1.0 x 0.75 pulgadas. Cada original se resuelve una sola vez.
+    """
+
+    def __init__(self, static_folder, thumbnail_dir, styles):
+        self.static_folder = static_folder
+        self.thumbnail_dir = thumbnail_dir
+        self.styles = styles
+        # Miniaturas ya resueltas: ruta del original -> miniatura (o None).
+        self._paths = {}
+        # El placeholder se resuelve una sola vez, no en cada fila.
+        self.placeholder_path = pdf_thumbnail(os.path.join(static_folder, 'images', 'placeholder.jpg'), thumbnail_dir)
+
+    def __call__(self, imagen_url):
+        thumbnail_path = None
+        if imagen_url:
+            source_path = os.path.join(self.static_folder, imagen_url)
+            if source_path not in self._paths:
+                self._paths[source_path] = pdf_thumbnail(source_path, self.thumbnail_dir)
+            thumbnail_path = self._paths[source_path]
+
+        if thumbnail_path:
+            try:
+                return Image(thumbnail_path, IMG_WIDTH, IMG_HEIGHT)
+            except Exception as e:
+                # En caso de error al cargar la imagen, muestra un texto.
+                print(f"Error al cargar imagen para PDF '{thumbnail_path}': {e}")
+                return Paragraph("<i>No image found</i>", self.styles['MotoDetailText'])
+        if self.placeholder_path:
+            # Si no hay imagen o el archivo no existe, usa la imagen de placeholder.
+            return Image(self.placeholder_path, IMG_WIDTH, IMG_HEIGHT)
+        return Paragraph("<i>No image</i>", self.styles['MotoDetailText'])
+
+
+def _brand_flowables(brand, rows, styles, resolve_image, continued=False):
+    """
+    Encabezado y tabla de una marca.
+
+    Args:
+        rows: Tuplas (marca, modelo, año, precio, descripcion, imagen_url).
+        continued: True si es la continuación de una marca repartida en varias partes.
+    """
+    title = f"Marca: {brand} (continuación)" if continued else f"Marca: {brand}"
+    Story = [Paragraph(title, styles['BrandHeader']), Spacer(1, 0.1 * inch)] # Encabezado para la marca
+
+    # Define los anchos de las columnas para la tabla de motos.
+    # Imagen, Moto (Marca/Modelo/Año), Precio, Descripción
+    col_widths = [1.2 * inch, 2.0 * inch, 0.8 * inch, 2.5 * inch]
+
+    # Define los encabezados de la tabla.
+    table_headers = [
+        Paragraph("Imagen", styles['MotoDetailHeader']),
+        Paragraph("Moto (Marca / Modelo / Año)", styles['MotoDetailHeader']),
+        Paragraph("Precio", styles['MotoDetailHeader']),
+        Paragraph("Descripción", styles['MotoDetailHeader'])
+    ]
+    data = [table_headers] # La primera fila de la tabla son los encabezados.
+
+    # Itera sobre cada moto dentro de la marca.
+    for marca, modelo, año, precio, descripcion, imagen_url in rows:
+        img_element = resolve_image(imagen_url)
+
+        # Construye el contenido de las celdas de la tabla para cada moto.
+        moto_info = Paragraph(
+            f"<b>{marca}</b><br/>" # Marca en negrita
+            f"{modelo}<br/>"       # Modelo
+            f"Año: {año}",         # Año
+            styles['MotoDetailText']
+        )
+
+        precio_info = Paragraph(f"${precio:,.2f}", styles['MotoDetailText']) # Precio formateado
+
+        desc_info = Paragraph(descripcion if descripcion else "Sin descripción.", styles['DescriptionStyle'])
         
-        # --- Estilo de la Tabla ---
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#3498DB')), # Color de fondo del encabezado
-            ('TEXTCOLOR', (0,0), (-1,0), colors.whitesmoke), # Color del texto del encabezado
-            ('ALIGN', (0,0), (-1,-1), 'CENTER'), # Alineación general del contenido de las celdas
-            ('VALIGN', (0,0), (-1,-1), 'MIDDLE'), # Alineación vertical general
-            ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'), # Fuente del encabezado
-            ('BOTTOMPADDING', (0,0), (-1,0), 12), # Relleno inferior del encabezado
-            ('GRID', (0,0), (-1,-1), 0.5, colors.HexColor('#BDC3C7')), # Bordes de la tabla
-            ('ROWBACKGROUNDS', (0,0), (-1,-1), [colors.HexColor('#FFFFFF'), colors.HexColor('#ECF0F1')]), # Colores de fondo alternos para filas
-            ('LEFTPADDING', (0,0), (-1,-1), 6),
-            ('RIGHTPADDING', (0,0), (-1,-1), 6),
-            ('TOPPADDING', (0,0), (-1,-1), 6),
-            ('BOTTOMPADDING', (0,0), (-1,-1), 6),
-            
-            # Alineaciones específicas para columnas de datos
-            ('ALIGN', (0,1), (0,-1), 'CENTER'), # Imágenes centradas
-            ('ALIGN', (1,1), (1,-1), 'LEFT'),   # Información de la moto a la izquierda
-            ('ALIGN', (2,1), (2,-1), 'RIGHT'),  # Precio a la derecha
-            ('ALIGN', (3,1), (3,-1), 'LEFT'),   # Descripción a la izquierda
-            ('VALIGN', (0,0), (-1,-1), 'TOP'), # Alineación vertical superior para todas las celdas (especialmente importante para descripciones largas)
-        ]))
-        Story.append(table) # Añade la tabla al Story
-        Story.append(Spacer(1, 0.5 * inch)) # Espacio después de cada tabla de marca
-
-    doc.build(Story) # Construye el documento PDF a partir del Story
-    
+        # Añade la fila de datos de la moto a la tabla.
+        data.append([
+            img_element,
+            moto_info,
+            precio_info,
+            desc_info
+        ])
+
+    # Crea el objeto Table con los datos y anchos de columna definidos.
+    table = Table(data, colWidths=col_widths)
+
+    # --- Estilo de la Tabla ---
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#3498DB')), # Color de fondo del encabezado
+        ('TEXTCOLOR', (0,0), (-1,0), colors.whitesmoke), # Color del texto del encabezado
+        ('ALIGN', (0,0), (-1,-1), 'CENTER'), # Alineación general del contenido de las celdas
+        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'), # Alineación vertical general
+        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'), # Fuente del encabezado
+        ('BOTTOMPADDING', (0,0), (-1,0), 12), # Relleno inferior del encabezado
+        ('GRID', (0,0), (-1,-1), 0.5, colors.HexColor('#BDC3C7')), # Bordes de la tabla
+        ('ROWBACKGROUNDS', (0,0), (-1,-1), [colors.HexColor('#FFFFFF'), colors.HexColor('#ECF0F1')]), # Colores de fondo alternos para filas
+        ('LEFTPADDING', (0,0), (-1,-1), 6),
+        ('RIGHTPADDING', (0,0), (-1,-1), 6),
+        ('TOPPADDING', (0,0), (-1,-1), 6),
+        ('BOTTOMPADDING', (0,0), (-1,-1), 6),
+        
+        # Alineaciones específicas para columnas de datos
+        ('ALIGN', (0,1), (0,-1), 'CENTER'), # Imágenes centradas
+        ('ALIGN', (1,1), (1,-1), 'LEFT'),   # Información de la moto a la izquierda
+        ('ALIGN', (2,1), (2,-1), 'RIGHT'),  # Precio a la derecha
+        ('ALIGN', (3,1), (3,-1), 'LEFT'),   # Descripción a la izquierda
+        ('VALIGN', (0,0), (-1,-1), 'TOP'), # Alineación vertical superior para todas las celdas (especialmente importante para descripciones largas)
+    ]))
+    Story.append(table) # Añade la tabla al Story
+    Story.append(Spacer(1, 0.5 * inch)) # Espacio después de cada tabla de marca
+    return Story
+
+
+def _thumbnail_dir(app_instance):
+    return app_instance.config.get('PDF_THUMBNAIL_DIR') or os.path.join(app_instance.instance_path, 'pdf_thumbnails')
+
+
+def _catalog_rows(app_instance, db_instance):
+    """Las motos como tuplas ligeras, ordenadas por marca y modelo."""
+    # Se requiere un contexto de aplicación para acceder a la base de datos.
+    with app_instance.app_context():
+        return db_instance.session.query(
+            Moto.marca, Moto.modelo, Moto.año, Moto.precio, Moto.descripcion, Moto.imagen_url
+        ).order_by(Moto.marca, Moto.modelo).all()
+
+
+def write_pdf_motos(app_instance, db_instance, output):
+    """
+    Genera el catálogo completo en este proceso.
+
+    Args:
+        output: Ruta de archivo u objeto tipo archivo donde se escribe el PDF.
+    """
+    rows = _catalog_rows(app_instance, db_instance)
+    styles = build_styles()
+    resolve_image = _ImageResolver(app_instance.static_folder, _thumbnail_dir(app_instance), styles)
+
+    # Lista para almacenar los elementos del Story (contenido del PDF).
+    Story = _title_flowables(styles)
+    # Itera sobre cada marca de motos (ordenadas alfabéticamente)
+    for brand, brand_rows in groupby(rows, key=lambda row: row[0]):
+        Story.extend(_brand_flowables(brand, list(brand_rows), styles, resolve_image))
+
+    new_document(output).build(Story) # Construye el documento PDF a partir del Story
+
+
+def export_pdf_motos(app_instance, db_instance):
+    """
+    Genera un documento PDF del catálogo de motos, ordenado por marca,
+    e incluye detalles e imágenes para cada moto.
+
+    Args:
+        app_instance: La instancia de la aplicación Flask (current_app).
+        db_instance: La instancia de SQLAlchemy (db).
+
+    Returns:
+        Un objeto BytesIO que contiene el PDF generado.
+    """
+    # Crea un buffer en memoria para almacenar el PDF generado.
+    buffer = BytesIO()
+    write_pdf_motos(app_instance, db_instance, buffer)
+
     # Mueve el puntero del buffer al inicio para que el archivo pueda ser leído.
     buffer.seek(0)
-    
+
     # Devuelve el buffer. La ruta de Flask que llama a esta función se encargará de enviarlo.
-    return buffer
\ No newline at end of file
+    return buffer
+
+
+def _render_section(job):
+    """Genera una parte del catálogo en un proceso del pool y devuelve su ruta."""
+    part_path, brand, rows, static_folder, thumbnail_dir, with_title, continued = job
+    styles = build_styles()
+    Story = _title_flowables(styles) if with_title else []
+    if brand is not None:
+        Story.extend(_brand_flowables(brand, rows, styles,
+                                      _ImageResolver(static_folder, thumbnail_dir, styles), continued))
+    new_document(part_path).build(Story)
+    return part_path
+
+
+def _section_jobs(rows, parts_dir, static_folder, thumbnail_dir):
+    """Reparte el catálogo en partes: una por marca (o varias si la marca es grande)."""
+    jobs = []
+    for brand, brand_rows in groupby(rows, key=lambda row: row[0]):
+        brand_rows = list(brand_rows)
+        for start in range(0, len(brand_rows), SECTION_MAX_ROWS):
+            part_path = os.path.join(parts_dir, f'parte-{len(jobs):05d}.pdf')
+            jobs.append((part_path, brand, brand_rows[start:start + SECTION_MAX_ROWS],
+                         static_folder, thumbnail_dir, not jobs, start > 0))
+    if not jobs:
+        # Catálogo vacío: sólo el título.
+        jobs.append((os.path.join(parts_dir, 'parte-00000.pdf'), None, [], static_folder, thumbnail_dir, True, False))
+    return jobs
+
+
+def write_pdf_motos_parallel(app_instance, db_instance, output_path, workers=None):
+    """
+    Genera el catálogo repartiendo las secciones de marca en un pool de procesos y
+    concatena las partes en output_path. Cada sección empieza en una página nueva.
+
+    Args:
+        output_path: Ruta del archivo PDF a escribir.
+        workers: Cantidad de procesos (por defecto, uno por núcleo).
+    """
+    # pypdf sólo se necesita para concatenar las partes.
+    from pypdf import PdfWriter
+
+    rows = _catalog_rows(app_instance, db_instance)
+    parts_dir = tempfile.mkdtemp(prefix='pdf-parts-', dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        jobs = _section_jobs(rows, parts_dir, app_instance.static_folder, _thumbnail_dir(app_instance))
+        del rows
+        # 'spawn' y no 'fork': el proceso web tiene hilos y conexiones abiertas
+        # que no deben duplicarse en los procesos hijos.
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            part_paths = list(pool.map(_render_section, jobs))
+
+        writer = PdfWriter()
+        for part_path in part_paths:
+            writer.append(part_path)
+        # Las miniaturas repetidas entre partes se guardan una sola vez.
+        writer.compress_identical_objects(remove_identicals=True, remove_orphans=True)
+        with open(output_path, 'wb') as f:
+            writer.write(f)
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
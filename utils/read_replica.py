@@ -0,0 +1,48 @@
+# utils/read_replica.py
+# Réplica de lectura para el catálogo público.
+# Si la configuración define el bind 'replica' (DATABASE_REPLICA_URL, ver config.py),
+# las vistas marcadas con @read_replica leen de ella y así las consultas del catálogo
+# escalan por separado de las escrituras del panel de administración. Sólo se desvían
+# los SELECT: cualquier escritura (flush) sigue yendo a la base de datos principal.
+# Sin réplica configurada todo va a la principal, como siempre.
+#
+# Una respuesta que se guarda en la caché de páginas o recibe un ETag queda marcada
+# como vigente para la revisión actual del catálogo hasta el siguiente cambio; si se
+# renderizara desde una réplica con retraso justo después de una edición, la versión
+# antigua se serviría como actual. Por eso page_cache.cached() (al no encontrar la
+# página) y http_cache.conditional() llaman a read_from_primary() antes de renderizar:
+# la réplica sólo atiende las respuestas que no se cachean ni se validan.
+
+from functools import wraps
+
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql import Select
+
+REPLICA_BIND_KEY = 'replica'
+
+
+class ReplicaRoutingSession(Session):
+    """Sesión de Flask-SQLAlchemy que envía los SELECT de las vistas @read_replica a la réplica."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and isinstance(clause, Select)
+                and has_app_context() and g.get('use_read_replica')):
+            engine = self._db.engines.get(REPLICA_BIND_KEY)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_from_primary():
+    """Hace que el resto de la petición lea de la base de datos principal."""
+    g.use_read_replica = False
+
+
+def read_replica(view):
+    """Decorador para vistas de sólo lectura: sus consultas usan la réplica si existe."""
+    @wraps(view)
+    def decorated_function(*args, **kwargs):
+        g.use_read_replica = True
+        return view(*args, **kwargs)
+    return decorated_function
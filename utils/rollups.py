@@ -0,0 +1,120 @@
+# utils/rollups.py
+# Agregados diarios de facturación (cantidad, subtotal, impuestos y total por día y
+# tasa de impuesto) en la tabla 'invoice_daily_rollup'.
+# Se actualizan de forma incremental con eventos del mapper de Invoice, dentro de la
+# misma transacción que inserta, modifica o borra la factura, así que nunca quedan
+# desfasados respecto de las facturas. Los informes por día, mes o tasa leen sólo
+# estos agregados: su coste depende de la cantidad de días del período, no de la
+# cantidad de facturas. rebuild_rollups() los recalcula desde cero (histórico).
+
+from sqlalchemy import delete, event, func, inspect, select
+
+from models import Invoice, InvoiceDailyRollup
+from utils.upsert import dialect_insert
+
+ROLLUP = InvoiceDailyRollup.__table__
+AMOUNT_COLUMNS = ('subtotal_amount', 'tax_amount', 'total_amount')
+
+# Agrupaciones de los informes: nombre -> (etiqueta, clave de cada fila diaria).
+REPORT_GROUPS = {
+    'day': ('Día', lambda row: row.day.isoformat()),
+    'month': ('Mes', lambda row: row.day.strftime('%Y-%m')),
+    'tax_rate': ('Tasa de impuesto', lambda row: row.tax_rate),
+}
+
+
+def _apply(connection, day, tax_rate, count, subtotal, tax, total):
+    """Suma (o resta, con valores negativos) una factura al agregado de su día y tasa."""
+    insert = dialect_insert(connection.dialect.name)
+    statement = insert(ROLLUP).values(day=day, tax_rate=tax_rate, invoice_count=count,
+                                      subtotal_amount=subtotal, tax_amount=tax, total_amount=total)
+    statement = statement.on_conflict_do_update(
+        index_elements=[ROLLUP.c.day, ROLLUP.c.tax_rate],
+        set_={name: ROLLUP.c[name] + statement.excluded[name]
+              for name in ('invoice_count',) + AMOUNT_COLUMNS},
+    )
+    connection.execute(statement)
+
+
+def _values(invoice, previous=False):
+    """(día, tasa, subtotal, impuesto, total) de la factura; con previous=True, los valores antes del cambio."""
+    state = inspect(invoice)
+    values = []
+    for name in ('invoice_date', 'tax_rate') + AMOUNT_COLUMNS:
+        history = state.attrs[name].history
+        if previous and history.deleted:
+            values.append(history.deleted[0])
+        else:
+            values.append(getattr(invoice, name))
+    return values
+
+
+@event.listens_for(Invoice, 'after_insert')
+def _rollup_insert(mapper, connection, target):
+    day, tax_rate, subtotal, tax, total = _values(target)
+    _apply(connection, day, tax_rate, 1, subtotal, tax, total)
+
+
+@event.listens_for(Invoice, 'after_update')
+def _rollup_update(mapper, connection, target):
+    old = _values(target, previous=True)
+    new = _values(target)
+    if old == new:
+        return
+    day, tax_rate, subtotal, tax, total = old
+    _apply(connection, day, tax_rate, -1, -subtotal, -tax, -total)
+    day, tax_rate, subtotal, tax, total = new
+    _apply(connection, day, tax_rate, 1, subtotal, tax, total)
+
+
+@event.listens_for(Invoice, 'after_delete')
+def _rollup_delete(mapper, connection, target):
+    day, tax_rate, subtotal, tax, total = _values(target, previous=True)
+    _apply(connection, day, tax_rate, -1, -subtotal, -tax, -total)
+
+
+def rebuild_rollups(connection):
+    """
+    Recalcula todos los agregados desde la tabla de facturas (una sola consulta
+    GROUP BY). Se usa para el histórico o si alguna vez se cargaron facturas por
+    fuera del ORM.
+
+    Returns:
+        La cantidad de filas (día, tasa) generadas.
+    """
+    connection.execute(delete(ROLLUP))
+    grouped = select(
+        Invoice.invoice_date, Invoice.tax_rate, func.count(),
+        *[func.sum(getattr(Invoice, name)) for name in AMOUNT_COLUMNS]
+    ).group_by(Invoice.invoice_date, Invoice.tax_rate)
+    connection.execute(ROLLUP.insert().from_select(
+        ['day', 'tax_rate', 'invoice_count'] + list(AMOUNT_COLUMNS), grouped))
+    return connection.execute(select(func.count()).select_from(ROLLUP)).scalar()
+
+
+def rollup_report(session, group='day', date_from=None, date_to=None):
+    """
+    Informe de facturación agrupado por día, mes o tasa de impuesto, leído sólo de
+    los agregados diarios (búsqueda por rango sobre la clave primaria).
+
+    Returns:
+        Un diccionario con 'rows' (lista de períodos con sus importes) y 'totals'.
+    """
+    _, key = REPORT_GROUPS[group]
+    query = session.query(InvoiceDailyRollup).filter(InvoiceDailyRollup.invoice_count > 0)
+    if date_from:
+        query = query.filter(InvoiceDailyRollup.day >= date_from)
+    if date_to:
+        query = query.filter(InvoiceDailyRollup.day <= date_to)
+
+    periods = {}
+    totals = {'invoice_count': 0, 'subtotal_amount': 0.0, 'tax_amount': 0.0, 'total_amount': 0.0}
+    for row in query.order_by(InvoiceDailyRollup.day, InvoiceDailyRollup.tax_rate):
+        period = periods.setdefault(key(row), {'period': key(row), 'invoice_count': 0, 'subtotal_amount': 0.0,
+                                               'tax_amount': 0.0, 'total_amount': 0.0})
+        for name in totals:
+            period[name] += getattr(row, name)
+            totals[name] += getattr(row, name)
+
+    rows = [periods[period] for period in sorted(periods)]
+    return {'group': group, 'rows': rows, 'totals': totals}
@@ -0,0 +1,227 @@
+# utils/search.py
+# Búsqueda de texto completo para el catálogo de motos.
+# Mantiene un índice auxiliar sincronizado con la tabla 'moto':
+#   - SQLite: tabla virtual FTS5 'moto_fts' (rowid = id de la moto).
+#   - PostgreSQL: tabla 'moto_search' con una columna tsvector e índice GIN.
+# El texto se normaliza (minúsculas y sin acentos) antes de indexarlo y antes de
+# buscar, de modo que "cafe" encuentra "Café" en ambos motores.
+#
+# Con la misma normalización se rellena Invoice.customer_name_search, la columna
+# indexada del filtro por cliente del listado de facturas: lower() de SQLite sólo
+# convierte letras ASCII, así que "Álvaro" y "álvaro" no coincidían en SQL.
+
+import re
+import unicodedata
+
+from sqlalchemy import event, text, Float, Integer, or_, func
+from sqlalchemy.sql import table, column
+
+from models import Invoice, Moto
+
+# Caché de backend de búsqueda por URL de motor: 'fts5', 'tsvector' o None (sin índice).
+_backend_cache = {}
+
+# Tabla ligera para construir consultas contra el índice de PostgreSQL.
+_moto_search = table('moto_search', column('moto_id'), column('document'))
+
+
+def normalize_text(value):
+    """Pasa el texto a minúsculas y elimina los acentos (NFKD sin marcas combinantes)."""
+    if not value:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', value)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+def _tokens(value):
+    """Divide un texto normalizado en términos de búsqueda alfanuméricos."""
+    return re.findall(r'\w+', normalize_text(value))
+
+
+def _search_backend(connection):
+    """Detecta (y recuerda) qué índice de búsqueda existe para la conexión dada."""
+    key = str(connection.engine.url)
+    if key in _backend_cache:
+        return _backend_cache[key]
+
+    backend = None
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        exists = connection.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'moto_fts'"
+        )).first()
+        backend = 'fts5' if exists else None
+    elif dialect == 'postgresql':
+        exists = connection.execute(text("SELECT to_regclass('moto_search')")).scalar()
+        backend = 'tsvector' if exists else None
+
+    _backend_cache[key] = backend
+    return backend
+
+
+def create_search_index(connection):
+    """
+    Crea el índice de texto completo si no existe y lo puebla con las motos actuales.
+    Se ejecuta como una migración (ver utils/migrations.py).
+
+    Returns:
+        True si el índice quedó disponible, False si el motor no lo soporta.
+    """
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        try:
+            connection.execute(text(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS moto_fts USING fts5("
+                "marca, modelo, descripcion, tokenize = 'unicode61 remove_diacritics 2')"
+            ))
+        except Exception as e:
+            # SQLite compilado sin FTS5: la búsqueda usará el filtro LIKE de respaldo.
+            print(f"Advertencia: FTS5 no disponible, se usará búsqueda LIKE: {e}")
+            return False
+    elif dialect == 'postgresql':
+        connection.execute(text(
+            "CREATE TABLE IF NOT EXISTS moto_search ("
+            "moto_id INTEGER PRIMARY KEY REFERENCES moto(id) ON DELETE CASCADE, "
+            "document TSVECTOR NOT NULL)"
+        ))
+        connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_moto_search_document ON moto_search USING GIN (document)"
+        ))
+    else:
+        return False
+
+    _backend_cache.pop(str(connection.engine.url), None)
+    rebuild_search_index(connection)
+    return True
+
+
+def rebuild_search_index(connection):
+    """Vuelve a indexar todas las motos. Útil tras crear el índice o restaurar una copia."""
+    backend = _search_backend(connection)
+    if backend == 'fts5':
+        connection.execute(text("DELETE FROM moto_fts"))
+    elif backend == 'tsvector':
+        connection.execute(text("DELETE FROM moto_search"))
+    else:
+        return
+
+    rows = connection.execute(text("SELECT id, marca, modelo, descripcion FROM moto")).mappings().all()
+    for row in rows:
+        _index_row(connection, backend, row['id'], row['marca'], row['modelo'], row['descripcion'])
+
+
+def _index_row(connection, backend, moto_id, marca, modelo, descripcion):
+    params = {
+        'id': moto_id,
+        'marca': normalize_text(marca),
+        'modelo': normalize_text(modelo),
+        'descripcion': normalize_text(descripcion),
+    }
+    if backend == 'fts5':
+        connection.execute(text("DELETE FROM moto_fts WHERE rowid = :id"), params)
+        connection.execute(text(
+            "INSERT INTO moto_fts (rowid, marca, modelo, descripcion) "
+            "VALUES (:id, :marca, :modelo, :descripcion)"
+        ), params)
+    elif backend == 'tsvector':
+        # Marca y modelo pesan más que la descripción en el ranking.
+        connection.execute(text(
+            "INSERT INTO moto_search (moto_id, document) VALUES (:id, "
+            "setweight(to_tsvector('simple', :marca), 'A') || "
+            "setweight(to_tsvector('simple', :modelo), 'A') || "
+            "setweight(to_tsvector('simple', :descripcion), 'C')) "
+            "ON CONFLICT (moto_id) DO UPDATE SET document = EXCLUDED.document"
+        ), params)
+
+
+def _delete_row(connection, backend, moto_id):
+    if backend == 'fts5':
+        connection.execute(text("DELETE FROM moto_fts WHERE rowid = :id"), {'id': moto_id})
+    elif backend == 'tsvector':
+        connection.execute(text("DELETE FROM moto_search WHERE moto_id = :id"), {'id': moto_id})
+
+
+# --- Sincronización con la tabla 'moto' ---
+# Los eventos del mapper se ejecutan dentro de la misma transacción que el INSERT,
+# UPDATE o DELETE de la moto, así que el índice nunca queda desfasado tras un commit
+# (ni con datos de una transacción revertida).
+
+@event.listens_for(Moto, 'after_insert')
+@event.listens_for(Moto, 'after_update')
+def _sync_moto_search(mapper, connection, target):
+    backend = _search_backend(connection)
+    if backend:
+        _index_row(connection, backend, target.id, target.marca, target.modelo, target.descripcion)
+
+
+@event.listens_for(Moto, 'after_delete')
+def _remove_moto_search(mapper, connection, target):
+    backend = _search_backend(connection)
+    if backend:
+        _delete_row(connection, backend, target.id)
+
+
+def apply_search(query, db_instance, search_text):
+    """
+    Aplica el filtro de búsqueda de texto completo a una consulta de Moto.
+
+    Returns:
+        Una tupla (query, score). 'score' es una expresión ordenable de forma
+        ascendente (la mejor coincidencia primero), o None si se usó el filtro
+        LIKE de respaldo porque no hay índice de texto completo.
+    """
+    terms = _tokens(search_text)
+    if not terms:
+        return query, None
+
+    engine = db_instance.engine
+    backend = _backend_cache.get(str(engine.url), False)
+    if backend is False:
+        with engine.connect() as connection:
+            backend = _search_backend(connection)
+
+    if backend == 'fts5':
+        # Cada término se busca como prefijo y todos deben aparecer ("hon cb" -> Honda CB1000R).
+        match = ' '.join(f'"{term}"*' for term in terms)
+        fts = text(
+            "SELECT rowid AS moto_id, bm25(moto_fts, 10.0, 10.0, 1.0) AS score "
+            "FROM moto_fts WHERE moto_fts MATCH :match"
+        ).bindparams(match=match).columns(moto_id=Integer, score=Float).subquery('fts')
+        return query.join(fts, fts.c.moto_id == Moto.id), fts.c.score
+
+    if backend == 'tsvector':
+        tsquery = func.to_tsquery('simple', ' & '.join(f'{term}:*' for term in terms))
+        query = query.join(_moto_search, _moto_search.c.moto_id == Moto.id)
+        query = query.filter(_moto_search.c.document.op('@@')(tsquery))
+        return query, -func.ts_rank(_moto_search.c.document, tsquery)
+
+    # Respaldo sin índice: búsqueda por subcadena en marca, modelo y descripción.
+    search_pattern = f"%{search_text}%"
+    query = query.filter(or_(
+        Moto.marca.ilike(search_pattern),
+        Moto.modelo.ilike(search_pattern),
+        Moto.descripcion.ilike(search_pattern)
+    ))
+    return query, None
+
+
+# --- Nombre de cliente normalizado de las facturas ---
+
+@event.listens_for(Invoice, 'before_insert')
+@event.listens_for(Invoice, 'before_update')
+def _normalize_customer_name(mapper, connection, target):
+    target.customer_name_search = normalize_text(target.customer_name)
+
+
+def fill_customer_search(connection, batch_size=1000):
+    """Rellena customer_name_search en las facturas que todavía no lo tienen."""
+    select_pending = text(
+        "SELECT id, customer_name FROM invoice WHERE customer_name_search IS NULL LIMIT :limit"
+    )
+    update = text("UPDATE invoice SET customer_name_search = :search WHERE id = :id")
+    while True:
+        rows = connection.execute(select_pending, {'limit': batch_size}).all()
+        if not rows:
+            return
+        connection.execute(update, [{'id': row.id, 'search': normalize_text(row.customer_name)}
+                                    for row in rows])
@@ -0,0 +1,117 @@
+# utils/sqlite_tuning.py
+# Configuración de las conexiones SQLite para varios workers de gunicorn.
+# Con la configuración por defecto (journal_mode=DELETE) un proceso que escribe
+# bloquea toda la base de datos y los lectores del catálogo esperan o fallan con
+# "database is locked". En cada conexión nueva del pool se aplican:
+#   - journal_mode=WAL: los lectores no bloquean al escritor ni el escritor a los lectores.
+#   - synchronous=NORMAL: con WAL sigue siendo seguro ante caídas del proceso y evita
+#     un fsync por cada commit.
+#   - busy_timeout: espera al bloqueo en lugar de fallar de inmediato.
+#   - cache_size y mmap_size: más páginas en memoria y lectura por mmap.
+# Además, un hilo de mantenimiento ejecuta periódicamente PRAGMA optimize y un
+# checkpoint del WAL para que el archivo -wal no crezca sin límite.
+
+import threading
+import time
+
+from sqlalchemy import event
+
+from extensions import db
+
+DEFAULT_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,        # milisegundos
+    'cache_size': -32000,        # negativo = KiB (32 MB por conexión)
+    'mmap_size': 268435456,      # 256 MB
+    'temp_store': 'MEMORY',
+}
+
+# Segundos entre ejecuciones de PRAGMA optimize + checkpoint en cada proceso.
+DEFAULT_MAINTENANCE_INTERVAL = 3600
+
+
+def apply_pragmas(dbapi_connection, pragmas):
+    """Aplica los PRAGMA a una conexión sqlite3 recién abierta."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
+
+
+def tune_engine(engine, pragmas=None):
+    """Registra los PRAGMA para cada conexión nueva del engine (sólo si es SQLite)."""
+    if engine.dialect.name != 'sqlite':
+        return False
+    pragmas = dict(DEFAULT_SQLITE_PRAGMAS if pragmas is None else pragmas)
+
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, pragmas)
+
+    return True
+
+
+def run_maintenance(engine):
+    """
+    PRAGMA optimize (actualiza las estadísticas del planificador sólo donde hace
+    falta) y un checkpoint PASSIVE del WAL, que no bloquea a lectores ni escritores.
+
+    Returns:
+        El resultado del checkpoint: (bloqueado, páginas en el WAL, páginas copiadas).
+    """
+    with engine.connect() as connection:
+        connection.exec_driver_sql('PRAGMA optimize')
+        return tuple(connection.exec_driver_sql('PRAGMA wal_checkpoint(PASSIVE)').fetchone())
+
+
+class SQLiteTuning:
+    """Extensión que configura los engines SQLite de la aplicación y su mantenimiento."""
+
+    def __init__(self, app=None):
+        self.app = None
+        self._engines = []
+        self._thread = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Debe llamarse después de db.init_app(app) y antes de abrir conexiones."""
+        self.app = app
+        app.config.setdefault('SQLITE_PRAGMAS', DEFAULT_SQLITE_PRAGMAS)
+        app.config.setdefault('SQLITE_MAINTENANCE_INTERVAL', DEFAULT_MAINTENANCE_INTERVAL)
+        app.extensions['sqlite_tuning'] = self
+
+        with app.app_context():
+            self._engines = [engine for engine in db.engines.values()
+                             if tune_engine(engine, app.config['SQLITE_PRAGMAS'])]
+        if self._engines and app.config['SQLITE_MAINTENANCE_INTERVAL']:
+            # El hilo se inicia con la primera petición: así cada worker de gunicorn
+            # tiene el suyo y los scripts de línea de comandos no lo arrancan.
+            app.before_request(self._start_maintenance)
+
+    def _start_maintenance(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._maintenance_loop,
+                                                name='sqlite-maintenance', daemon=True)
+                self._thread.start()
+
+    def _maintenance_loop(self):
+        interval = self.app.config['SQLITE_MAINTENANCE_INTERVAL']
+        while True:
+            time.sleep(interval)
+            for engine in self._engines:
+                try:
+                    run_maintenance(engine)
+                except Exception as e:
+                    print(f"Error en el mantenimiento de SQLite: {e}")
+
+
+# Instancia compartida, inicializada en app.py con sqlite_tuning.init_app(app).
+sqlite_tuning = SQLiteTuning()
@@ -0,0 +1,129 @@
+# utils/storage.py
+# Almacenamiento de imágenes subidas direccionado por contenido.
+# Cada archivo se guarda una sola vez con el nombre de su hash SHA-256
+# (images/uploads/<hash>.<ext>): la misma imagen subida dos veces ocupa un único
+# archivo, el nombre no choca entre workers y, como el contenido de una URL nunca
+# cambia, puede servirse con "Cache-Control: immutable" durante un año.
+# Los archivos se eliminan cuando ninguna moto los referencia (conteo de referencias).
+
+import hashlib
+import os
+import re
+import time
+import uuid
+
+from models import Moto
+from utils.images import generate_derivatives, load_manifest, remove_derivatives
+
+UPLOADS_PREFIX = 'images/uploads/'
+CHUNK_SIZE = 64 * 1024
+
+# Un archivo recién guardado (o reutilizado) no se borra durante este margen, para
+# no eliminarlo mientras otra petición que acaba de referenciarlo aún no hizo commit.
+GC_GRACE_SECONDS = 60
+
+CONTENT_ADDRESSED_RE = re.compile(
+    r'^images/(?:uploads/[0-9a-f]{64}\.\w+|derivatives/uploads/[0-9a-f]{64}/[\w.]+)$'
+)
+
+
+def is_content_addressed(static_filename):
+    """True si la ruta (relativa a static/) es inmutable por estar nombrada por su hash."""
+    return bool(CONTENT_ADDRESSED_RE.match(static_filename))
+
+
+def store_upload(file_storage, extension, static_folder):
+    """
+    Guarda un archivo subido calculando su hash mientras se escribe a disco.
+
+    Args:
+        file_storage: El FileStorage de Werkzeug (form.imagen.data).
+        extension: Extensión normalizada del archivo (sin punto).
+        static_folder: Ruta absoluta de la carpeta static/.
+
+    Returns:
+        La ruta relativa a static/ para guardar en Moto.imagen_url.
+    """
+    upload_folder = os.path.join(static_folder, UPLOADS_PREFIX)
+    os.makedirs(upload_folder, exist_ok=True)
+
+    digest = hashlib.sha256()
+    tmp_path = os.path.join(upload_folder, f'.{uuid.uuid4().hex}.tmp')
+    try:
+        with open(tmp_path, 'wb') as f:
+            while True:
+                chunk = file_storage.stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                f.write(chunk)
+
+        image_rel_path = f'{UPLOADS_PREFIX}{digest.hexdigest()}.{extension}'
+        final_path = os.path.join(static_folder, image_rel_path)
+        if os.path.exists(final_path):
+            # Contenido ya almacenado: se descarta la copia y se renueva la fecha
+            # para que la recolección no lo borre mientras se guarda la moto.
+            os.remove(tmp_path)
+            os.utime(final_path)
+        else:
+            # os.replace es atómico: si dos workers suben lo mismo a la vez, ambos
+            # terminan con el mismo archivo completo.
+            os.replace(tmp_path, final_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    if not load_manifest(static_folder, image_rel_path):
+        generate_derivatives(static_folder, image_rel_path)
+    return image_rel_path
+
+
+def reference_count(image_rel_path):
+    """Cantidad de motos que usan una imagen."""
+    return Moto.query.filter(Moto.imagen_url == image_rel_path).count()
+
+
+def release_upload(image_rel_path, static_folder):
+    """
+    Elimina una imagen subida (y sus derivados) si ya ninguna moto la referencia.
+    Debe llamarse después del commit que quitó la referencia.
+
+    Returns:
+        True si el archivo se eliminó.
+    """
+    if not image_rel_path or not image_rel_path.startswith(UPLOADS_PREFIX):
+        return False
+    if reference_count(image_rel_path) > 0:
+        return False
+
+    path = os.path.join(static_folder, image_rel_path)
+    try:
+        if time.time() - os.stat(path).st_mtime < GC_GRACE_SECONDS:
+            return False
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    remove_derivatives(static_folder, image_rel_path)
+    return True
+
+
+def sweep_unreferenced_uploads(static_folder):
+    """
+    Recorre images/uploads y elimina los archivos sin referencias (por ejemplo,
+    los que quedaron dentro del margen de gracia al liberarlos).
+
+    Returns:
+        La lista de rutas eliminadas.
+    """
+    upload_folder = os.path.join(static_folder, UPLOADS_PREFIX)
+    if not os.path.isdir(upload_folder):
+        return []
+    referenced = {url for (url,) in Moto.query.with_entities(Moto.imagen_url).distinct()}
+    removed = []
+    for filename in os.listdir(upload_folder):
+        image_rel_path = f'{UPLOADS_PREFIX}{filename}'
+        if filename.startswith('.') or image_rel_path in referenced:
+            continue
+        if release_upload(image_rel_path, static_folder):
+            removed.append(image_rel_path)
+    return removed
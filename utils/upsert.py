@@ -0,0 +1,22 @@
+# utils/upsert.py
+# INSERT ... ON CONFLICT DO UPDATE para los motores soportados (SQLite y PostgreSQL).
+# Ambos dialectos ofrecen la misma API (on_conflict_do_update), pero cada uno tiene
+# su propia construcción de insert; esta función elige la del motor en uso.
+
+import importlib
+
+# Se importa sólo el dialecto del motor en uso: cargar el de PostgreSQL en una
+# instalación con SQLite alarga el arranque de cada worker sin necesidad.
+_DIALECT_MODULES = {
+    'sqlite': 'sqlalchemy.dialects.sqlite',
+    'postgresql': 'sqlalchemy.dialects.postgresql',
+}
+
+
+def dialect_insert(dialect_name):
+    """Construcción insert() con soporte de on_conflict_do_update para el dialecto indicado."""
+    try:
+        module_name = _DIALECT_MODULES[dialect_name]
+    except KeyError:
+        raise NotImplementedError(f"INSERT ... ON CONFLICT no soportado para '{dialect_name}'")
+    return importlib.import_module(module_name).insert